@@ -3,6 +3,12 @@ chat_llm.py - Interaktiver Chat mit verschiedenen LLMs via Hugging Face
 
 Unterstützte Modelle:
     GPT-2, DialoGPT, GPT-Neo, TinyLlama, Mistral und mehr
+    [0] ist ein kleines, zufällig initialisiertes Modell ohne Download —
+    zum Testen von Streaming und KV-Cache (gibt nur Kauderwelsch aus)
+
+Die Antwort wird Token für Token ausgegeben. Token-IDs und KV-Cache
+(past_key_values) bleiben über die Runden erhalten, so wird pro Runde
+nur die neue Eingabe tokenisiert und durch das Modell gerechnet.
 
 Installation:
     python3 -m venv llm_env
@@ -13,8 +19,10 @@ Verwendung:
     python chat_llm.py
 """
 
+import time
+
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, TextStreamer
 
 
 # =============================================================================
@@ -23,6 +31,13 @@ from transformers import AutoModelForCausalLM, AutoTokenizer
 # =============================================================================
 
 MODELS = {
+    "0": {
+        "name":        "tiny-random",
+        "label":       "Tiny Random         ~0MB    Test ohne Download, nur Zufall",
+        "format":      "gpt2",
+        "max_context": 900,
+        "random":      True,
+    },
     "1": {
         "name":        "gpt2",
         "label":       "GPT-2 Small         ~1GB    Text-Completion",
@@ -67,6 +82,8 @@ MODELS = {
     },
 }
 
+MAX_NEW_TOKENS = 100
+
 
 # =============================================================================
 # CHAT-FORMAT FUNKTIONEN
@@ -127,6 +144,35 @@ def format_response(response, fmt, tokenizer):
 # MODELL LADEN
 # =============================================================================
 
+def build_random_model(max_context):
+    """
+    Kleines GPT-2 mit Zufallsgewichten und Byte-Tokenizer — alles lokal,
+    kein Download. Die Ausgabe ist sinnlos, aber Tokenisierung, Streaming
+    und KV-Cache laufen genau wie bei den echten Modellen.
+    """
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    # Byte-Level BPE ohne Merges: jedes Byte ist ein Token
+    vocab = {ch: i for i, ch in enumerate(sorted(pre_tokenizers.ByteLevel.alphabet()))}
+    vocab["<|endoftext|>"] = len(vocab)
+    backend = Tokenizer(models.BPE(vocab=vocab, merges=[]))
+    backend.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    backend.decoder = decoders.ByteLevel()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, eos_token="<|endoftext|>")
+
+    config = GPT2Config(
+        vocab_size=len(vocab),
+        n_positions=max_context + MAX_NEW_TOKENS,
+        n_embd=64,
+        n_layer=2,
+        n_head=4,
+        bos_token_id=vocab["<|endoftext|>"],
+        eos_token_id=vocab["<|endoftext|>"],
+    )
+    return GPT2LMHeadModel(config), tokenizer
+
+
 def load_model(model_config):
     """
     Lädt Tokenizer und Modell von Hugging Face.
@@ -135,6 +181,14 @@ def load_model(model_config):
     """
     model_name = model_config["name"]
 
+    if model_config.get("random"):
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        print(f"\nErzeuge zufälliges Testmodell ({device.upper()})...")
+        model, tokenizer = build_random_model(model_config["max_context"])
+        model = model.to(device)
+        model.eval()
+        return model, tokenizer, device
+
     print(f"\n{'='*60}")
     print(f"LADE MODELL VON HUGGING FACE")
     print(f"Modell: {model_name}")
@@ -170,18 +224,68 @@ def load_model(model_config):
 # CHAT LOOP
 # =============================================================================
 
+class TimedStreamer(TextStreamer):
+    """
+    Gibt die Antwort aus, sobald ganze Wörter fertig sind, und misst
+    Time-to-First-Token und Tokens pro Sekunde.
+    """
+
+    def __init__(self, tokenizer):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.start_time = time.perf_counter()
+        self.first_token_time = None
+        self.end_time = None
+        self.token_count = 0
+
+    def put(self, value):
+        # Der erste Aufruf ist der Prompt, danach kommt je ein neues Token
+        if not self.next_tokens_are_prompt:
+            if self.first_token_time is None:
+                self.first_token_time = time.perf_counter()
+            self.token_count += value.numel()
+        super().put(value)
+
+    def end(self):
+        self.end_time = time.perf_counter()
+        super().end()
+
+    def stats(self):
+        """(Time-to-First-Token in s, Tokens/s nach dem ersten Token)"""
+        if self.first_token_time is None:
+            return None, 0.0
+        ttft = self.first_token_time - self.start_time
+        decode_time = self.end_time - self.first_token_time
+        tokens_per_second = (self.token_count - 1) / decode_time if decode_time > 0 else 0.0
+        return ttft, tokens_per_second
+
+
+def encode(tokenizer, text, device, add_special_tokens=False):
+    """Tokenisiert nur text (ohne den bisherigen Verlauf) -> (1, n) Tensor"""
+    return tokenizer(
+        text,
+        return_tensors="pt",
+        add_special_tokens=add_special_tokens,
+    )["input_ids"].to(device)
+
+
 def chat_loop(model, tokenizer, device, model_config):
     """
     Interaktiver Chat mit Kontextspeicher.
 
     Bei jeder Eingabe wird der gesamte bisherige Gesprächsverlauf
-    mitgeschickt — genau wie bei ChatGPT & Co.
+    mitgeschickt — genau wie bei ChatGPT & Co. Statt ihn jedes Mal neu zu
+    tokenisieren und durchzurechnen, bleiben die Token-IDs und der
+    KV-Cache (Keys/Values aller bisherigen Tokens in jeder Schicht)
+    erhalten; generate() rechnet nur die Tokens, die noch nicht im Cache
+    sind.
 
     Befehle:
         exit  -> Chat beenden
         reset -> Kontext löschen, neues Gespräch starten
     """
-    context = ""
+    context = ""            # Verlauf als Text, nur für format_input
+    history_ids = None      # Token-IDs des ganzen Gesprächs (1, L)
+    past_key_values = None  # KV-Cache zu history_ids
     fmt = model_config["format"]
     max_context = model_config["max_context"]
 
@@ -199,53 +303,69 @@ def chat_loop(model, tokenizer, device, model_config):
 
         if user_input.lower() == "reset":
             context = ""
+            history_ids = None
+            past_key_values = None
             print("(Kontext zurückgesetzt — neues Gespräch)")
             continue
 
-        # Eingabe im richtigen Format an Kontext anhängen
-        context = format_input(user_input, context, fmt, tokenizer)
-
-        # Tokenisieren mit Kontext-Limit
-        inputs = tokenizer(
-            context,
-            return_tensors="pt",
-            truncation=True,
-            max_length=max_context,
-            padding=False,
-        ).to(device)
-
-        context_length = inputs["input_ids"].shape[1]
-
-        if context_length >= max_context:
+        # Eingabe im richtigen Format anhängen, aber nur den neuen Teil
+        # tokenisieren (Sonder-Tokens wie BOS nur am Gesprächsanfang)
+        new_context = format_input(user_input, context, fmt, tokenizer)
+        new_ids = encode(tokenizer, new_context[len(context):], device,
+                         add_special_tokens=history_ids is None)
+        context = new_context
+        history_ids = new_ids if history_ids is None else torch.cat([history_ids, new_ids], dim=1)
+
+        # Kontext-Limit: ältere Hälfte vergessen, der Cache passt dann nicht
+        # mehr zu den Positionen und wird neu aufgebaut
+        if history_ids.shape[1] + MAX_NEW_TOKENS > max_context:
             print("(Kontext wird gekürzt — ältere Teile vergessen...)")
+            history_ids = history_ids[:, -(max_context // 2):]
+            past_key_values = None
+
+        context_length = history_ids.shape[1]
+        cached_length = past_key_values.get_seq_length() if past_key_values is not None else 0
 
         # Attention Mask explizit erstellen
         # 1 = Token beachten, 0 = ignorieren (Padding)
         # Da wir kein Padding verwenden, sind alle Tokens 1
-        attention_mask = torch.ones_like(inputs["input_ids"])
+        attention_mask = torch.ones_like(history_ids)
 
-        # Text generieren
+        # Text generieren und dabei direkt ausgeben
+        print("\nModell: ", end="", flush=True)
+        streamer = TimedStreamer(tokenizer)
         with torch.no_grad():
             outputs = model.generate(
-                inputs["input_ids"],
+                history_ids,
                 attention_mask=attention_mask,
-                max_new_tokens=100,
+                past_key_values=past_key_values,
+                max_new_tokens=MAX_NEW_TOKENS,
                 do_sample=True,
                 temperature=0.8,
                 top_p=0.95,
                 pad_token_id=tokenizer.eos_token_id,
                 eos_token_id=tokenizer.eos_token_id,
+                streamer=streamer,
+                return_dict_in_generate=True,
             )
+        past_key_values = outputs.past_key_values
 
         # Nur neue Tokens extrahieren
-        new_token_ids = outputs[0][inputs["input_ids"].shape[1]:]
-        response = tokenizer.decode(new_token_ids, skip_special_tokens=True)
+        new_token_ids = outputs.sequences[:, context_length:]
+        response = tokenizer.decode(new_token_ids[0], skip_special_tokens=True)
 
-        # Antwort zum Kontext hinzufügen
-        context += format_response(response, fmt, tokenizer)
+        # Antwort zum Verlauf hinzufügen: die erzeugten IDs direkt, ein
+        # abschließendes EOS ersetzt das Trennzeichen aus format_response
+        if new_token_ids.shape[1] and new_token_ids[0, -1] == tokenizer.eos_token_id:
+            new_token_ids = new_token_ids[:, :-1]
+        suffix = format_response(response, fmt, tokenizer)[len(response):]
+        context += response + suffix
+        history_ids = torch.cat([history_ids, new_token_ids, encode(tokenizer, suffix, device)], dim=1)
 
-        print(f"\nModell: {response}")
-        print(f"(Kontext: {context_length}/{max_context} Tokens)")
+        ttft, tokens_per_second = streamer.stats()
+        ttft_text = f"{ttft * 1000:.0f} ms" if ttft is not None else "-"
+        print(f"(Kontext: {context_length}/{max_context} Tokens, {cached_length} aus dem KV-Cache | "
+              f"erstes Token nach {ttft_text} | {tokens_per_second:.1f} Tokens/s)")
 
 
 # =============================================================================
@@ -266,7 +386,7 @@ def select_model():
     print("Danach startet es sofort aus dem Cache.")
 
     while True:
-        choice = input("\nModell wählen (1-7): ").strip()
+        choice = input("\nModell wählen (0-7): ").strip()
 
         if choice in MODELS:
             model_config = MODELS[choice]
@@ -276,7 +396,7 @@ def select_model():
             chat_loop(model, tokenizer, device, model_config)
             return
 
-        print("Ungültige Eingabe, bitte 1-7 eingeben.")
+        print("Ungültige Eingabe, bitte 0-7 eingeben.")
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ Implementierung basierend auf: Hochreiter & Schmidhuber (1997)
 
 Ausführen:
     python lstm_implementation.py
+    python lstm_implementation.py --benchmark   (Sequenzen/s: einzeln vs. Mini-Batch)
 
 Ausgabe:
     lstm_diagram.png   – Schaubild der LSTM-Architektur
@@ -13,6 +14,8 @@ Ausgabe:
 """
 
 import os
+import sys
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import FancyBboxPatch, Circle
@@ -49,6 +52,11 @@ class LSTMCell:
       c(t) = f(t) * c(t-1) + i(t) * g(t)             ← Cell State (CEC)
       o(t) = sigmoid(W_o · [h_{t-1}, x_t] + b_o)    ← Output Gate
       h(t) = o(t) * tanh(c(t))                        ← Hidden State
+
+    x, h und c sind Spaltenvektoren (n, 1) oder für einen Mini-Batch
+    Matrizen (n, batch) — eine Spalte pro Sequenz. Die optionale Maske
+    (1, batch) markiert aufgefüllte Zeitschritte (0): dort wird der
+    Zustand unverändert weitergereicht.
     """
 
     def __init__(self, input_size: int, hidden_size: int):
@@ -67,8 +75,8 @@ class LSTMCell:
         self.dW = np.zeros_like(self.W)
         self.db = np.zeros_like(self.b)
 
-    def forward(self, x: np.ndarray, h_prev: np.ndarray,
-                c_prev: np.ndarray) -> Tuple[np.ndarray, np.ndarray, dict]:
+    def forward(self, x: np.ndarray, h_prev: np.ndarray, c_prev: np.ndarray,
+                mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray, dict]:
         n      = self.hidden_size
         concat = np.vstack([h_prev, x])
         gates  = self.W @ concat + self.b
@@ -81,9 +89,15 @@ class LSTMCell:
         c = f * c_prev + i * g          # Cell State (CEC – kein Vanishing!)
         h = o * tanh(c)                 # Hidden State
 
-        cache = dict(x=x, h_prev=h_prev, c_prev=c_prev,
-                     f=f, i=i, g=g, o=o, c=c, h=h, concat=concat)
-        return h, c, cache
+        c_out, h_out = c, h
+        if mask is not None:
+            # Aufgefüllte Sequenzen behalten ihren letzten echten Zustand
+            c_out = mask * c + (1 - mask) * c_prev
+            h_out = mask * h + (1 - mask) * h_prev
+
+        cache = dict(x=x, h_prev=h_prev, c_prev=c_prev, mask=mask,
+                     f=f, i=i, g=g, o=o, c=c, h=h_out, concat=concat)
+        return h_out, c_out, cache
 
     def backward(self, dh: np.ndarray, dc: np.ndarray,
                  cache: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -91,11 +105,17 @@ class LSTMCell:
         f, i, g, o = cache['f'], cache['i'], cache['g'], cache['o']
         c, c_prev  = cache['c'], cache['c_prev']
         concat     = cache['concat']
+        mask       = cache['mask']
+
+        if mask is not None:
+            # Gradient der aufgefüllten Schritte fließt direkt zum Vorgänger
+            dh_carry, dc_carry = (1 - mask) * dh, (1 - mask) * dc
+            dh, dc = mask * dh, mask * dc
 
         tanh_c = tanh(c)
 
         do      = dh * tanh_c
-        dc     += dh * o * (1 - tanh_c**2)
+        dc      = dc + dh * o * (1 - tanh_c**2)
 
         df      = dc * c_prev
         di      = dc * g
@@ -109,13 +129,17 @@ class LSTMCell:
             do * o * (1 - o),          # Sigmoid-Ableitung Output
         ])
 
-        self.dW += d_gates @ concat.T
-        self.db += d_gates
+        self.dW += d_gates @ concat.T                      # summiert über den Batch
+        self.db += d_gates.sum(axis=1, keepdims=True)
 
         d_concat = self.W.T @ d_gates
         dh_prev  = d_concat[:n]
         dx       = d_concat[n:]
 
+        if mask is not None:
+            dh_prev = dh_prev + dh_carry
+            dc_prev = dc_prev + dc_carry
+
         return dh_prev, dc_prev, dx
 
     def update(self, lr: float):
@@ -138,14 +162,19 @@ class LSTMNetwork:
         self.dW_out      = np.zeros_like(self.W_out)
         self.db_out      = np.zeros_like(self.b_out)
 
-    def forward(self, inputs: list) -> Tuple[np.ndarray, list]:
+    def forward(self, inputs: list, masks: list = None) -> Tuple[np.ndarray, list]:
+        """
+        inputs: Liste von (input_size, batch)-Matrizen, eine pro Zeitschritt
+        masks:  optional, Liste von (1, batch)-Masken (1 = echte Eingabe)
+        """
         n      = self.hidden_size
-        h      = np.zeros((n, 1))
-        c      = np.zeros((n, 1))
+        batch  = inputs[0].shape[1]
+        h      = np.zeros((n, batch))
+        c      = np.zeros((n, batch))
         caches = []
 
-        for x in inputs:
-            h, c, cache = self.cell.forward(x, h, c)
+        for t, x in enumerate(inputs):
+            h, c, cache = self.cell.forward(x, h, c, None if masks is None else masks[t])
             caches.append(cache)
 
         y = self.W_out @ h + self.b_out
@@ -156,9 +185,9 @@ class LSTMNetwork:
         last_h = caches[-1]['h']
 
         self.dW_out += dy @ last_h.T
-        self.db_out += dy
+        self.db_out += dy.sum(axis=1, keepdims=True)
         dh = self.W_out.T @ dy
-        dc = np.zeros((n, 1))
+        dc = np.zeros((n, dy.shape[1]))
 
         for cache in reversed(caches):
             dh, dc, _ = self.cell.backward(dh, dc, cache)
@@ -190,29 +219,70 @@ def generate_adding_problem(T: int) -> Tuple[list, float]:
     return inputs, target
 
 
+def generate_adding_batch(T: int, batch_size: int) -> Tuple[list, list, np.ndarray]:
+    """
+    batch_size Sequenzen des Adding Problems (gleiche Verteilung wie
+    generate_adding_problem), mit Nullen auf die längste Sequenz aufgefüllt.
+
+    Returns:
+        inputs:  Liste von (2, batch)-Matrizen, eine pro Zeitschritt
+        masks:   Liste von (1, batch)-Masken, 1 = echte Eingabe, 0 = Auffüllung
+        targets: (1, batch)
+    """
+    lengths = T + np.random.randint(0, T // 10 + 1, size=batch_size)
+    seq_len = int(lengths.max())
+    cols    = np.arange(batch_size)
+    masks   = (np.arange(seq_len)[:, None] < lengths).astype(float)     # (seq_len, batch)
+    values  = np.random.uniform(-1, 1, (seq_len, batch_size)) * masks
+    markers = np.zeros((seq_len, batch_size))
+
+    idx1 = np.random.randint(0, np.minimum(10, lengths))
+    idx2 = np.random.randint(idx1 + 1, np.maximum(idx1 + 2, lengths // 2))
+    markers[idx1, cols] = 1.0
+    markers[idx2, cols] = 1.0
+
+    targets = 0.5 + (values[idx1, cols] + values[idx2, cols]) / 4.0
+    inputs  = list(np.stack([values, markers], axis=1))                # seq_len × (2, batch)
+    return inputs, list(masks[:, None, :]), targets[None, :]
+
+
+def train_step(net: LSTMNetwork, T: int, lr: float, batch_size: int = 1) -> float:
+    """
+    Ein Trainingsschritt: batch_size == 1 nimmt eine einzelne Sequenz
+    (Spaltenvektoren), sonst einen aufgefüllten Mini-Batch mit Masken.
+    Loss und Gradient sind über den Batch gemittelt.
+    """
+    if batch_size == 1:
+        inputs, target = generate_adding_problem(T)
+        masks, targets = None, np.array([[target]])
+    else:
+        inputs, masks, targets = generate_adding_batch(T, batch_size)
+
+    y, caches = net.forward(inputs, masks)
+    loss      = 0.5 * float(np.sum((y - targets) ** 2)) / batch_size
+
+    dy = (y - targets) / batch_size
+    net.backward(dy, caches)
+    net.update(lr)
+    return loss
+
+
 def train(T: int = 50, n_iter: int = 2000, hidden_size: int = 12,
-          lr: float = 0.05) -> Dict:
+          lr: float = 0.05, batch_size: int = 1) -> Dict:
     net    = LSTMNetwork(input_size=2, hidden_size=hidden_size, output_size=1)
     losses = []
 
     print(f"\n{'='*55}")
     print(f"  Training: LSTM auf dem Adding Problem (T={T})")
+    if batch_size > 1:
+        print(f"  Mini-Batches à {batch_size} Sequenzen")
     print(f"  Hochreiter & Schmidhuber (1997), Experiment 4")
     print(f"{'='*55}")
     print(f"  {'Iteration':>10}  {'Loss (MSE)':>12}  {'Status':>8}")
     print(f"  {'-'*42}")
 
     for step in range(1, n_iter + 1):
-        inputs, target = generate_adding_problem(T)
-        target_arr     = np.array([[target]])
-
-        y, caches = net.forward(inputs)
-        loss      = 0.5 * float(np.sum((y - target_arr) ** 2))
-        losses.append(loss)
-
-        dy = y - target_arr
-        net.backward(dy, caches)
-        net.update(lr)
+        losses.append(train_step(net, T, lr, batch_size))
 
         if step % 200 == 0:
             avg    = np.mean(losses[-200:])
@@ -236,6 +306,27 @@ def demo_inference(net: LSTMNetwork, T: int = 50, n_samples: int = 200):
     return errors
 
 
+def benchmark(T_values=(50, 100), n_sequences: int = 512, hidden_size: int = 12,
+              batch_sizes=(1, 8, 32, 128)):
+    """
+    Trainingsdurchsatz in Sequenzen/s: die bisherige Einzelsequenz-Schleife
+    (batch_size 1) gegen Mini-Batches, jeweils für n_sequences Sequenzen
+    inklusive Datenerzeugung, Forward, Backward und Update.
+    """
+    print(f"{'T':>5}{'Batch':>8}{'Sequenzen/s':>14}{'Faktor':>9}")
+    for T in T_values:
+        baseline = None
+        for batch_size in batch_sizes:
+            net   = LSTMNetwork(input_size=2, hidden_size=hidden_size, output_size=1)
+            steps = max(1, n_sequences // batch_size)
+            start = time.perf_counter()
+            for _ in range(steps):
+                train_step(net, T, lr=0.05, batch_size=batch_size)
+            rate  = steps * batch_size / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{T:>5}{batch_size:>8}{rate:>14.0f}{rate / baseline:>8.1f}x")
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Schaubilder
 # ──────────────────────────────────────────────────────────────────────────────
@@ -386,6 +477,10 @@ def save_training_plot(losses: list, errors: list):
 if __name__ == "__main__":
     np.random.seed(42)
 
+    if "--benchmark" in sys.argv:
+        benchmark()
+        sys.exit(0)
+
     save_diagram()
 
     result = train(T=50, n_iter=2000, hidden_size=12, lr=0.05)
@@ -1,5 +1,11 @@
 import math
 import random
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NeuralNetwork selbst kommt ohne NumPy aus
+    np = None
 
 
 class NeuralNetwork:
@@ -257,6 +263,121 @@ class NeuralNetwork:
         print("="*70)
 
 
+class NumpyNeuralNetwork(NeuralNetwork):
+    """
+    Dieselbe Architektur in Matrixform mit NumPy.
+
+    Jede Schicht ist eine Gewichtsmatrix W (Neuronen × Eingänge) und ein
+    Bias-Vektor b; eine Schicht für einen ganzen Batch ist
+    sigmoid(A @ Wᵀ + b) mit A (Beispiele × Eingänge).
+
+    Die Gewichte werden mit denselben Zufallszahlen wie in NeuralNetwork
+    initialisiert: bei gleichem random.seed() liefert train() dieselben
+    Ergebnisse (bis auf Rundung) wie die Listen-Version.
+    """
+
+    def __init__(self, layer_sizes):
+        if np is None:
+            raise ImportError("NumpyNeuralNetwork benötigt numpy (pip install numpy)")
+        super().__init__(layer_sizes)
+        self.weights = [np.array(w) for w in self.weights]
+        self.biases = [np.array(b) for b in self.biases]
+
+    def sigmoid(self, x):
+        """Sigmoid für ganze Arrays (Grenzen ±500 wie in NeuralNetwork)"""
+        return 1.0 / (1.0 + np.exp(-np.clip(x, -500, 500)))
+
+    def feedforward(self, inputs):
+        """Forward Pass für ein Beispiel (Vektor) oder einen Batch (Matrix, ein Beispiel pro Zeile)."""
+        activations = np.asarray(inputs, dtype=float)
+        for W, b in zip(self.weights, self.biases):
+            activations = self.sigmoid(activations @ W.T + b)
+        return activations
+
+    def train(self, inputs, targets, learning_rate=0.5, verbose=False):
+        """
+        Trainiert mit einem einzelnen Beispiel — dieselbe Rechnung wie
+        NeuralNetwork.train, nur schichtweise als Matrix-Operationen.
+        """
+        error = self.train_batch([inputs], [targets], learning_rate)
+        if verbose:
+            print(f"Input: {inputs}, Target: {targets}, Fehler (MSE): {error:.6f}")
+        return error
+
+    def train_batch(self, inputs, targets, learning_rate=0.5):
+        """
+        Ein Backpropagation-Schritt für einen ganzen Batch.
+
+        Die Gradienten der Beispiele werden addiert: ein Schritt mit allen
+        Trainingsbeispielen entspricht in erster Näherung einer Epoche
+        Online-Training mit derselben Lernrate.
+
+        Args:
+            inputs:  (Beispiele × Eingänge)
+            targets: (Beispiele × Ausgänge)
+
+        Returns:
+            Mittlerer Fehler (MSE) über den Batch
+        """
+        targets = np.asarray(targets, dtype=float)
+
+        # 1. FORWARD PASS — Aktivierungen aller Schichten für den Batch
+        all_activations = [np.asarray(inputs, dtype=float)]
+        for W, b in zip(self.weights, self.biases):
+            all_activations.append(self.sigmoid(all_activations[-1] @ W.T + b))
+        outputs = all_activations[-1]
+
+        # 2. FEHLER
+        error = float(np.mean((targets - outputs) ** 2))
+
+        # 3. BACKWARD PASS — Deltas aller Schichten mit den alten Gewichten
+        deltas = [None] * len(self.weights)
+        deltas[-1] = (targets - outputs) * self.sigmoid_derivative(outputs)
+        for layer_idx in range(len(self.weights) - 2, -1, -1):
+            error_sum = deltas[layer_idx + 1] @ self.weights[layer_idx + 1]
+            deltas[layer_idx] = error_sum * self.sigmoid_derivative(all_activations[layer_idx + 1])
+
+        # 4. GEWICHTE UND BIAS AKTUALISIEREN
+        for layer_idx in range(len(self.weights)):
+            self.weights[layer_idx] += learning_rate * deltas[layer_idx].T @ all_activations[layer_idx]
+            self.biases[layer_idx] += learning_rate * deltas[layer_idx].sum(axis=0)
+
+        return error
+
+
+def benchmark(epochs=200, seed=0):
+    """
+    Zeit pro Epoche XOR-Training (4 Beispiele) für die Architekturen aus
+    compare_architectures(): Listen-Version, NumPy pro Beispiel und
+    NumPy mit einem Batch pro Epoche. Prüft außerdem, dass NumPy pro
+    Beispiel dieselben Gewichte liefert wie die Listen-Version.
+    """
+    training_data = [([0, 0], [0]), ([0, 1], [1]), ([1, 0], [1]), ([1, 1], [0])]
+    inputs = [x for x, _ in training_data]
+    targets = [y for _, y in training_data]
+
+    print(f"{'Architektur':<16}{'Listen':>12}{'NumPy':>12}{'NumPy-Batch':>14}{'max. Abw.':>12}")
+    for arch in ([2, 2, 1], [2, 4, 1], [2, 8, 1], [2, 4, 4, 1], [2, 64, 64, 1]):
+        timings = []
+        for cls, batched in ((NeuralNetwork, False), (NumpyNeuralNetwork, False), (NumpyNeuralNetwork, True)):
+            random.seed(seed)
+            nn = cls(arch)
+            start = time.perf_counter()
+            for _ in range(epochs):
+                if batched:
+                    nn.train_batch(inputs, targets, learning_rate=0.5)
+                else:
+                    for x, y in training_data:
+                        nn.train(x, y, learning_rate=0.5)
+            timings.append(((time.perf_counter() - start) / epochs, nn))
+
+        (t_list, nn_list), (t_np, nn_np), (t_batch, _) = timings
+        deviation = max(float(np.abs(np.array(w) - w_np).max())
+                        for w, w_np in zip(nn_list.weights, nn_np.weights))
+        print(f"{str(arch):<16}{t_list * 1e3:>10.3f}ms{t_np * 1e3:>10.3f}ms"
+              f"{t_batch * 1e3:>12.3f}ms{deviation:>12.1e}")
+
+
 def detailed_training_demo():
     """
     Demonstriert das Training mit detaillierter Ausgabe
@@ -402,6 +523,13 @@ def train_xor_example():
 
 
 if __name__ == "__main__":
+    import sys
+
+    # Zeit pro Epoche: Listen vs. NumPy (python3 NNBackprop.py --benchmark)
+    if "--benchmark" in sys.argv:
+        benchmark()
+        sys.exit(0)
+
     # 1. Detaillierte Demonstration eines einzelnen Trainingsschritts
     detailed_training_demo()
 
@@ -1,5 +1,13 @@
+import contextlib
+import io
 import math
 import random
+import time
+
+try:
+    import numpy as np
+except ImportError:  # MultiLayerRNN selbst kommt ohne NumPy aus
+    np = None
 
 
 class MultiLayerRNN:
@@ -271,6 +279,184 @@ class MultiLayerRNN:
         return result['outputs']
 
 
+class NumpyMultiLayerRNN(MultiLayerRNN):
+    """
+    Dieselbe Architektur in Matrixform mit NumPy.
+
+    Jede Schicht ist eine Gewichtsmatrix W, eine rekurrente Matrix R (nur
+    Hidden Layers) und ein Bias-Vektor b. Die Eingangsprojektion einer
+    Schicht wird für alle Zeitschritte mit einer einzigen Matrix-
+    multiplikation berechnet, nur die Rekurrenz läuft als Schleife über t.
+    Mehrere gleich lange Sequenzen werden als Batch (B, T, Features)
+    gemeinsam verarbeitet.
+
+    Die Gewichte werden mit denselben Zufallszahlen wie in MultiLayerRNN
+    initialisiert: bei gleichem random.seed() liefert train() dieselben
+    Ergebnisse (bis auf Rundung) wie die Listen-Version.
+    """
+
+    def __init__(self, layer_sizes):
+        if np is None:
+            raise ImportError("NumpyMultiLayerRNN benötigt numpy (pip install numpy)")
+        super().__init__(layer_sizes)
+        self.weights = [np.array(w) for w in self.weights]
+        self.recurrent_weights = [None if r is None else np.array(r) for r in self.recurrent_weights]
+        self.biases = [np.array(b) for b in self.biases]
+
+    def tanh(self, x):
+        """tanh für ganze Arrays (Grenzen ±20 wie in MultiLayerRNN)"""
+        return np.where(x > 20, 1.0, np.where(x < -20, -1.0, np.tanh(x)))
+
+    def sigmoid(self, x):
+        """Sigmoid für ganze Arrays (Grenzen ±500 wie in MultiLayerRNN)"""
+        return 1.0 / (1.0 + np.exp(-np.clip(x, -500, 500)))
+
+    def forward(self, input_sequence):
+        """
+        Forward Pass durch alle Schichten über die Zeit.
+
+        Args:
+            input_sequence: (T, Eingänge) für eine Sequenz oder
+                            (B, T, Eingänge) für einen Batch
+
+        Returns:
+            Dictionary mit allen States für Backpropagation.
+            all_states[0] ist der Input (B, T, Eingänge), die Hidden Layers
+            haben (B, T+1, Größe) mit dem Initialzustand bei Index 0, der
+            Output Layer (B, T, Ausgänge).
+        """
+        inputs = np.asarray(input_sequence, dtype=float)
+        single = inputs.ndim == 2
+        if single:
+            inputs = inputs[np.newaxis]
+        batch_size, seq_length, _ = inputs.shape
+
+        all_states = [inputs]
+        for layer_idx in range(len(self.weights)):
+            # Wie in MultiLayerRNN sieht die Schicht zum Zeitpunkt t den
+            # State der vorherigen Schicht mit Index t (bei Hidden Layers
+            # inkl. Initialzustand an Index 0)
+            layer_input = all_states[layer_idx][:, :seq_length]
+            projected = layer_input @ self.weights[layer_idx].T + self.biases[layer_idx]
+
+            if layer_idx == len(self.weights) - 1:
+                all_states.append(self.sigmoid(projected))
+                break
+
+            recurrent = self.recurrent_weights[layer_idx]
+            states = np.zeros((batch_size, seq_length + 1, self.layer_sizes[layer_idx + 1]))
+            for t in range(seq_length):
+                states[:, t + 1] = self.tanh(projected[:, t] + states[:, t] @ recurrent.T)
+            all_states.append(states)
+
+        outputs = all_states[-1]
+        return {
+            'outputs': outputs[0] if single else outputs,
+            'all_states': all_states,
+        }
+
+    def train(self, input_sequence, target_sequence, learning_rate=0.1, bptt_steps=None):
+        """
+        Training mit Backpropagation Through Time für alle Schichten.
+
+        Args:
+            bptt_steps: Truncated BPTT — der Fehler fließt höchstens
+                        bptt_steps Zeitschritte zurück (None = ganze Sequenz,
+                        wie in MultiLayerRNN)
+        """
+        return self.train_batch([input_sequence], [target_sequence], learning_rate, bptt_steps)
+
+    def train_batch(self, input_sequences, target_sequences, learning_rate=0.1, bptt_steps=None):
+        """
+        BPTT für einen Batch gleich langer Sequenzen (B, T, Features).
+
+        Die Gradienten der Sequenzen werden addiert, ein Aufruf ist also
+        ein einziger Update-Schritt für den ganzen Batch.
+
+        Returns:
+            Mittlerer Fehler (MSE) über Batch, Zeit und Ausgänge
+        """
+        all_states = self.forward(input_sequences)['all_states']
+        targets = np.asarray(target_sequences, dtype=float)
+        outputs = all_states[-1]
+        seq_length = outputs.shape[1]
+
+        avg_error = float(np.mean((targets - outputs) ** 2))
+
+        # Output Layer Deltas
+        all_deltas = [None] * len(self.weights)
+        all_deltas[-1] = (targets - outputs) * self.sigmoid_derivative(outputs)
+
+        # Hidden Layers Deltas (rückwärts durch Schichten UND Zeit)
+        for layer_idx in range(len(self.weights) - 2, -1, -1):
+            # Fehler von nächster Schicht (spatial) für alle t auf einmal
+            delta_from_next = all_deltas[layer_idx + 1] @ self.weights[layer_idx + 1]
+            derivative = self.tanh_derivative(all_states[layer_idx + 1][:, 1:])
+            recurrent = self.recurrent_weights[layer_idx]
+
+            deltas = np.zeros_like(delta_from_next)
+            for t in range(seq_length - 1, -1, -1):
+                total = delta_from_next[:, t]
+                # Fehler von nächstem Zeitschritt (temporal), bei Truncated
+                # BPTT an den Blockgrenzen abgeschnitten
+                if t < seq_length - 1 and (bptt_steps is None or (t + 1) % bptt_steps):
+                    total = total + deltas[:, t + 1] @ recurrent
+                deltas[:, t] = total * derivative[:, t]
+            all_deltas[layer_idx] = deltas
+
+        # Gewichte updaten — Gradienten über Batch und Zeit summiert
+        for layer_idx in range(len(self.weights)):
+            deltas = all_deltas[layer_idx].reshape(-1, self.layer_sizes[layer_idx + 1])
+            layer_input = all_states[layer_idx][:, :seq_length].reshape(-1, self.layer_sizes[layer_idx])
+            self.weights[layer_idx] += learning_rate * deltas.T @ layer_input
+
+            # Rekurrente Gewichte (nur für Hidden Layers)
+            if self.recurrent_weights[layer_idx] is not None:
+                prev_states = all_states[layer_idx + 1][:, :seq_length].reshape(deltas.shape)
+                self.recurrent_weights[layer_idx] += learning_rate * deltas.T @ prev_states
+
+            self.biases[layer_idx] += learning_rate * deltas.sum(axis=0)
+
+        return avg_error
+
+
+def benchmark(epochs=20, num_sequences=30, seq_length=10, seed=0):
+    """
+    Zeit pro Epoche für die Mustererkennung aus example_deep_rnn()
+    (num_sequences Sequenzen der Länge seq_length): Listen-Version,
+    NumPy pro Sequenz und NumPy mit einem Batch pro Epoche. Prüft
+    außerdem, dass NumPy pro Sequenz dieselben Gewichte liefert wie die
+    Listen-Version.
+    """
+    rng = random.Random(seed)
+    inputs = [[[rng.randint(0, 1)] for _ in range(seq_length)] for _ in range(num_sequences)]
+    pattern = [1, 0, 1, 1, 0]
+    targets = [[[1 if i >= 4 and [x[0] for x in seq[i - 4:i + 1]] == pattern else 0]
+                for i in range(seq_length)] for seq in inputs]
+
+    print(f"{'Architektur':<18}{'Listen':>12}{'NumPy':>12}{'NumPy-Batch':>14}{'max. Abw.':>12}")
+    for arch in ([1, 4, 1], [1, 4, 4, 1], [1, 6, 4, 2, 1], [1, 8, 6, 4, 1], [1, 64, 64, 1]):
+        timings = []
+        for cls, batched in ((MultiLayerRNN, False), (NumpyMultiLayerRNN, False), (NumpyMultiLayerRNN, True)):
+            random.seed(seed)
+            with contextlib.redirect_stdout(io.StringIO()):
+                rnn = cls(arch)
+            start = time.perf_counter()
+            for _ in range(epochs):
+                if batched:
+                    rnn.train_batch(inputs, targets, learning_rate=0.01)
+                else:
+                    for x, y in zip(inputs, targets):
+                        rnn.train(x, y, learning_rate=0.01)
+            timings.append(((time.perf_counter() - start) / epochs, rnn))
+
+        (t_list, rnn_list), (t_np, rnn_np), (t_batch, _) = timings
+        deviation = max(float(np.abs(np.array(w) - w_np).max())
+                        for w, w_np in zip(rnn_list.weights, rnn_np.weights))
+        print(f"{str(arch):<18}{t_list * 1e3:>10.2f}ms{t_np * 1e3:>10.2f}ms"
+              f"{t_batch * 1e3:>12.2f}ms{deviation:>12.1e}")
+
+
 def compare_architectures():
     """Vergleicht verschiedene RNN-Architekturen"""
     print("=" * 80)
@@ -435,6 +621,13 @@ Moderne LLMs wie GPT haben oft 96+ Schichten!
 
 
 if __name__ == "__main__":
+    import sys
+
+    # Zeit pro Epoche: Listen vs. NumPy (python3 RNNBackprop.py --benchmark)
+    if "--benchmark" in sys.argv:
+        benchmark()
+        sys.exit(0)
+
     # Zeige Vergleich
     compare_architectures()
 
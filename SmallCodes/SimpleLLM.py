@@ -10,6 +10,8 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from bpe import BPEEncoder, train_merges
+
 
 # ============================================================================
 # TEIL 1: SUBWORD TOKENIZER
@@ -24,6 +26,8 @@ class SubwordTokenizer:
         self.token_counts = {}
         self.merges = []
         self.next_id = 0
+        # Schneller Encoder: Merges nach Rang, LRU-Cache pro Wort (bpe.py)
+        self.encoder = BPEEncoder(self)
 
         # Spezial-Tokens
         self._add_token("<PAD>")
@@ -78,12 +82,6 @@ class SubwordTokenizer:
             chars[-1] = chars[-1] + '</w>'
         return chars
 
-    def _get_pairs(self, chars):
-        pairs = set()
-        for i in range(len(chars) - 1):
-            pairs.add((chars[i], chars[i + 1]))
-        return pairs
-
     def _apply_bpe(self, word):
         chars = self._get_word_characters(word)
 
@@ -109,34 +107,11 @@ class SubwordTokenizer:
 
         print(f"Gefundene Wörter: {len(word_freqs)}")
 
-        vocab = {}
-        for word, freq in word_freqs.items():
-            chars = self._get_word_characters(word)
-            vocab[' '.join(chars)] = freq
-
-        for merge_step in range(num_merges):
-            pairs_count = {}
-            for word, freq in vocab.items():
-                chars = word.split()
-                for pair in self._get_pairs(chars):
-                    pairs_count[pair] = pairs_count.get(pair, 0) + freq
-
-            if not pairs_count:
-                break
-
-            best_pair = max(pairs_count, key=pairs_count.get)
+        # Paar-Zählungen werden inkrementell gepflegt, siehe bpe.py
+        for merge_step, (best_pair, _) in enumerate(
+                train_merges(word_freqs, num_merges, self._get_word_characters)):
             self.merges.append(best_pair)
-
-            new_vocab = {}
-            search_pattern = ' '.join(best_pair)
-            replacement = ''.join(best_pair)
-
-            for word, freq in vocab.items():
-                new_word = word.replace(search_pattern, replacement)
-                new_vocab[new_word] = freq
-
-            vocab = new_vocab
-            self._add_token(replacement, 0)
+            self._add_token(''.join(best_pair), 0)
 
             if (merge_step + 1) % 50 == 0:
                 print(f"  Merge {merge_step + 1}/{num_merges}")
@@ -144,18 +119,8 @@ class SubwordTokenizer:
         print(f"BPE Training abgeschlossen. Vokabular: {len(self.vocab)} Tokens")
 
     def tokenize(self, text):
-        words = self._split_into_words(text)
-        all_tokens = []
-
-        for word in words:
-            subwords = self._apply_bpe(word)
-            all_tokens.extend(subwords)
-
-        token_ids = []
-        for token in all_tokens:
-            token_ids.append(self.vocab.get(token, self.vocab["<UNK>"]))
-
-        return token_ids
+        # Gleiches Ergebnis wie _apply_bpe pro Wort, aber nach Rang und gecacht
+        return self.encoder.encode(text)
 
     def detokenize(self, token_ids):
         tokens = []
@@ -9,6 +9,9 @@ Verwendung:
 import numpy as np
 import pickle
 
+from bpe import BPEEncoder, train_merges
+from sampling import check_sampling_args, sample_logits
+
 
 # ============================================================================
 # HILFSFUNKTIONEN
@@ -42,6 +45,8 @@ class SubwordTokenizer:
         self.id_to_token = {}
         self.merges = []
         self.next_id = 0
+        # Schneller Encoder: Merges nach Rang, LRU-Cache pro Wort (bpe.py)
+        self.encoder = BPEEncoder(self)
 
         # Spezial-Tokens
         self._add_token("<PAD>")
@@ -87,12 +92,6 @@ class SubwordTokenizer:
             chars[-1] = chars[-1] + '</w>'
         return chars
 
-    def _get_pairs(self, chars):
-        pairs = set()
-        for i in range(len(chars) - 1):
-            pairs.add((chars[i], chars[i + 1]))
-        return pairs
-
     def _apply_bpe(self, word):
         chars = self._get_word_characters(word)
 
@@ -116,50 +115,16 @@ class SubwordTokenizer:
             for word in words:
                 word_freqs[word] = word_freqs.get(word, 0) + 1
 
-        vocab = {}
-        for word, freq in word_freqs.items():
-            chars = self._get_word_characters(word)
-            vocab[' '.join(chars)] = freq
-
-        for merge_step in range(num_merges):
-            pairs_count = {}
-            for word, freq in vocab.items():
-                chars = word.split()
-                for pair in self._get_pairs(chars):
-                    pairs_count[pair] = pairs_count.get(pair, 0) + freq
-
-            if not pairs_count:
-                break
-
-            best_pair = max(pairs_count, key=pairs_count.get)
+        # Paar-Zählungen werden inkrementell gepflegt, siehe bpe.py
+        for best_pair, _ in train_merges(word_freqs, num_merges, self._get_word_characters):
             self.merges.append(best_pair)
-
-            new_vocab = {}
-            search_pattern = ' '.join(best_pair)
-            replacement = ''.join(best_pair)
-
-            for word, freq in vocab.items():
-                new_word = word.replace(search_pattern, replacement)
-                new_vocab[new_word] = freq
-
-            vocab = new_vocab
-            self._add_token(replacement)
+            self._add_token(''.join(best_pair))
 
         print(f"BPE Training fertig. Vokabular: {len(self.vocab)} Tokens")
 
     def tokenize(self, text):
-        words = self._split_into_words(text)
-        all_tokens = []
-
-        for word in words:
-            subwords = self._apply_bpe(word)
-            all_tokens.extend(subwords)
-
-        token_ids = []
-        for token in all_tokens:
-            token_ids.append(self.vocab.get(token, self.vocab["<UNK>"]))
-
-        return token_ids
+        # Gleiches Ergebnis wie _apply_bpe pro Wort, aber nach Rang und gecacht
+        return self.encoder.encode(text)
 
     def detokenize(self, token_ids):
         tokens = []
@@ -184,7 +149,8 @@ class SimpleNeuralLM:
     (Transformer mit Backprop in NumPy wäre sehr komplex)
     """
 
-    def __init__(self, vocab_size, embedding_dim=64, hidden_dim=128, context_size=4):
+    def __init__(self, vocab_size, embedding_dim=64, hidden_dim=128, context_size=4,
+                 verbose=True):
         self.vocab_size = vocab_size
         self.embedding_dim = embedding_dim
         self.hidden_dim = hidden_dim
@@ -210,6 +176,9 @@ class SimpleNeuralLM:
         self.v = {k: np.zeros_like(v) for k, v in self.params.items()}
         self.t = 0
 
+        if not verbose:
+            return
+
         print(f"\nModell initialisiert:")
         print(f"  Vokabular: {vocab_size}")
         print(f"  Embedding: {embedding_dim}")
@@ -225,6 +194,7 @@ class SimpleNeuralLM:
 
         Args:
             context_ids: Array von Token-IDs [context_size]
+                         oder ein Mini-Batch [batch, context_size]
 
         Returns:
             logits, cache
@@ -232,12 +202,12 @@ class SimpleNeuralLM:
         cache = {}
 
         # 1. Embedding Lookup
-        embeddings = self.params['embed'][context_ids]  # [context_size, embedding_dim]
+        embeddings = self.params['embed'][context_ids]  # [..., context_size, embedding_dim]
         cache['embeddings'] = embeddings
         cache['context_ids'] = context_ids
 
-        # 2. Flatten
-        x = embeddings.flatten()  # [context_size * embedding_dim]
+        # 2. Flatten (pro Beispiel)
+        x = embeddings.reshape(*context_ids.shape[:-1], -1)  # [..., context_size * embedding_dim]
         cache['x'] = x
 
         # 3. Hidden Layer
@@ -258,61 +228,69 @@ class SimpleNeuralLM:
         Backward Pass mit Adam Optimizer
 
         Args:
-            cache: Forward pass cache
-            target_id: Ziel Token-ID
+            cache: Forward pass cache (einzelnes Beispiel oder Mini-Batch)
+            target_id: Ziel Token-ID bzw. Array [batch]
             learning_rate: Lernrate
 
         Returns:
-            loss
+            loss (Mittelwert über den Batch)
         """
+        # Einzelnes Beispiel = Batch der Größe 1
+        logits = np.atleast_2d(cache['logits'])
+        targets = np.atleast_1d(target_id)
+        x = cache['x'].reshape(len(targets), -1)
+        z1 = cache['z1'].reshape(len(targets), -1)
+        h1 = cache['h1'].reshape(len(targets), -1)
+        batch = np.arange(len(targets))
+
         # Softmax und Loss
-        logits = cache['logits']
         probs = softmax(logits)
 
         # Cross-Entropy Loss
-        loss = -np.log(probs[target_id] + 1e-10)
+        loss = -np.log(probs[batch, targets] + 1e-10).mean()
 
-        # Gradienten
+        # Gradienten (gemittelt über den Batch)
         grads = {}
 
         # Output Layer
-        dlogits = probs.copy()
-        dlogits[target_id] -= 1  # Softmax + Cross-Entropy Gradient
+        dlogits = probs
+        dlogits[batch, targets] -= 1  # Softmax + Cross-Entropy Gradient
+        dlogits /= len(targets)
 
-        grads['W2'] = np.outer(cache['h1'], dlogits)
-        grads['b2'] = dlogits
+        grads['W2'] = h1.T @ dlogits
+        grads['b2'] = dlogits.sum(axis=0)
 
         # Hidden Layer
         dh1 = dlogits @ self.params['W2'].T
-        dz1 = dh1 * relu_derivative(cache['z1'])
+        dz1 = dh1 * relu_derivative(z1)
 
-        grads['W1'] = np.outer(cache['x'], dz1)
-        grads['b1'] = dz1
+        grads['W1'] = x.T @ dz1
+        grads['b1'] = dz1.sum(axis=0)
 
-        # Embedding Layer
+        # Embedding Layer — doppelte Token-IDs im Batch werden von
+        # np.add.at korrekt aufsummiert
         dx = dz1 @ self.params['W1'].T
-        dx_reshaped = dx.reshape(self.context_size, self.embedding_dim)
 
         grads['embed'] = np.zeros_like(self.params['embed'])
-        for i, token_id in enumerate(cache['context_ids']):
-            grads['embed'][token_id] += dx_reshaped[i]
+        np.add.at(grads['embed'], cache['context_ids'].reshape(-1),
+                  dx.reshape(-1, self.embedding_dim))
 
-        # Adam Optimizer Update
+        # Adam Optimizer Update — einmal pro Batch
         self.t += 1
         beta1, beta2 = 0.9, 0.999
         eps = 1e-8
+        step = learning_rate / (1 - beta1 ** self.t)
+        v_correction = 1 / (1 - beta2 ** self.t)
 
         for key in self.params:
-            # Update moving averages
-            self.m[key] = beta1 * self.m[key] + (1 - beta1) * grads[key]
-            self.v[key] = beta2 * self.v[key] + (1 - beta2) * (grads[key] ** 2)
-
-            # Bias correction
-            m_hat = self.m[key] / (1 - beta1 ** self.t)
-            v_hat = self.v[key] / (1 - beta2 ** self.t)
+            # Update moving averages (in-place)
+            self.m[key] *= beta1
+            self.m[key] += (1 - beta1) * grads[key]
+            self.v[key] *= beta2
+            self.v[key] += (1 - beta2) * grads[key] ** 2
 
-            # Update parameters
-            self.params[key] -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+            # Bias correction + Update parameters
+            self.params[key] -= step * self.m[key] / (np.sqrt(self.v[key] * v_correction) + eps)
 
         return loss
 
@@ -346,54 +324,77 @@ class NumpyLMTrainer:
         self.model = model
         self.tokenizer = tokenizer
 
-    def train(self, texts, epochs=100, learning_rate=0.01):
-        print(f"\n{'='*60}")
-        print(f"TRAINING STARTET")
-        print(f"{'='*60}")
-
-        # Erstelle Trainingspaare
-        training_pairs = []
+    def training_pairs(self, texts):
+        """Context → Target Paare als gestapelte Arrays [N, context_size], [N]"""
+        contexts, targets = [], []
 
         for text in texts:
             token_ids = self.tokenizer.tokenize(text)
 
-            # Erstelle Context → Target Paare
             for i in range(len(token_ids) - self.model.context_size):
-                context = token_ids[i:i + self.model.context_size]
-                target = token_ids[i + self.model.context_size]
-                training_pairs.append((np.array(context), target))
+                contexts.append(token_ids[i:i + self.model.context_size])
+                targets.append(token_ids[i + self.model.context_size])
 
-        print(f"Trainingspaare: {len(training_pairs)}")
-        print(f"Epochen: {epochs}")
-        print(f"Lernrate: {learning_rate}")
+        return (np.array(contexts, dtype=np.int64).reshape(-1, self.model.context_size),
+                np.array(targets, dtype=np.int64))
+
+    def train(self, texts, epochs=100, learning_rate=0.01, batch_size=1, verbose=True):
+        """
+        Mini-Batch Training: pro Batch ein Forward/Backward über alle
+        gestapelten Contexte und ein Adam-Update.
+        batch_size=1 (Standard) entspricht dem Training Beispiel für Beispiel.
+        """
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"TRAINING STARTET")
+            print(f"{'='*60}")
+
+        # Erstelle Trainingspaare
+        contexts, targets = self.training_pairs(texts)
+        num_pairs = len(targets)
+
+        if verbose:
+            print(f"Trainingspaare: {num_pairs}")
+            print(f"Epochen: {epochs}")
+            print(f"Lernrate: {learning_rate}")
+            print(f"Batch-Größe: {batch_size}")
 
         # Training Loop
+        avg_loss = 0.0
         for epoch in range(epochs):
             total_loss = 0
 
             # Shuffle
-            np.random.shuffle(training_pairs)
+            order = np.random.permutation(num_pairs)
+
+            for start in range(0, num_pairs, batch_size):
+                batch = order[start:start + batch_size]
 
-            for context, target in training_pairs:
                 # Forward
-                logits, cache = self.model.forward(context)
+                logits, cache = self.model.forward(contexts[batch])
 
                 # Backward
-                loss = self.model.backward(cache, target, learning_rate)
+                loss = self.model.backward(cache, targets[batch], learning_rate)
 
-                total_loss += loss
+                total_loss += loss * len(batch)
 
-            avg_loss = total_loss / len(training_pairs)
+            avg_loss = total_loss / num_pairs
 
-            if (epoch + 1) % 10 == 0 or epoch == 0:
+            if verbose and ((epoch + 1) % 10 == 0 or epoch == 0):
                 print(f"Epoch {epoch + 1}/{epochs} - Loss: {avg_loss:.4f}")
 
-        print(f"{'='*60}")
-        print(f"TRAINING ABGESCHLOSSEN")
-        print(f"{'='*60}\n")
+        if verbose:
+            print(f"{'='*60}")
+            print(f"TRAINING ABGESCHLOSSEN")
+            print(f"{'='*60}\n")
+
+        return avg_loss
 
-    def generate_text(self, prompt, max_tokens=15, temperature=0.5):
-        """Text-Generierung"""
+    def generate_text(self, prompt, max_tokens=15, temperature=0.5, top_k=None, top_p=None,
+                      seed=None):
+        """Text-Generierung (temperature 0 = greedy, top_k/top_p siehe sample_logits)"""
+        check_sampling_args(top_k, top_p)
+        rng = np.random if seed is None else np.random.default_rng(seed)
         token_ids = self.tokenizer.tokenize(prompt)
 
         # Stelle sicher, dass wir genug Context haben
@@ -409,14 +410,9 @@ class NumpyLMTrainer:
             # Vorhersage
             probs = self.model.predict(context)
 
-            # Temperature Scaling
-            if temperature != 1.0:
-                logits = np.log(probs + 1e-10)
-                logits = logits / temperature
-                probs = softmax(logits)
-
-            # Sample
-            next_token = np.random.choice(len(probs), p=probs)
+            # Temperature Scaling, Top-k/Top-p und Sample
+            logits = np.log(probs + 1e-10)
+            next_token = sample_logits(logits, temperature, top_k, top_p, rng)
             token_ids.append(next_token)
 
         return self.tokenizer.detokenize(token_ids)
@@ -484,6 +480,30 @@ def get_training_data():
     ]
 
 
+def benchmark_training(tokenizer, texts, batch_sizes=(1, 8, 32), epochs=20,
+                       embedding_dim=32, hidden_dim=64, context_size=3):
+    """
+    Vergleicht Beispiele/s und End-Loss für verschiedene Batch-Größen,
+    jeweils mit frisch initialisiertem Modell (gleicher Seed).
+
+    Aufruf: python SimpleLLM_numpy.py --benchmark
+    """
+    import time
+
+    print(f"\n{'Batch':>6} {'Beispiele/s':>12} {'Loss':>8}")
+    for batch_size in batch_sizes:
+        np.random.seed(0)
+        model = SimpleNeuralLM(tokenizer.get_vocab_size(), embedding_dim,
+                               hidden_dim, context_size, verbose=False)
+        trainer = NumpyLMTrainer(model, tokenizer)
+        num_pairs = len(trainer.training_pairs(texts)[1])
+
+        start = time.perf_counter()
+        loss = trainer.train(texts, epochs=epochs, batch_size=batch_size, verbose=False)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>6} {num_pairs * epochs / elapsed:>12,.0f} {loss:>8.4f}")
+
+
 # ============================================================================
 # TEIL 5: HAUPTPROGRAMM
 # ============================================================================
@@ -573,4 +593,13 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+
+    if sys.argv[1:] == ["--benchmark"]:
+        np.random.seed(42)
+        texts = get_training_data()
+        tokenizer = SubwordTokenizer()
+        tokenizer.train_bpe(texts, num_merges=100)
+        benchmark_training(tokenizer, texts)
+    else:
+        main()
@@ -13,6 +13,15 @@ Installation:
 Verbose-Modus:
   chat_loop(model, tokenizer, verbose=True)
   -> Zeigt jeden Berechnungsschritt im Detail
+
+Offline-Gewichte (einmalig konvertieren, danach Start in Millisekunden):
+  python3 SmallGPT.py --convert gpt2
+  -> schreibt gpt2.smallgpt; select_model() nimmt die Datei automatisch
+
+Int8-Quantisierung, Vergleich mit float32 auf einer lokalen Textdatei:
+  python3 SmallGPT.py --quant-report gpt2 text.txt
+
+HTTP-Server mit Batching mehrerer Anfragen: siehe SmallGPTServer.py
 """
 
 # =============================================================================
@@ -23,6 +32,9 @@ Verbose-Modus:
 import numpy as np            # Original NumPy (schnell, empfohlen)
 # import my_numpy as np       # Eigene Implementierung (langsam, transparent)
 
+from kv_cache import KVCache
+from sampling import check_sampling_args, sample_rows
+
 
 # =============================================================================
 # HILFSFUNKTIONEN
@@ -46,6 +58,32 @@ def softmax(x, verbose=False):
     return result
 
 
+def softmax_inplace(x, verbose=False):
+    """
+    Wie softmax(), überschreibt aber x mit dem Ergebnis.
+    Für die Attention-Scores [batch, heads, seq, seq] spart das pro Layer
+    drei temporäre Arrays dieser Größe.
+    """
+    x -= np.max(x, axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= np.sum(x, axis=-1, keepdims=True)
+
+    if verbose:
+        print(f"    softmax: {x.shape} in-place, Zeilen summieren zu: {x.sum(axis=-1).mean():.4f}")
+
+    return x
+
+
+def _buffer_key(array):
+    """
+    Schlüssel für den Speicher hinter einem Array: zwei ndarray-Objekte
+    über denselben Puffer (z.B. zweimal tensor.numpy()) ergeben denselben
+    Schlüssel, anders als id().
+    """
+    return (array.__array_interface__['data'][0], array.shape, array.strides,
+            array.dtype.str)
+
+
 def gelu(x, verbose=False):
     """
     GELU Aktivierungsfunktion (Gaussian Error Linear Unit).
@@ -55,7 +93,9 @@ def gelu(x, verbose=False):
     if verbose:
         print(f"    gelu: Input-Shape {x.shape}, Mittelwert: {x.mean():.4f}")
 
-    result = 0.5 * x * (1 + np.tanh(np.sqrt(2 / np.pi) * (x + 0.044715 * x**3)))
+    # float() hält die Rechnung in float32 — ein NumPy-float64-Skalar
+    # würde das ganze Array auf float64 hochstufen
+    result = 0.5 * x * (1 + np.tanh(float(np.sqrt(2 / np.pi)) * (x + 0.044715 * x**3)))
 
     if verbose:
         print(f"    gelu: Output-Shape {result.shape}, Mittelwert: {result.mean():.4f}")
@@ -88,7 +128,7 @@ def layer_norm(x, gamma, beta, eps=1e-5, verbose=False):
     return result
 
 
-def linear(x, weight, bias=None, verbose=False):
+def linear(x, weight, bias=None, verbose=False, out=None):
     """
     Lineare Transformation: x @ weight.T + bias
     Entspricht einem vollverbundenen Layer (Fully Connected).
@@ -97,17 +137,64 @@ def linear(x, weight, bias=None, verbose=False):
         x:      Input      [..., in_features]
         weight: Gewichte   [out_features, in_features]
         bias:   Bias-Vektor [out_features]
+        out:    Optionaler Ergebnis-Puffer [..., out_features]
     """
     if verbose:
-        print(f"    linear: {x.shape} @ {weight.T.shape} = {(*x.shape[:-1], weight.shape[0])}")
+        print(f"    linear: {x.shape} @ {weight.shape[::-1]} = {(*x.shape[:-1], weight.shape[0])}")
+
+    if isinstance(weight, Int8Weight):
+        return linear_int8(x, weight, bias, out)
 
-    output = x @ weight.T
+    output = np.matmul(x, weight.T, out=out)
     if bias is not None:
         output += bias
 
     return output
 
 
+class Int8Weight:
+    """
+    Gewichtsmatrix [out_features, in_features] als int8 mit einem
+    float32-Skalierungsfaktor pro Ausgangskanal (Zeile):
+        weight ≈ q * scale[:, None]
+    Braucht ein Viertel des Speichers einer float32-Matrix.
+    """
+
+    def __init__(self, q, scale):
+        self.q = q          # int8   [out_features, in_features]
+        self.scale = scale  # float32 [out_features]
+        self.shape = q.shape
+
+    @classmethod
+    def quantize(cls, weight):
+        """Symmetrisch pro Zeile: der betragsgrößte Wert wird zu ±127"""
+        scale = np.abs(weight).max(axis=1) / 127
+        scale = np.where(scale == 0, 1, scale).astype(np.float32)
+        q = np.clip(np.rint(weight / scale[:, None]), -127, 127).astype(np.int8)
+        return cls(q, scale)
+
+
+def linear_int8(x, weight, bias=None, out=None, block_rows=64):
+    """
+    linear() mit Int8Weight. Die Gewichte werden blockweise (block_rows
+    Zeilen) nach float32 gewandelt und sofort multipliziert — der Block
+    bleibt im Cache, eine float32-Kopie der ganzen Matrix entsteht nie.
+    Der Skalierungsfaktor pro Zeile wird erst auf das Ergebnis angewendet.
+    """
+    out_features, in_features = weight.shape
+    if out is None:
+        out = np.empty((*x.shape[:-1], out_features), dtype=np.float32)
+    x2 = x.reshape(-1, in_features)
+    out2 = out.reshape(-1, out_features)
+    for start in range(0, out_features, block_rows):
+        block = weight.q[start:start + block_rows].astype(np.float32)
+        np.matmul(x2, block.T, out=out2[:, start:start + block_rows])
+    out2 *= weight.scale
+    if bias is not None:
+        out2 += bias
+    return out
+
+
 # =============================================================================
 # TRANSFORMER KOMPONENTEN
 # =============================================================================
@@ -129,82 +216,98 @@ class MultiHeadAttention:
         self.embedding_dim = embedding_dim
         self.num_heads = num_heads
         self.head_dim = embedding_dim // num_heads
+        self.scale = float(1 / np.sqrt(self.head_dim))
         assert embedding_dim % num_heads == 0, \
             "embedding_dim muss durch num_heads teilbar sein"
-
-    def split_heads(self, x, verbose=False):
+        # Arbeitspuffer (QKV, Scores, Ergebnis), einmal angelegt und bei
+        # jedem Aufruf wiederverwendet; wachsen nur, wenn sie zu klein sind
+        self._buffers = {}
+
+    def _workspace(self, name, shape, dtype):
+        """Zusammenhängender Puffer der Form shape, aus self._buffers"""
+        size = int(np.prod(shape))
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.size < size or buffer.dtype != dtype:
+            buffer = self._buffers[name] = np.empty(size, dtype=dtype)
+        return buffer[:size].reshape(shape)
+
+    def split_heads(self, qkv, verbose=False):
         """
-        Teilt Embedding in mehrere Attention-Heads auf.
-        [batch, seq_len, embedding_dim] -> [batch, num_heads, seq_len, head_dim]
+        Teilt die gemeinsame QKV-Projektion in Q, K, V und in Heads auf.
+        [batch, seq_len, 3*embedding_dim] -> 3 x [batch, num_heads, seq_len, head_dim]
+        Nur reshape/transpose — Views auf qkv, es wird nichts kopiert.
         """
-        batch_size, seq_len, _ = x.shape
-        x = x.reshape(batch_size, seq_len, self.num_heads, self.head_dim)
-        result = x.transpose(0, 2, 1, 3)
+        batch_size, seq_len, _ = qkv.shape
+        x = qkv.reshape(batch_size, seq_len, 3, self.num_heads, self.head_dim)
+        q, k, v = x.transpose(2, 0, 3, 1, 4)
 
         if verbose:
-            print(f"    split_heads: -> {result.shape} ({self.num_heads} Heads, je {self.head_dim} Dimensionen)")
+            print(f"    split_heads: -> 3 x {q.shape} ({self.num_heads} Heads, je {self.head_dim} Dimensionen)")
 
-        return result
+        return q, k, v
 
-    def merge_heads(self, x, verbose=False):
+    def forward(self, x, w_qkv, w_o, b_qkv=None, b_o=None,
+                causal_mask=None, verbose=False, kv_cache=None, layer_idx=0):
         """
-        Kombiniert Heads wieder zurück.
-        [batch, num_heads, seq_len, head_dim] -> [batch, seq_len, embedding_dim]
+        Die zurückgegebenen attention_weights liegen im Arbeitspuffer und
+        gelten nur bis zum nächsten Aufruf dieses Attention-Blocks.
         """
-        batch_size, _, seq_len, _ = x.shape
-        x = x.transpose(0, 2, 1, 3)
-        result = x.reshape(batch_size, seq_len, self.embedding_dim)
-
-        if verbose:
-            print(f"    merge_heads: -> {result.shape}")
-
-        return result
-
-    def forward(self, x, w_q, w_k, w_v, w_o,
-                b_q=None, b_k=None, b_v=None, b_o=None,
-                causal_mask=None, verbose=False):
+        batch_size, seq_len, _ = x.shape
 
         if verbose:
             print(f"  MultiHeadAttention: Input {x.shape}")
 
-        # 1. Lineare Projektionen: Q, K, V berechnen
-        q = linear(x, w_q, b_q, verbose)
-        k = linear(x, w_k, b_k, verbose)
-        v = linear(x, w_v, b_v, verbose)
+        # 1. Lineare Projektion: Q, K, V in einem einzigen Matmul
+        #    (GPT-2 speichert sie ohnehin zusammen als c_attn)
+        qkv = self._workspace('qkv', (batch_size, seq_len, 3 * self.embedding_dim), x.dtype)
+        linear(x, w_qkv, b_qkv, verbose, out=qkv)
 
         if verbose:
-            print(f"  Q/K/V berechnet: je {q.shape}")
+            print(f"  Q/K/V berechnet: zusammen {qkv.shape}")
 
-        # 2. In mehrere Heads aufteilen
-        q = self.split_heads(q, verbose)
-        k = self.split_heads(k, verbose)
-        v = self.split_heads(v, verbose)
+        # 2. In Q, K, V und mehrere Heads aufteilen
+        q, k, v = self.split_heads(qkv, verbose)
+
+        # KV-Cache: neue Keys/Values hinten anhängen, ältere wiederverwenden
+        if kv_cache is not None:
+            k, v = kv_cache.append(layer_idx, k, v)
+            if verbose:
+                print(f"  KV-Cache: {k.shape[2]} Keys/Values, davon {q.shape[2]} neu berechnet")
 
-        # 3. Attention Scores: Q * K^T / sqrt(d_k)
-        attention_scores = np.matmul(q, k.transpose(0, 1, 3, 2))
-        attention_scores = attention_scores / np.sqrt(self.head_dim)
+        # 3. Attention Scores: Q * K^T / sqrt(d_k) — direkt in den Puffer
+        attention_scores = self._workspace(
+            'scores', (batch_size, self.num_heads, seq_len, k.shape[2]), x.dtype)
+        np.matmul(q, k.transpose(0, 1, 3, 2), out=attention_scores)
+        attention_scores *= self.scale
 
         if verbose:
             print(f"  Attention Scores: {attention_scores.shape}, Mittelwert: {attention_scores.mean():.4f}")
 
         # 4. Causal Mask: verhindert Blick in die Zukunft
         if causal_mask is not None:
-            attention_scores = attention_scores + causal_mask
+            attention_scores += causal_mask
             if verbose:
                 print(f"  Causal Mask angewendet: Zukunft wird auf -1e9 gesetzt")
 
-        # 5. Softmax -> Attention Weights (Wahrscheinlichkeiten)
-        attention_weights = softmax(attention_scores, verbose)
+        # 5. Softmax -> Attention Weights (Wahrscheinlichkeiten), in-place
+        attention_weights = softmax_inplace(attention_scores, verbose)
 
         if verbose:
             print(f"  Attention Weights: {attention_weights.shape}")
             print(f"  Stärkstes Attention-Gewicht: {attention_weights.max():.4f}")
 
-        # 6. Gewichtete Summe der Values
-        attention_output = np.matmul(attention_weights, v)
+        # 6. Gewichtete Summe der Values — direkt in der Anordnung
+        #    [batch, seq_len, num_heads, head_dim] abgelegt, so ist das
+        #    Zusammenführen der Heads nur noch ein reshape
+        merged = self._workspace(
+            'output', (batch_size, seq_len, self.num_heads, self.head_dim), x.dtype)
+        np.matmul(attention_weights, v, out=merged.transpose(0, 2, 1, 3))
+        attention_output = merged.reshape(batch_size, seq_len, self.embedding_dim)
 
-        # 7. Heads zusammenführen und Output-Projektion
-        attention_output = self.merge_heads(attention_output, verbose)
+        if verbose:
+            print(f"    merge_heads: -> {attention_output.shape}")
+
+        # 7. Output-Projektion
         output = linear(attention_output, w_o, b_o, verbose)
 
         if verbose:
@@ -265,20 +368,19 @@ class TransformerBlock:
         self.attention = MultiHeadAttention(embedding_dim, num_heads)
         self.ffn = FeedForward(embedding_dim, hidden_dim)
 
-    def forward(self, x, params, causal_mask=None, verbose=False):
+    def forward(self, x, params, causal_mask=None, verbose=False,
+                kv_cache=None, layer_idx=0):
         if verbose:
             print(f" Schritt 1: layer_norm()")
-        normed_x = layer_norm(x, params['ln1_gamma'], params['ln1_beta'], verbose=verbose)
+        normed_x = layer_norm(x, params.ln1_gamma, params.ln1_beta, verbose=verbose)
 
         if verbose:
             print(f" Schritt 2: MultiHeadAttention()")
         attention_out, attn_weights = self.attention.forward(
             normed_x,
-            params['attn_wq'], params['attn_wk'],
-            params['attn_wv'], params['attn_wo'],
-            params.get('attn_bq'), params.get('attn_bk'),
-            params.get('attn_bv'), params.get('attn_bo'),
-            causal_mask, verbose
+            params.attn_wqkv, params.attn_wo,
+            params.attn_bqkv, params.attn_bo,
+            causal_mask, verbose, kv_cache, layer_idx
         )
         x = x + attention_out  # Residual Connection
         if verbose:
@@ -286,14 +388,14 @@ class TransformerBlock:
 
         if verbose:
             print(f" Schritt 3: layer_norm()")
-        normed_x = layer_norm(x, params['ln2_gamma'], params['ln2_beta'], verbose=verbose)
+        normed_x = layer_norm(x, params.ln2_gamma, params.ln2_beta, verbose=verbose)
 
         if verbose:
             print(f" Schritt 4: FeedForward()")
         ffn_out = self.ffn.forward(
             normed_x,
-            params['ffn_w1'], params['ffn_b1'],
-            params['ffn_w2'], params['ffn_b2'],
+            params.ffn_w1, params.ffn_b1,
+            params.ffn_w2, params.ffn_b2,
             verbose
         )
         x = x + ffn_out  # Residual Connection
@@ -303,6 +405,32 @@ class TransformerBlock:
         return x, attn_weights
 
 
+class BlockParams:
+    """
+    Alle Gewichte eines Transformer-Blocks, einmal beim Laden aufgelöst.
+
+    Q, K und V liegen wie bei GPT-2 (c_attn) in einer gemeinsamen Matrix
+    attn_wqkv [3*dim, dim] mit Bias attn_bqkv [3*dim] — MultiHeadAttention
+    berechnet alle drei Projektionen mit einem Matmul.
+
+    Nach SmallGPT.quantize() stehen die Projektionsmatrizen (MATRICES) als
+    '<name>_q' (int8) und '<name>_scale' in params und werden hier zu
+    Int8Weight zusammengesetzt.
+    """
+
+    NAMES = ('ln1_gamma', 'ln1_beta', 'attn_wqkv', 'attn_bqkv', 'attn_wo', 'attn_bo',
+             'ln2_gamma', 'ln2_beta', 'ffn_w1', 'ffn_b1', 'ffn_w2', 'ffn_b2')
+    MATRICES = ('attn_wqkv', 'attn_wo', 'ffn_w1', 'ffn_w2')
+
+    def __init__(self, params, prefix):
+        for name in self.NAMES:
+            if prefix + name + '_q' in params:
+                setattr(self, name, Int8Weight(params[prefix + name + '_q'],
+                                               params[prefix + name + '_scale']))
+            else:
+                setattr(self, name, params[prefix + name])
+
+
 # =============================================================================
 # SMALLGPT MODELL
 # =============================================================================
@@ -324,8 +452,10 @@ class SmallGPT:
         self.num_layers = num_layers
         self.max_seq_len = max_seq_len
 
-        # Leeres params-Dictionary — wird von from_pretrained() befüllt
+        # Leeres params-Dictionary — wird von from_pretrained() befüllt.
+        # Daraus baut _resolve_params() die BlockParams der einzelnen Layer.
         self.params = {}
+        self.layers = []
 
         # Transformer Blöcke erstellen (Architektur, noch ohne Gewichte)
         self.blocks = [
@@ -343,33 +473,88 @@ class SmallGPT:
         print(f"Max. Sequenzlänge:   {max_seq_len}")
         print(f"{'='*60}\n")
 
-    def _create_causal_mask(self, seq_len, verbose=False):
+    def _resolve_params(self):
+        """
+        Baut aus self.params einmalig die BlockParams je Layer, damit
+        forward() nicht bei jedem Aufruf das ganze Dictionary nach dem
+        Präfix 'layerN_' durchsuchen muss. Alte Gewichtsdateien mit
+        getrennten attn_wq/wk/wv werden dabei zu attn_wqkv zusammengelegt.
+
+        Alle Gewichte werden float32: ein einziges float64-Array würde die
+        Aktivierungen hochstufen, und jeder Matmul müsste dann seine
+        Gewichtsmatrix erst nach float64 kopieren.
+        """
+        converted = {}   # output_w und token_emb teilen sich ein Array
+        for name, value in self.params.items():
+            if value.dtype.kind == 'f' and value.dtype != np.float32:
+                key = _buffer_key(value)
+                if key not in converted:
+                    converted[key] = value.astype(np.float32)
+                self.params[name] = converted[key]
+        for i in range(self.num_layers):
+            p = f'layer{i}_'
+            if p + 'attn_wq' in self.params:
+                self.params[p+'attn_wqkv'] = np.concatenate(
+                    [self.params.pop(p+'attn_w'+n) for n in 'qkv'])
+                self.params[p+'attn_bqkv'] = np.concatenate(
+                    [self.params.pop(p+'attn_b'+n) for n in 'qkv'])
+            for name in BlockParams.NAMES:
+                if p+name in self.params:
+                    self.params[p+name] = np.ascontiguousarray(self.params[p+name])
+        self.layers = [BlockParams(self.params, f'layer{i}_')
+                       for i in range(self.num_layers)]
+
+    def quantize(self):
+        """
+        Int8-Modus: die Projektionsmatrizen von Attention und FFN werden
+        pro Ausgangskanal nach int8 quantisiert und ersetzen die float32-
+        Matrizen in self.params (save_memmap() speichert dann int8).
+        Embeddings, Layer Norms, Biases und die Output-Projektion bleiben
+        float32 — sie sind klein bzw. mit token_emb geteilt.
+        """
+        for i in range(self.num_layers):
+            p = f'layer{i}_'
+            for name in BlockParams.MATRICES:
+                if p+name in self.params:
+                    weight = Int8Weight.quantize(self.params.pop(p+name))
+                    self.params[p+name+'_q'] = weight.q
+                    self.params[p+name+'_scale'] = weight.scale
+        self._resolve_params()
+
+    def _create_causal_mask(self, seq_len, verbose=False, past_len=0):
         """
         Causal Mask: verhindert dass das Modell in die Zukunft schaut.
         Obere Dreiecksmatrix mit -1e9 -> nach Softmax praktisch 0.
+        Mit KV-Cache stehen vor den seq_len neuen Positionen noch past_len
+        gecachte, die jede neue Position sehen darf.
         """
-        mask = np.triu(np.ones((seq_len, seq_len)), k=1)
-        result = mask * -1e9
+        mask = np.triu(np.ones((seq_len, past_len + seq_len), dtype=np.float32), k=past_len + 1)
+        result = mask * np.float32(-1e9)
 
         if verbose:
             print(f" Causal Mask erstellt: {result.shape}")
-            print(f" {int(mask.sum())} von {seq_len*seq_len} Positionen blockiert")
+            print(f" {int(mask.sum())} von {mask.size} Positionen blockiert")
 
         return result
 
-    def forward(self, token_ids, verbose=False):
+    def forward(self, token_ids, verbose=False, kv_cache=None, attention_mask=None):
         """
         Forward Pass durch das gesamte Modell.
 
         Args:
-            token_ids: Token-IDs [batch_size, seq_len]
-            verbose:   True = zeigt jeden Berechnungsschritt
+            token_ids:      Token-IDs [batch_size, seq_len]
+            verbose:        True = zeigt jeden Berechnungsschritt
+            kv_cache:       KVCache — token_ids sind dann nur die neuen Tokens
+                            hinter den bereits gecachten
+            attention_mask: bool [batch_size, past_len + seq_len], False =
+                            Padding (wird nie beachtet, zählt nicht als Position)
 
         Returns:
             logits:               Rohe Vorhersagen [batch, seq_len, vocab_size]
             all_attention_weights: Attention-Gewichte aller Layer
         """
         batch_size, seq_len = token_ids.shape
+        past_len = kv_cache.length if kv_cache is not None else 0
 
         if verbose:
             print(f"\n{'='*60}")
@@ -385,7 +570,12 @@ class SmallGPT:
             print(f"    Jede ID wird zu einem {self.embedding_dim}-dim Vektor")
 
         # 2. Positional Embeddings: Position im Satz kodieren
-        positions = np.arange(seq_len)
+        if attention_mask is None:
+            positions = np.arange(past_len, past_len + seq_len)
+        else:
+            # Links aufgefüllte Zeilen: gezählt wird ab dem ersten echten Token
+            positions = np.maximum(np.cumsum(attention_mask, axis=1) - 1, 0)
+            positions = positions[:, past_len:past_len + seq_len]
         x = x + self.params['pos_emb'][positions]
         if verbose:
             print(f"\n[2] Positional Embeddings addiert:")
@@ -395,7 +585,11 @@ class SmallGPT:
         # 3. Causal Mask erstellen
         if verbose:
             print(f"\n[3] Causal Mask:")
-        causal_mask = self._create_causal_mask(seq_len, verbose)
+        causal_mask = self._create_causal_mask(seq_len, verbose, past_len)
+        if attention_mask is not None:
+            # Padding für alle Queries ausblenden -> [batch, 1, seq_len, past_len + seq_len]
+            visible = attention_mask[:, None, None, :past_len + seq_len]
+            causal_mask = causal_mask + np.where(visible, np.float32(0), np.float32(-1e9))
 
         # 4. Durch alle Transformer Blöcke
         all_attention_weights = []
@@ -403,14 +597,16 @@ class SmallGPT:
             if verbose:
                 print(f"\n[4.{layer_idx+1}] Transformer Block {layer_idx+1}/{self.num_layers}:")
 
-            p = f'layer{layer_idx}_'
-            layer_params = {k[len(p):]: v for k, v in self.params.items() if k.startswith(p)}
-            x, attn_weights = block.forward(x, layer_params, causal_mask, verbose)
+            x, attn_weights = block.forward(x, self.layers[layer_idx], causal_mask, verbose,
+                                            kv_cache, layer_idx)
             all_attention_weights.append(attn_weights)
 
             if verbose:
                 print(f" Block {layer_idx+1} Output: {x.shape}")
 
+        if kv_cache is not None:
+            kv_cache.advance(token_ids)
+
         # 5. Finale Layer Norm
         if verbose:
             print(f"\n[5] Finale Layer Norm:")
@@ -426,18 +622,32 @@ class SmallGPT:
         return logits, all_attention_weights
 
     def generate(self, start_tokens, max_new_tokens=20, temperature=1.0,
-                 eos_token_id=None, verbose=False):
+                 eos_token_id=None, verbose=False, kv_cache=None,
+                 top_k=None, top_p=None, seed=None):
         """
         Generiert Text autoregressiv — Token für Token.
 
         Args:
             start_tokens:   Start-Sequenz [1, seq_len]
             max_new_tokens: Maximale Anzahl neuer Tokens
-            temperature:    Höher = kreativer, Niedriger = deterministischer
+            temperature:    Höher = kreativer, Niedriger = deterministischer,
+                            0 = greedy (immer das wahrscheinlichste Token)
             eos_token_id:   Stoppzeichen (Generation endet hier)
             verbose:        True = zeigt jeden Berechnungsschritt
+            kv_cache:       KVCache, der über mehrere Aufrufe erhalten bleibt
+                            (z.B. im Chat); None = neuer Cache nur für diesen Aufruf
+            top_k, top_p:   Kandidaten begrenzen, siehe sample_rows()
+            seed:           Seed für einen eigenen Zufallsgenerator
+                            (reproduzierbar); None = globales np.random
         """
+        check_sampling_args(top_k, top_p)
+        rng = np.random if seed is None else np.random.default_rng(seed)
+        if kv_cache is None:
+            kv_cache = KVCache(self.num_layers, self.max_seq_len)
         current_tokens = start_tokens.copy()
+        reused = kv_cache.reuse(current_tokens)
+        if verbose:
+            print(f"\nKV-Cache: {reused} von {current_tokens.shape[1]} Tokens wiederverwendet")
 
         for step in range(max_new_tokens):
             if verbose:
@@ -445,21 +655,21 @@ class SmallGPT:
                 print(f"GENERIERUNGS-SCHRITT {step+1}")
                 print(f"Aktueller Kontext: {current_tokens.shape[1]} Tokens")
 
-            # Forward Pass mit aktuellem Kontext
-            logits, _ = self.forward(current_tokens, verbose)
+            # Forward Pass nur für Tokens, die noch nicht im KV-Cache liegen:
+            # im ersten Schritt der (neue Teil vom) Prompt, danach je ein Token
+            logits, _ = self.forward(current_tokens[:, kv_cache.length:], verbose, kv_cache)
 
             # Nur das letzte Token interessiert uns
-            last_logits = logits[0, -1, :] / temperature
+            last_logits = logits[:1, -1, :]
             if verbose:
-                print(f"\nTemperature Scaling: /{temperature}")
-                print(f"Top-5 Logits: {np.sort(last_logits)[-5:][::-1].round(3)}")
+                print(f"\nTemperature Scaling: /{temperature}, top_k={top_k}, top_p={top_p}")
+                top5 = np.partition(last_logits[0], -5)[-5:]
+                print(f"Top-5 Logits: {np.sort(top5)[::-1].round(3)}")
 
-            # Softmax -> Wahrscheinlichkeiten -> Sample nächstes Token
-            probs = softmax(last_logits)
-            next_token = np.random.choice(self.vocab_size, p=probs)
+            # Kandidaten -> Wahrscheinlichkeiten -> Sample nächstes Token
+            next_token = int(sample_rows(last_logits, temperature, top_k, top_p, rng)[0])
 
             if verbose:
-                print(f"Höchste Wahrscheinlichkeit: {probs.max():.4f}")
                 print(f"Gewähltes Token: ID {next_token}")
 
             # Token an Kontext anhängen
@@ -473,6 +683,88 @@ class SmallGPT:
 
         return current_tokens
 
+    def generate_batch(self, prompts, max_new_tokens=20, temperature=1.0,
+                       eos_token_id=None, pad_token_id=0, top_k=None, top_p=None,
+                       seed=None):
+        """
+        Generiert für mehrere Prompts gleichzeitig — pro Schritt ein
+        Forward Pass und ein Sampling-Aufruf für alle Zeilen.
+
+        Die Prompts werden links aufgefüllt, so enden alle auf derselben
+        Spalte; die attention_mask blendet das Padding aus. Jede Zeile
+        stoppt für sich beim EOS-Token (danach nur noch ausgeblendetes
+        Padding), die Schleife endet, wenn alle Zeilen fertig sind.
+        Alle Tokens landen in einem einmal angelegten Puffer.
+
+        Args:
+            prompts:        Liste von Token-ID-Listen (beliebig lang)
+            max_new_tokens: Maximale Anzahl neuer Tokens (Zahl oder pro Zeile)
+            temperature:    Sampling-Temperature (Zahl oder pro Zeile)
+            eos_token_id:   Stoppzeichen (pro Zeile)
+            pad_token_id:   Füll-Token (wird nie beachtet)
+            top_k, top_p:   Kandidaten begrenzen, siehe sample_rows()
+            seed:           Seed für reproduzierbares Sampling
+
+        Returns:
+            Liste von Arrays, je Prompt + neue Tokens (inkl. EOS)
+        """
+        check_sampling_args(top_k, top_p)
+        steps = self.generate_batch_steps(prompts, max_new_tokens, temperature,
+                                          eos_token_id, pad_token_id, top_k, top_p, seed)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def generate_batch_steps(self, prompts, max_new_tokens=20, temperature=1.0,
+                             eos_token_id=None, pad_token_id=0, top_k=None, top_p=None,
+                             seed=None):
+        """
+        generate_batch() als Generator: liefert nach jedem Schritt
+        (next_tokens, active) — active markiert die Zeilen, für die
+        next_tokens ein neues Token enthält. So kann ein Aufrufer (z.B. der
+        Server) Tokens sofort weiterreichen. Das Endergebnis von
+        generate_batch() ist der Rückgabewert (StopIteration.value).
+        """
+        check_sampling_args(top_k, top_p)
+        batch_size = len(prompts)
+        prompt_len = max(len(prompt) for prompt in prompts)
+        limits = np.broadcast_to(np.asarray(max_new_tokens), (batch_size,))
+        rng = np.random if seed is None else np.random.default_rng(seed)
+        total_len = prompt_len + int(limits.max())
+
+        tokens = np.full((batch_size, total_len), pad_token_id, dtype=np.int64)
+        mask = np.zeros((batch_size, total_len), dtype=bool)
+        for row, prompt in enumerate(prompts):
+            tokens[row, prompt_len - len(prompt):prompt_len] = prompt
+            mask[row, prompt_len - len(prompt):prompt_len] = True
+
+        finished = limits <= 0
+        new_tokens = np.zeros(batch_size, dtype=np.int64)
+        kv_cache = KVCache(self.num_layers, total_len)
+        end = prompt_len
+
+        while not finished.all():
+            logits, _ = self.forward(tokens[:, kv_cache.length:end],
+                                     kv_cache=kv_cache, attention_mask=mask[:, :end])
+            next_tokens = sample_rows(logits[:, -1, :], temperature, top_k, top_p, rng)
+            active = ~finished
+            next_tokens[finished] = pad_token_id
+
+            tokens[:, end] = next_tokens
+            mask[:, end] = active
+            new_tokens += active
+            end += 1
+
+            finished = finished | (new_tokens >= limits)
+            if eos_token_id is not None:
+                finished |= next_tokens == eos_token_id
+            yield next_tokens, active
+
+        return [tokens[row, prompt_len - len(prompt):prompt_len + new_tokens[row]]
+                for row, prompt in enumerate(prompts)]
+
     # =========================================================================
     # HUGGING FACE LOADER
     # =========================================================================
@@ -530,8 +822,8 @@ class SmallGPT:
         model.params['ln_final_beta']  = sd['ln_f.bias'].detach().numpy()
 
         # Output-Projektion teilt sich die Matrix mit token_emb (weight tying)
-        model.params['output_w']       = sd['wte.weight'].detach().numpy()
-        model.params['output_b']       = np.zeros(config.vocab_size)
+        model.params['output_w']       = model.params['token_emb']
+        model.params['output_b']       = np.zeros(config.vocab_size, dtype=np.float32)
 
         # Pro Transformer-Layer
         for i in range(config.n_layer):
@@ -545,16 +837,12 @@ class SmallGPT:
             model.params[p+'ln2_beta']  = sd[h+'ln_2.bias'].detach().numpy()
 
             # Attention — GPT-2 speichert Q, K, V zusammen in c_attn [emb_dim, 3*emb_dim]
-            d = config.n_embd
             c_attn_w = sd[h+'attn.c_attn.weight'].detach().numpy()  # [768, 2304]
             c_attn_b = sd[h+'attn.c_attn.bias'].detach().numpy()    # [2304]
 
-            model.params[p+'attn_wq'] = c_attn_w[:, :d].T
-            model.params[p+'attn_wk'] = c_attn_w[:, d:2*d].T
-            model.params[p+'attn_wv'] = c_attn_w[:, 2*d:].T
-            model.params[p+'attn_bq'] = c_attn_b[:d]
-            model.params[p+'attn_bk'] = c_attn_b[d:2*d]
-            model.params[p+'attn_bv'] = c_attn_b[2*d:]
+            # -> eine Matrix [2304, 768]: Zeilen 0..767 = Q, dann K, dann V
+            model.params[p+'attn_wqkv'] = c_attn_w.T
+            model.params[p+'attn_bqkv'] = c_attn_b
 
             model.params[p+'attn_wo'] = sd[h+'attn.c_proj.weight'].detach().numpy().T
             model.params[p+'attn_bo'] = sd[h+'attn.c_proj.bias'].detach().numpy()
@@ -568,11 +856,50 @@ class SmallGPT:
             if (i + 1) % 3 == 0:
                 print(f"  Layer {i+1}/{config.n_layer} geladen...")
 
+        model._resolve_params()
+
         print(f"\n Alle Gewichte erfolgreich geladen!")
         print(f"{'='*60}\n")
 
         return model, tokenizer
 
+    @classmethod
+    def random(cls, vocab_size=50257, embedding_dim=768, num_heads=12,
+               num_layers=12, max_seq_len=1024, seed=0):
+        """
+        Modell mit Zufallsgewichten (float32, Form wie GPT-2 Small).
+        Erzeugt keinen sinnvollen Text, reicht aber für Geschwindigkeits-
+        messungen ohne Download.
+        """
+        rng = np.random.default_rng(seed)
+        model = cls(vocab_size, embedding_dim, num_heads, num_layers, max_seq_len)
+        d, h = embedding_dim, 4 * embedding_dim
+
+        def rand(*shape):
+            return rng.standard_normal(shape, dtype=np.float32) * np.float32(0.02)
+
+        model.params['token_emb'] = rand(vocab_size, d)
+        model.params['pos_emb'] = rand(max_seq_len, d)
+        model.params['ln_final_gamma'] = np.ones(d, dtype=np.float32)
+        model.params['ln_final_beta'] = np.zeros(d, dtype=np.float32)
+        model.params['output_w'] = model.params['token_emb']
+        model.params['output_b'] = np.zeros(vocab_size, dtype=np.float32)
+        for i in range(num_layers):
+            p = f'layer{i}_'
+            for ln in ('ln1', 'ln2'):
+                model.params[p+ln+'_gamma'] = np.ones(d, dtype=np.float32)
+                model.params[p+ln+'_beta'] = np.zeros(d, dtype=np.float32)
+            model.params[p+'attn_wqkv'] = rand(3 * d, d)
+            model.params[p+'attn_bqkv'] = rand(3 * d)
+            model.params[p+'attn_wo'] = rand(d, d)
+            model.params[p+'attn_bo'] = rand(d)
+            model.params[p+'ffn_w1'] = rand(h, d)
+            model.params[p+'ffn_b1'] = rand(h)
+            model.params[p+'ffn_w2'] = rand(d, h)
+            model.params[p+'ffn_b2'] = rand(d)
+        model._resolve_params()
+        return model
+
     def save_weights(self, path="smallgpt_weights.npz"):
         """Speichert Gewichte als .npz — beim nächsten Start kein Download nötig."""
         np.savez(path, **self.params)
@@ -582,8 +909,171 @@ class SmallGPT:
         """Lädt Gewichte aus einer .npz Datei."""
         data = np.load(path, allow_pickle=True)
         self.params = dict(data)
+        self._resolve_params()
         print(f" Gewichte geladen: {path}")
 
+    # =========================================================================
+    # MEMORY-MAPPED GEWICHTSDATEI
+    # =========================================================================
+    #
+    # Aufbau der Datei:
+    #   8 Bytes  Magic b"SMALLGPT"
+    #   8 Bytes  Länge des JSON-Headers (little endian)
+    #   JSON     {"config": {...}, "tensors": {name: {dtype, shape, offset}}}
+    #   Rohdaten jedes Arrays, auf MEMMAP_ALIGN Bytes ausgerichtet
+    #
+    # Beim Laden wird nichts gelesen oder kopiert: jedes Gewicht ist ein
+    # View auf eine np.memmap der Datei. Das Betriebssystem lädt die Seiten
+    # erst bei Zugriff und teilt sie zwischen allen Prozessen, die dieselbe
+    # Datei öffnen.
+
+    MEMMAP_MAGIC = b"SMALLGPT"
+    MEMMAP_ALIGN = 64
+
+    def save_memmap(self, path):
+        """Schreibt alle Gewichte in eine Datei für load_memmap()."""
+        import json
+
+        align = self.MEMMAP_ALIGN
+        tensors, arrays, offset, seen = {}, [], 0, {}
+        for name, value in self.params.items():
+            key = _buffer_key(value)
+            if key in seen:
+                # output_w ist dieselbe Matrix wie token_emb -> nur einmal speichern
+                tensors[name] = tensors[seen[key]]
+                continue
+            seen[key] = name
+            if value.dtype.kind == 'f':
+                value = np.ascontiguousarray(value, dtype=np.float32)
+            else:
+                value = np.ascontiguousarray(value)
+            offset = -(-offset // align) * align
+            tensors[name] = {"dtype": value.dtype.str, "shape": list(value.shape),
+                             "offset": offset}
+            arrays.append((offset, value))
+            offset += value.nbytes
+
+        config = {"vocab_size": self.vocab_size, "embedding_dim": self.embedding_dim,
+                  "num_heads": self.num_heads, "num_layers": self.num_layers,
+                  "max_seq_len": self.max_seq_len}
+        header = json.dumps({"config": config, "tensors": tensors}).encode("utf-8")
+        data_start = -(-(16 + len(header)) // align) * align
+
+        with open(path, "wb") as f:
+            f.write(self.MEMMAP_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for offset, value in arrays:
+                f.seek(data_start + offset)
+                f.write(value.tobytes())
+        print(f" Gewichte gespeichert: {path} ({(data_start + offset) / 2**20:.0f} MB)")
+
+    @classmethod
+    def load_memmap(cls, path):
+        """
+        Lädt ein Modell aus einer mit save_memmap() geschriebenen Datei —
+        ohne transformers/torch und ohne Netzwerk.
+        """
+        import json
+
+        with open(path, "rb") as f:
+            if f.read(8) != cls.MEMMAP_MAGIC:
+                raise ValueError(f"Keine SmallGPT-Gewichtsdatei: {path}")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        data_start = -(-(16 + header_len) // cls.MEMMAP_ALIGN) * cls.MEMMAP_ALIGN
+
+        model = cls(**header["config"])
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        views = {}
+        for name, info in header["tensors"].items():
+            key = info["offset"]
+            if key not in views:
+                dtype = np.dtype(info["dtype"])
+                start = data_start + info["offset"]
+                count = int(np.prod(info["shape"]))
+                views[key] = raw[start:start + count * dtype.itemsize] \
+                    .view(dtype).reshape(info["shape"])
+            model.params[name] = views[key]
+        model._resolve_params()
+        print(f" Gewichte eingeblendet (memmap): {path}")
+        return model
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def benchmark(model, prompt_len=32, new_tokens=32, seed=0):
+    """
+    Misst die Generierungsgeschwindigkeit in Tokens pro Sekunde.
+    Prompt aus Zufalls-IDs; EOS wird nicht beachtet, damit immer genau
+    new_tokens Tokens entstehen.
+
+    Beispiel (ohne Download):
+        benchmark(SmallGPT.random())
+    """
+    import time
+
+    np.random.seed(seed)
+    prompt = np.random.randint(0, model.vocab_size, size=(1, prompt_len))
+    start = time.perf_counter()
+    model.generate(prompt, max_new_tokens=new_tokens)
+    elapsed = time.perf_counter() - start
+    tokens_per_second = new_tokens / elapsed
+    print(f" {new_tokens} Tokens in {elapsed:.2f} s -> {tokens_per_second:.1f} Tokens/s")
+    return tokens_per_second
+
+
+def perplexity(model, token_ids, window=None):
+    """
+    Perplexität auf einer Token-Folge (Liste von IDs): exp des mittleren
+    Cross-Entropy-Verlusts für das jeweils nächste Token. Lange Texte
+    werden in Fenster von höchstens max_seq_len Tokens zerlegt.
+    """
+    window = window or model.max_seq_len
+    total_loss, count = 0.0, 0
+    for start in range(0, len(token_ids) - 1, window):
+        chunk = np.array([token_ids[start:start + window + 1]])
+        if chunk.shape[1] < 2:
+            break
+        logits, _ = model.forward(chunk[:, :-1])
+        logits = logits[0].astype(np.float64)
+        targets = chunk[0, 1:]
+        shifted = logits - logits.max(axis=-1, keepdims=True)
+        log_probs = shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+        total_loss -= log_probs[np.arange(len(targets)), targets].sum()
+        count += len(targets)
+    return float(np.exp(total_loss / count))
+
+
+def weight_memory(model):
+    """Speicherbedarf der Layer-Gewichte in Bytes (ohne Embeddings)"""
+    return sum(v.nbytes for k, v in model.params.items() if k.startswith('layer'))
+
+
+def quantization_report(model, token_ids, new_tokens=32):
+    """
+    Vergleicht float32 und int8 auf demselben Modell: Perplexität auf
+    token_ids, Speicher der Layer-Gewichte und Tokens/s. Das Modell ist
+    danach quantisiert.
+    """
+    rows = []
+    for mode in ("float32", "int8"):
+        if mode == "int8":
+            model.quantize()
+        ppl = perplexity(model, token_ids)
+        memory = weight_memory(model) / 2**20
+        speed = benchmark(model, new_tokens=new_tokens)
+        rows.append((mode, ppl, memory, speed))
+
+    print(f"\n{'Modus':<10} {'Perplexität':>12} {'Layer-Gewichte':>15} {'Tokens/s':>9}")
+    for mode, ppl, memory, speed in rows:
+        print(f"{mode:<10} {ppl:>12.3f} {memory:>12.1f} MB {speed:>9.1f}")
+    delta = rows[1][1] - rows[0][1]
+    print(f"Perplexität int8 - float32: {delta:+.3f} ({100 * delta / rows[0][1]:+.2f}%)")
+    return rows
+
 
 # =============================================================================
 # CHAT
@@ -605,6 +1095,9 @@ def chat_loop(model, tokenizer, verbose=False):
         verbose -> Verbose-Modus umschalten
     """
     context_ids = []
+    # Keys/Values des Gesprächsverlaufs — bleiben über die Runden erhalten,
+    # so wird pro Runde nur die neue Eingabe durchgerechnet
+    kv_cache = KVCache(model.num_layers, model.max_seq_len)
 
     print("\n" + "="*60)
     print("CHAT GESTARTET")
@@ -622,6 +1115,7 @@ def chat_loop(model, tokenizer, verbose=False):
 
         if user_input.lower() == "reset":
             context_ids = []
+            kv_cache.clear()
             print("(Kontext zurückgesetzt — neues Gespräch)")
             continue
 
@@ -638,7 +1132,8 @@ def chat_loop(model, tokenizer, verbose=False):
         if verbose:
             print(f"\n[Tokenizer] '{user_input}' -> {len(new_tokens)} Tokens: {new_tokens[:5]}...")
 
-        # Context Window prüfen — GPT-2 max 1024 Tokens
+        # Context Window prüfen — GPT-2 max 1024 Tokens.
+        # Danach passt der KV-Cache nicht mehr und wird neu aufgebaut.
         if len(context_ids) > 900:
             print("(Kontext wird gekürzt — ältere Teile vergessen...)")
             context_ids = context_ids[-900:]
@@ -650,7 +1145,8 @@ def chat_loop(model, tokenizer, verbose=False):
             max_new_tokens=50,
             temperature=0.8,
             eos_token_id=tokenizer.eos_token_id,
-            verbose=verbose
+            verbose=verbose,
+            kv_cache=kv_cache
         )
 
         # Nur neue Tokens extrahieren — EOS-Token aus Antwort entfernen
@@ -672,6 +1168,37 @@ def chat_loop(model, tokenizer, verbose=False):
 # MODELLAUSWAHL
 # =============================================================================
 
+def weights_file(model_name):
+    """Dateiname der konvertierten Gewichte, z.B. 'microsoft_DialoGPT-small.smallgpt'"""
+    return model_name.replace("/", "_") + ".smallgpt"
+
+
+def convert(model_name):
+    """
+    Einmalige Konvertierung: lädt das Modell von Hugging Face und schreibt
+    es als memmap-Datei. Der Tokenizer landet dabei im lokalen Cache.
+    """
+    model, _ = SmallGPT.from_pretrained(model_name)
+    model.save_memmap(weights_file(model_name))
+
+
+def load_model(model_name):
+    """
+    Nimmt die konvertierte Gewichtsdatei, wenn es sie gibt (Tokenizer dann
+    nur aus dem lokalen Cache), sonst den Download über from_pretrained().
+    """
+    import os
+
+    path = weights_file(model_name)
+    if not os.path.exists(path):
+        return SmallGPT.from_pretrained(model_name)
+
+    from transformers import GPT2Tokenizer
+    model = SmallGPT.load_memmap(path)
+    tokenizer = GPT2Tokenizer.from_pretrained(model_name, local_files_only=True)
+    return model, tokenizer
+
+
 def select_model():
     """Interaktive Modellauswahl beim Programmstart."""
 
@@ -699,7 +1226,7 @@ def select_model():
         if choice in models:
             model_name, description = models[choice]
             print(f"\n-> Gewählt: {description.strip()}")
-            model, tokenizer = SmallGPT.from_pretrained(model_name)
+            model, tokenizer = load_model(model_name)
 
             verbose_choice = input("\nVerbose-Modus aktivieren? (j/n): ").strip().lower()
             verbose = verbose_choice == "j"
@@ -711,4 +1238,13 @@ def select_model():
 
 
 if __name__ == "__main__":
-    select_model()
+    import sys
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--convert":
+        convert(sys.argv[2])
+    elif len(sys.argv) == 4 and sys.argv[1] == "--quant-report":
+        model, tokenizer = load_model(sys.argv[2])
+        with open(sys.argv[3], encoding="utf-8") as f:
+            quantization_report(model, tokenizer.encode(f.read()))
+    else:
+        select_model()
@@ -0,0 +1,306 @@
+"""
+SmallGPTServer - Lokaler Inferenz-Server für SmallGPT (nur asyncio + NumPy)
+
+Hält ein geladenes Modell im Speicher und beantwortet Completion-Anfragen
+über HTTP/JSON. Anfragen landen in einer Warteschlange; der Scheduler
+sammelt, was gleichzeitig ankommt, zu einem Batch und rechnet alle Zeilen
+in gemeinsamen Forward Passes (SmallGPT.generate_batch_steps). Jedes neue
+Token wird sofort an seine Anfrage gestreamt.
+
+Start:
+  python3 SmallGPTServer.py gpt2 [port]
+  python3 SmallGPTServer.py --random [port]   (Zufallsgewichte, ohne Download)
+
+Anfragen:
+  curl -N localhost:8000/v1/completions \\
+       -d '{"prompt": "Hello", "max_tokens": 20, "temperature": 0.8}'
+  -> eine JSON-Zeile pro Token: {"token": 995, "text": " world"}
+     zum Schluss:               {"done": true, "tokens": 20, "text": ""}
+     oder bei einem Fehler:     {"error": "...", "tokens": 3, "text": ""}
+     Ein Zeichen aus mehreren Tokens kommt erst mit seinem letzten Token
+     ("text" davor leer); "text" der Schlusszeile enthält einen Rest.
+
+  Ohne Tokenizer (--random) statt "prompt" eine Token-Liste: {"tokens": [1, 2, 3]}
+  "stream": false liefert die ganze Antwort als ein JSON-Objekt.
+
+  curl localhost:8000/metrics
+  -> Warteschlange, aktuelle/mittlere Batch-Größe, Tokens/s
+"""
+
+import asyncio
+import json
+import time
+
+from SmallGPT import SmallGPT, load_model
+
+
+# =============================================================================
+# ANFRAGEN UND SCHEDULER
+# =============================================================================
+
+class Completion:
+    """Eine wartende Anfrage: Prompt, Parameter und eine Token-Queue."""
+
+    def __init__(self, prompt_tokens, max_tokens, temperature):
+        self.prompt_tokens = prompt_tokens
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.tokens = asyncio.Queue()       # neue Tokens, None = fertig
+        self.error = None                   # Fehlermeldung, falls der Batch scheitert
+
+
+class BatchScheduler:
+    """
+    Dynamisches Batching: wartet auf die erste Anfrage, sammelt dann bis zu
+    batch_wait Sekunden lang weitere (höchstens max_batch) und generiert
+    alle zusammen. Anfragen, die währenddessen eintreffen, bilden den
+    nächsten Batch.
+
+    Das Rechnen läuft in einem Worker-Thread (run_in_executor), damit die
+    Event-Loop weiter Verbindungen annimmt und Tokens ausliefert.
+    """
+
+    def __init__(self, model, eos_token_id=None, max_batch=8, batch_wait=0.02):
+        self.model = model
+        self.eos_token_id = eos_token_id
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.queue = asyncio.Queue()
+
+        # Metriken
+        self.batch_size = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.requests = 0
+        self.tokens = 0
+        self.busy_time = 0.0
+        self.tokens_per_second = 0.0        # des letzten Batches
+
+    async def submit(self, completion):
+        self.requests += 1
+        await self.queue.put(completion)
+
+    async def _collect(self):
+        """Erste Anfrage abwarten, dann kurz weitere einsammeln."""
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self.batch_size = len(batch)
+            self.batches += 1
+            self.batched_requests += len(batch)
+
+            steps = self.model.generate_batch_steps(
+                [c.prompt_tokens for c in batch],
+                max_new_tokens=[c.max_tokens for c in batch],
+                temperature=[c.temperature for c in batch],
+                eos_token_id=self.eos_token_id)
+
+            start = time.perf_counter()
+            batch_tokens = 0
+            try:
+                while True:
+                    step = await loop.run_in_executor(None, next, steps, None)
+                    if step is None:
+                        break
+                    next_tokens, active = step
+                    for completion, token, is_new in zip(batch, next_tokens, active):
+                        if is_new:
+                            completion.tokens.put_nowait(int(token))
+                    batch_tokens += int(active.sum())
+                    self.tokens += int(active.sum())
+            except Exception as e:
+                print(f"Fehler im Batch: {e!r}")
+                for completion in batch:
+                    completion.error = f"Fehler bei der Generierung: {e!r}"
+            finally:
+                for completion in batch:
+                    completion.tokens.put_nowait(None)
+                elapsed = time.perf_counter() - start
+                self.busy_time += elapsed
+                self.tokens_per_second = batch_tokens / elapsed if elapsed else 0.0
+                self.batch_size = 0
+
+    def metrics(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "batch_size": self.batch_size,
+            "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "batches": self.batches,
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "tokens_per_second": round(self.tokens_per_second, 2),
+            "avg_tokens_per_second": round(self.tokens / self.busy_time, 2) if self.busy_time else 0.0,
+        }
+
+
+# =============================================================================
+# HTTP
+# =============================================================================
+
+class InferenceServer:
+    """Minimales HTTP/1.1 über asyncio-Streams, eine Anfrage pro Verbindung."""
+
+    def __init__(self, model, tokenizer=None, max_batch=8, batch_wait=0.02):
+        self.model = model
+        self.tokenizer = tokenizer
+        eos = tokenizer.eos_token_id if tokenizer is not None else None
+        self.scheduler = BatchScheduler(model, eos, max_batch, batch_wait)
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        scheduler = asyncio.create_task(self.scheduler.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"SmallGPT-Server läuft auf http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            scheduler.cancel()
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, body = await self._read_request(reader)
+            if method == "GET" and path == "/metrics":
+                await self._send_json(writer, 200, self.scheduler.metrics())
+            elif method == "POST" and path == "/v1/completions":
+                await self._complete(writer, json.loads(body or b"{}"))
+            else:
+                await self._send_json(writer, 404, {"error": f"unbekannt: {method} {path}"})
+        except (ValueError, KeyError, TypeError) as e:
+            await self._send_json(writer, 400, {"error": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise ValueError("ungültige Anfragezeile")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return request_line[0], request_line[1], body
+
+    def _prompt_tokens(self, request):
+        if "tokens" in request:
+            tokens = request["tokens"]
+            if not isinstance(tokens, list) or not all(
+                    isinstance(t, int) and not isinstance(t, bool) for t in tokens):
+                raise ValueError("'tokens' muss eine Liste von Ganzzahlen sein")
+        elif self.tokenizer is not None:
+            tokens = self.tokenizer.encode(request["prompt"])
+        else:
+            raise ValueError("ohne Tokenizer bitte 'tokens' statt 'prompt' senden")
+        if not tokens:
+            raise ValueError("leerer Prompt")
+        vocab_size = self.model.vocab_size
+        if any(not 0 <= t < vocab_size for t in tokens):
+            raise ValueError(f"Token-IDs müssen in 0..{vocab_size - 1} liegen")
+        return tokens
+
+    async def _complete(self, writer, request):
+        if not isinstance(request, dict):
+            raise ValueError("Anfrage muss ein JSON-Objekt sein")
+        prompt_tokens = self._prompt_tokens(request)
+        max_tokens = int(request.get("max_tokens", 20))
+        temperature = float(request.get("temperature", 0.8))
+        if len(prompt_tokens) + max_tokens > self.model.max_seq_len:
+            raise ValueError(f"Prompt + max_tokens > {self.model.max_seq_len}")
+
+        completion = Completion(prompt_tokens, max_tokens, temperature)
+        await self.scheduler.submit(completion)
+
+        if not request.get("stream", True):
+            tokens = []
+            while (token := await completion.tokens.get()) is not None:
+                tokens.append(token)
+            if completion.error is not None:
+                await self._send_json(writer, 500, {"error": completion.error})
+                return
+            result = {"tokens": tokens}
+            if self.tokenizer is not None:
+                result["text"] = self.tokenizer.decode(tokens)
+            await self._send_json(writer, 200, result)
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\n"
+                     b"Connection: close\r\n\r\n")
+        # Ein Zeichen kann über mehrere Byte-Tokens verteilt sein; einzeln
+        # dekodiert ergäbe jedes Bruchstück '\ufffd'. Deshalb wird immer die
+        # ganze Antwort dekodiert und nur der neue Teil geschickt — solange
+        # sie auf ein unvollständiges Zeichen endet, wird Text zurückgehalten.
+        ids, sent = [], ""
+        while (token := await completion.tokens.get()) is not None:
+            ids.append(token)
+            message = {"token": token}
+            if self.tokenizer is not None:
+                text = self.tokenizer.decode(ids)
+                if text.endswith("\ufffd"):
+                    message["text"] = ""
+                else:
+                    message["text"], sent = text[len(sent):], text
+            await self._send_chunk(writer, message)
+        if completion.error is not None:
+            final = {"error": completion.error, "tokens": len(ids)}
+        else:
+            final = {"done": True, "tokens": len(ids)}
+        if self.tokenizer is not None:
+            final["text"] = self.tokenizer.decode(ids)[len(sent):]
+        await self._send_chunk(writer, final)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _send_chunk(self, writer, message):
+        data = (json.dumps(message) + "\n").encode()
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        await writer.drain()
+
+    async def _send_json(self, writer, status, message):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                  500: "Internal Server Error"}[status]
+        data = json.dumps(message).encode()
+        writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Aufruf: python3 SmallGPTServer.py <modell>|--random [port]")
+        sys.exit(1)
+
+    if sys.argv[1] == "--random":
+        model, tokenizer = SmallGPT.random(), None
+    else:
+        model, tokenizer = load_model(sys.argv[1])
+
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    try:
+        asyncio.run(InferenceServer(model, tokenizer).serve(port=port))
+    except KeyboardInterrupt:
+        pass
@@ -1,4 +1,37 @@
 # https://claude.ai/public/artifacts/c3b85be8-4ec2-44db-90d4-413851a73ae5
+from bpe import BPEEncoder, train_merges
+
+try:
+    import numpy as np
+except ImportError:  # ohne NumPy laufen die Transformer-Klassen in reinem Python
+    np = None
+
+# Backend der Transformer-Klassen: 'numpy' (vektorisiert, auch Batches) oder
+# 'python' (Listen und Schleifen, ohne Abhängigkeiten). Umschalten mit
+# set_backend() oder pro Objekt mit dem Argument backend=...
+DEFAULT_BACKEND = 'numpy' if np is not None else 'python'
+
+
+def set_backend(backend):
+    """Setzt das Standard-Backend für neu erzeugte Transformer-Klassen."""
+    global DEFAULT_BACKEND
+    DEFAULT_BACKEND = _resolve_backend(backend)
+
+
+def _resolve_backend(backend):
+    backend = backend or DEFAULT_BACKEND
+    if backend not in ('numpy', 'python'):
+        raise ValueError(f"Unbekanntes Backend: {backend!r} (erlaubt: 'numpy', 'python')")
+    if backend == 'numpy' and np is None:
+        raise ImportError("Das NumPy-Backend benötigt numpy (pip install numpy)")
+    return backend
+
+
+def _is_batch(X):
+    """Python-Backend: ist X eine Liste von Sequenzen statt einer Sequenz?"""
+    return isinstance(X[0][0], (list, tuple))
+
+
 class EmbeddingLayer:
     """
     Embedding-Layer: Wandelt Token-IDs in Vektoren um.
@@ -226,6 +259,8 @@ class SubwordTokenizer:
         self.merges = []
         # Nächste freie ID
         self.next_id = 0
+        # Schneller Encoder: Merges nach Rang, LRU-Cache pro Wort (bpe.py)
+        self.encoder = BPEEncoder(self)
 
         # Initialisiere mit Spezial-Tokens
         self._add_token("<PAD>")  # Padding
@@ -289,17 +324,6 @@ class SubwordTokenizer:
             return False
         return token[0].isalnum()
 
-    def _replace_pair_in_string(self, text, pair, replacement):
-        """
-        Ersetzt ein Zeichenpaar in einem String.
-        Ersetzt: re.sub(pattern, replacement, text)
-
-        Beispiel: "a b c" mit pair=('a', 'b') -> "ab c"
-        """
-        search_pattern = ' '.join(pair)
-        result = text.replace(search_pattern, replacement)
-        return result
-
     def _add_token(self, token, count=1):
         """Fügt ein Token zum Vokabular hinzu."""
         if token not in self.vocab:
@@ -320,16 +344,6 @@ class SubwordTokenizer:
         chars[-1] = chars[-1] + '</w>'  # Markiere Wortende
         return chars
 
-    def _get_pairs(self, chars):
-        """
-        Findet alle benachbarten Zeichenpaare.
-        ['h', 'a', 'l'] -> {('h', 'a'), ('a', 'l')}
-        """
-        pairs = set()
-        for i in range(len(chars) - 1):
-            pairs.add((chars[i], chars[i + 1]))
-        return pairs
-
     def train_bpe(self, texts, num_merges=10):
         """
         Trainiert BPE auf einer Liste von Texten.
@@ -356,49 +370,24 @@ class SubwordTokenizer:
         print(f"Wort-Häufigkeiten: {word_freqs}")
 
         # Schritt 2: Initialisiere mit einzelnen Zeichen
-        vocab = {}
-        for word, freq in word_freqs.items():
-            chars = self._get_word_characters(word)
-            vocab[' '.join(chars)] = freq
-
         print(f"\nStart-Vokabular (Zeichen-Ebene):")
-        print(f"  {list(vocab.keys())[:3]}...")
+        print(f"  {[' '.join(self._get_word_characters(word)) for word in list(word_freqs)[:3]]}...")
 
         # Schritt 3: BPE-Training - Merge die häufigsten Paare
-        for merge_step in range(num_merges):
-            # Zähle alle Paare
-            pairs_count = {}
-            for word, freq in vocab.items():
-                chars = word.split()
-                for pair in self._get_pairs(chars):
-                    if pair in pairs_count:
-                        pairs_count[pair] += freq
-                    else:
-                        pairs_count[pair] = freq
-
-            if not pairs_count:
-                print(f"\nKeine weiteren Paare zum Mergen gefunden.")
-                break
-
-            # Finde das häufigste Paar
-            best_pair = max(pairs_count, key=pairs_count.get)
-            print(f"\nMerge {merge_step + 1}: '{best_pair[0]}' + '{best_pair[1]}' -> '{best_pair[0]}{best_pair[1]}' (Häufigkeit: {pairs_count[best_pair]})")
+        # Paar-Zählungen werden inkrementell gepflegt, siehe bpe.py
+        merge_step = 0
+        for best_pair, count in train_merges(word_freqs, num_merges, self._get_word_characters):
+            merge_step += 1
+            print(f"\nMerge {merge_step}: '{best_pair[0]}' + '{best_pair[1]}' -> '{best_pair[0]}{best_pair[1]}' (Häufigkeit: {count})")
 
             # Speichere Merge-Regel
             self.merges.append(best_pair)
 
-            # Merge das Paar im Vokabular
-            new_vocab = {}
-            replacement = ''.join(best_pair)
-
-            for word, freq in vocab.items():
-                new_word = self._replace_pair_in_string(word, best_pair, replacement)
-                new_vocab[new_word] = freq
-
-            vocab = new_vocab
-
             # Füge das neue Subword-Token hinzu
-            self._add_token(replacement, 0)
+            self._add_token(''.join(best_pair), 0)
+
+        if merge_step < num_merges:
+            print(f"\nKeine weiteren Paare zum Mergen gefunden.")
 
         print(f"\n{'='*60}")
         print(f"Training abgeschlossen!")
@@ -528,76 +517,38 @@ class SubwordTokenizer:
 
         print(f"Neue Wörter: {word_freqs}")
 
-        # Initialisiere Vokabular mit Zeichen-Ebene
-        vocab = {}
-        for word, freq in word_freqs.items():
-            chars = self._get_word_characters(word)
-
-            # Prüfe auf unbekannte Zeichen (sollte nicht passieren bei a-z)
-            for char in chars:
+        # Prüfe auf unbekannte Zeichen (sollte nicht passieren bei a-z)
+        for word in word_freqs:
+            for char in self._get_word_characters(word):
                 if char not in self.vocab:
                     print(f"  WARNUNG: Unbekanntes Zeichen '{char}' - füge hinzu")
                     self._add_token(char, 0)
 
-            # Wende bereits gelernte Merges an
-            current_chars = chars[:]
-            for merge_pair in self.merges:
-                i = 0
-                while i < len(current_chars) - 1:
-                    if (current_chars[i], current_chars[i + 1]) == merge_pair:
-                        current_chars[i] = current_chars[i] + current_chars[i + 1]
-                        current_chars.pop(i + 1)
-                    else:
-                        i += 1
-
-            vocab[' '.join(current_chars)] = freq
-
+        # Start-Symbole: Zeichen mit den bereits gelernten Merges
         print(f"\nVokabular nach Anwendung alter Merges:")
-        for v in vocab.keys():
-            print(f"  {v}")
+        for word in word_freqs:
+            print(f"  {' '.join(self.encoder.apply_bpe(word))}")
 
-        # Führe zusätzliche Merges durch
+        # Führe zusätzliche Merges durch — derselbe Trainer wie in train_bpe
+        # (bpe.py), also auch dieselbe Regel bei Gleichstand
         initial_merges = len(self.merges)
-        for merge_step in range(num_merges):
-            # Zähle Paare
-            pairs_count = {}
-            for word, freq in vocab.items():
-                chars = word.split()
-                for pair in self._get_pairs(chars):
-                    if pair in pairs_count:
-                        pairs_count[pair] += freq
-                    else:
-                        pairs_count[pair] = freq
-
-            if not pairs_count:
-                print(f"\nKeine weiteren Paare zum Mergen.")
-                break
-
-            # Finde häufigstes Paar
-            best_pair = max(pairs_count, key=pairs_count.get)
+        merge_step = 0
+        for best_pair, count in train_merges(word_freqs, num_merges, self.encoder.apply_bpe):
+            merge_step += 1
 
             # Prüfe, ob dieser Merge schon existiert
             if best_pair in self.merges:
                 print(f"\nMerge '{best_pair[0]}' + '{best_pair[1]}' existiert bereits, überspringe.")
                 continue
 
-            print(f"\nNeuer Merge {len(self.merges) - initial_merges + 1}: '{best_pair[0]}' + '{best_pair[1]}' -> '{best_pair[0]}{best_pair[1]}' (Häufigkeit: {pairs_count[best_pair]})")
+            print(f"\nNeuer Merge {len(self.merges) - initial_merges + 1}: '{best_pair[0]}' + '{best_pair[1]}' -> '{best_pair[0]}{best_pair[1]}' (Häufigkeit: {count})")
 
-            # Speichere Merge
+            # Speichere Merge und füge Token hinzu
             self.merges.append(best_pair)
+            self._add_token(''.join(best_pair), 0)
 
-            # Merge im Vokabular
-            new_vocab = {}
-            replacement = ''.join(best_pair)
-
-            for word, freq in vocab.items():
-                new_word = self._replace_pair_in_string(word, best_pair, replacement)
-                new_vocab[new_word] = freq
-
-            vocab = new_vocab
-
-            # Füge Token hinzu
-            self._add_token(replacement, 0)
+        if merge_step < num_merges:
+            print(f"\nKeine weiteren Paare zum Mergen.")
 
         print(f"\n{'='*60}")
         print(f"Nachtraining abgeschlossen!")
@@ -829,19 +780,178 @@ class SubwordTokenizer:
             print("Kein Training möglich - keine Texte geladen.")
 
 
+    # ------------------------------------------------------------------ #
+    # Streaming-Pipeline für große Korpora                                 #
+    # ------------------------------------------------------------------ #
+
+    def encode(self, text):
+        """
+        Wie tokenize(), aber ohne Ausgaben — für große Datenmengen.
+        Merges nach Rang statt über die ganze Merge-Liste, Wörter im
+        LRU-Cache (siehe bpe.BPEEncoder).
+        """
+        return self.encoder.encode(text)
+
+    def encode_texts(self, texts):
+        """Liste von Texten -> Liste von Token-ID-Listen (still)"""
+        return self.encoder.encode_texts(texts)
+
+    def encode_file(self, filepath, encoding='utf-8'):
+        """Ganze Datei zeilenweise kodieren (still)"""
+        return self.encoder.encode_file(filepath, encoding)
+
+    def stream_lines(self, filepath, encoding='utf-8'):
+        """
+        Liest eine Datei Zeile für Zeile (Generator) statt sie komplett
+        in den Speicher zu laden. Leere Zeilen werden übersprungen.
+        """
+        with open(filepath, 'r', encoding=encoding) as file:
+            for line in file:
+                cleaned_line = line.strip()
+                if cleaned_line:
+                    yield cleaned_line
+
+    def stream_token_ids(self, filepath, encoding='utf-8', workers=0, prefetch=8,
+                         chunk_lines=256):
+        """
+        Liefert die Token-IDs Zeile für Zeile (Generator).
+
+        Args:
+            filepath: Pfad zur Textdatei
+            encoding: Zeichenkodierung der Datei
+            workers: 0 = Tokenisierung im eigenen Prozess,
+                     1 = ein Worker-Prozess tokenisiert voraus
+            prefetch: Maximal so viele Blöcke liegen fertig in der Queue
+                      (begrenzt den Speicher, wenn das Training langsamer ist)
+            chunk_lines: Zeilen pro Block, der zwischen den Prozessen wandert
+        """
+        if not workers:
+            for line in self.stream_lines(filepath, encoding):
+                yield self.encode(line)
+            return
+
+        import multiprocessing
+
+        queue = multiprocessing.Queue(maxsize=prefetch)
+        worker = multiprocessing.Process(
+            target=_tokenize_worker,
+            args=(self, filepath, encoding, queue, chunk_lines),
+            daemon=True)
+        worker.start()
+        try:
+            while True:
+                chunk = queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield from chunk
+        finally:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+    def stream_batches(self, filepath, context_window=4, batch_size=32,
+                       shuffle_buffer=10000, seed=None, encoding='utf-8',
+                       workers=0, drop_last=False):
+        """
+        Streaming-Variante von prepare_batch(): liest die Datei zeilenweise,
+        tokenisiert fortlaufend und liefert NumPy-Batches
+        (contexts [batch_size, context_window], targets [batch_size]).
+        Speicherbedarf hängt nur von shuffle_buffer ab, nicht von der Datei.
+
+        Gemischt wird über einen Puffer fester Größe: jedes neue Paar
+        ersetzt ein zufällig gewähltes Paar im Puffer, das ausgegeben wird.
+        Paare entstehen wie bei create_training_pairs() ('sliding') je Zeile.
+
+        Args:
+            filepath: Pfad zur Textdatei
+            context_window: Größe des Kontextfensters
+            batch_size: Anzahl der Samples pro Batch
+            shuffle_buffer: Größe des Misch-Puffers (0/1 = nicht mischen)
+            seed: Seed für reproduzierbares Mischen
+            encoding: Zeichenkodierung der Datei
+            workers: 1 = Tokenisierung läuft in einem Worker-Prozess voraus
+            drop_last: Letzten, unvollständigen Batch weglassen
+        """
+        import random
+        import numpy as np
+
+        rng = random.Random(seed)
+        buffer = []
+        contexts = []
+        targets = []
+
+        def emit(pair):
+            contexts.append(pair[0])
+            targets.append(pair[1])
+
+        for token_ids in self.stream_token_ids(filepath, encoding, workers):
+            for i in range(len(token_ids) - context_window):
+                pair = (token_ids[i:i + context_window], token_ids[i + context_window])
+
+                if len(buffer) < shuffle_buffer:
+                    buffer.append(pair)
+                    continue
+                if buffer:
+                    j = rng.randrange(len(buffer))
+                    buffer[j], pair = pair, buffer[j]
+                emit(pair)
+
+                if len(targets) == batch_size:
+                    yield np.array(contexts, dtype=np.int64), np.array(targets, dtype=np.int64)
+                    contexts.clear()
+                    targets.clear()
+
+        # Rest des Puffers gemischt ausgeben
+        rng.shuffle(buffer)
+        for pair in buffer:
+            emit(pair)
+            if len(targets) == batch_size:
+                yield np.array(contexts, dtype=np.int64), np.array(targets, dtype=np.int64)
+                contexts.clear()
+                targets.clear()
+
+        if targets and not drop_last:
+            yield np.array(contexts, dtype=np.int64), np.array(targets, dtype=np.int64)
+
+
+def _tokenize_worker(tokenizer, filepath, encoding, queue, chunk_lines):
+    """
+    Worker-Prozess für stream_token_ids(): tokenisiert die Datei und
+    schickt die Token-IDs blockweise über die Queue, None = fertig.
+    """
+    try:
+        chunk = []
+        for line in tokenizer.stream_lines(filepath, encoding):
+            chunk.append(tokenizer.encode(line))
+            if len(chunk) == chunk_lines:
+                queue.put(chunk)
+                chunk = []
+        if chunk:
+            queue.put(chunk)
+        queue.put(None)
+    except Exception as e:
+        queue.put(e)
+
+
 class MultiHeadSelfAttention:
     """
     Multi-Head Self-Attention Mechanismus (aus "Attention is All You Need").
     Berechnet für jeden Token, wie stark er auf andere Tokens achten soll.
 
     Formel: Attention(Q, K, V) = softmax(Q @ Kᵀ / sqrt(d_k)) @ V
+
+    Mit backend='numpy' werden alle Köpfe (und alle Sequenzen eines
+    Batches) in wenigen Matrix-Operationen gemeinsam berechnet.
     """
 
-    def __init__(self, embedding_dim, num_heads=2):
+    def __init__(self, embedding_dim, num_heads=2, backend=None):
         """
         Args:
             embedding_dim: Dimensionalität der Eingabe-Vektoren
             num_heads:     Anzahl der Attention-Köpfe (muss embedding_dim teilen)
+            backend:       'numpy' oder 'python' (Standard: DEFAULT_BACKEND)
         """
         assert embedding_dim % num_heads == 0, \
             "embedding_dim muss durch num_heads teilbar sein!"
@@ -849,6 +959,7 @@ class MultiHeadSelfAttention:
         self.embedding_dim = embedding_dim
         self.num_heads = num_heads
         self.head_dim = embedding_dim // num_heads  # Dimension pro Kopf
+        self.backend = _resolve_backend(backend)
 
         import random
         import math
@@ -859,6 +970,7 @@ class MultiHeadSelfAttention:
         print(f"  Embedding-Dim: {embedding_dim}")
         print(f"  Anzahl Köpfe:  {num_heads}")
         print(f"  Dim pro Kopf:  {self.head_dim}")
+        print(f"  Backend:       {self.backend}")
 
         # Gewichtsmatrizen für Q, K, V und Output-Projektion
         # Jede hat Form (embedding_dim x embedding_dim)
@@ -874,10 +986,11 @@ class MultiHeadSelfAttention:
     def _init_weights(self, rows, cols):
         """Xavier-ähnliche Initialisierung."""
         scale = (2.0 / (rows + cols)) ** 0.5
-        return [
+        weights = [
             [(self._random.random() - 0.5) * 2 * scale for _ in range(cols)]
             for _ in range(rows)
         ]
+        return np.array(weights) if self.backend == 'numpy' else weights
 
     def _matmul(self, A, B):
         """Matrix-Multiplikation: A (n×m) @ B (m×p) → (n×p)"""
@@ -984,13 +1097,23 @@ class MultiHeadSelfAttention:
         Vollständiger Multi-Head Attention Forward-Pass.
 
         Args:
-            X:    Eingabe-Sequenz (seq_len × embedding_dim)
-            mask: optionale Causal-Mask (seq_len × seq_len)
+            X:    Eingabe-Sequenz (seq_len × embedding_dim) oder ein Batch
+                  gleich langer Sequenzen (batch × seq_len × embedding_dim)
+            mask: optionale Causal-Mask (seq_len × seq_len), bei Batches
+                  auch eine Maske pro Sequenz (batch × seq_len × seq_len)
 
         Returns:
-            output:       (seq_len × embedding_dim)
-            attn_weights: Liste der Attention-Gewichte pro Kopf
+            output:       (seq_len × embedding_dim), bzw. pro Sequenz
+            attn_weights: Attention-Gewichte pro Kopf (num_heads × seq_len × seq_len),
+                          bei Batches zusätzlich pro Sequenz
         """
+        if self.backend == 'numpy':
+            return self._forward_numpy(X, mask)
+        if _is_batch(X):
+            masks = mask if mask is not None and _is_batch(mask) else [mask] * len(X)
+            results = [self.forward(x, m) for x, m in zip(X, masks)]
+            return [out for out, _ in results], [w for _, w in results]
+
         seq_len = len(X)
         print(f"\n--- Multi-Head Attention Forward-Pass ---")
         print(f"  Sequenzlänge: {seq_len}, Embedding-Dim: {self.embedding_dim}")
@@ -1027,6 +1150,51 @@ class MultiHeadSelfAttention:
         print(f"  Output-Shape: {len(output)} × {len(output[0])}")
         return output, all_attn_weights
 
+    def _forward_numpy(self, X, mask=None):
+        """
+        Derselbe Forward-Pass mit NumPy: die Köpfe sind eine eigene Achse,
+        Q @ Kᵀ, Softmax und Gewichte @ V laufen für alle Köpfe und
+        Sequenzen in je einer Operation.
+        """
+        X = np.asarray(X, dtype=float)
+        batched = X.ndim == 3
+        if not batched:
+            X = X[np.newaxis]
+        batch, seq_len, _ = X.shape
+        print(f"\n--- Multi-Head Attention Forward-Pass ---")
+        print(f"  Sequenzlänge: {seq_len}, Embedding-Dim: {self.embedding_dim}"
+              + (f", Batch: {batch}" if batched else ""))
+
+        # 1.+2. Projektionen, aufgeteilt in Köpfe: (batch, heads, seq_len, head_dim)
+        def heads(W):
+            return (X @ W).reshape(batch, seq_len, self.num_heads, self.head_dim).transpose(0, 2, 1, 3)
+
+        Q, K, V = heads(self.W_q), heads(self.W_k), heads(self.W_v)
+
+        # 3. Scaled Dot-Product Attention für alle Köpfe zugleich
+        scores = Q @ K.transpose(0, 1, 3, 2) / self._math.sqrt(self.head_dim)
+        if mask is not None:
+            mask = np.asarray(mask)
+            if mask.ndim == 3:
+                mask = mask[:, np.newaxis]          # eine Maske pro Sequenz
+            scores = np.where(mask == 0, -1e9, scores)
+        scores -= scores.max(axis=-1, keepdims=True)
+        attn_weights = np.exp(scores)
+        attn_weights /= attn_weights.sum(axis=-1, keepdims=True)
+
+        for h in range(self.num_heads):
+            print(f"  Kopf {h+1}: Attention-Gewichte (erste Zeile) = "
+                  f"{[round(float(v), 4) for v in attn_weights[0, h, 0]]}")
+
+        # 4.+5. Köpfe zusammenführen und Output-Projektion
+        concat = (attn_weights @ V).transpose(0, 2, 1, 3).reshape(batch, seq_len, self.embedding_dim)
+        output = concat @ self.W_o
+
+        print(f"  Output-Shape: {' × '.join(map(str, output.shape[1 - batched:]))}")
+        if not batched:
+            return output[0], attn_weights[0]
+        return output, attn_weights
+
     def show_attention_weights(self, attn_weights, token_strings=None):
         """
         Gibt die Attention-Gewichte als Matrix aus.
@@ -1054,11 +1222,12 @@ class FeedForward:
     Formel: FFN(x) = max(0, x @ W1 + b1) @ W2 + b2
     """
 
-    def __init__(self, embedding_dim, ffn_dim=None):
+    def __init__(self, embedding_dim, ffn_dim=None, backend=None):
         """
         Args:
             embedding_dim: Eingabe-/Ausgabedimension
             ffn_dim:       Innere Dimension (Standard: 4 × embedding_dim)
+            backend:       'numpy' oder 'python' (Standard: DEFAULT_BACKEND)
         """
         import random
         import math
@@ -1067,6 +1236,7 @@ class FeedForward:
 
         self.embedding_dim = embedding_dim
         self.ffn_dim = ffn_dim or embedding_dim * 4
+        self.backend = _resolve_backend(backend)
 
         print(f"\nInitialisiere Feed-Forward Network:")
         print(f"  Eingabe-Dim:   {embedding_dim}")
@@ -1087,16 +1257,26 @@ class FeedForward:
         ]
         self.b2 = [0.0] * embedding_dim
 
+        if self.backend == 'numpy':
+            self.W1, self.b1 = np.array(self.W1), np.array(self.b1)
+            self.W2, self.b2 = np.array(self.W2), np.array(self.b2)
+
     def _relu(self, x):
         return max(0.0, x)
 
     def forward(self, X):
         """
         Args:
-            X: (seq_len × embedding_dim)
+            X: (seq_len × embedding_dim) oder (batch × seq_len × embedding_dim)
         Returns:
-            (seq_len × embedding_dim)
+            Ausgabe in derselben Form wie X
         """
+        if self.backend == 'numpy':
+            X = np.asarray(X, dtype=float)
+            return np.maximum(X @ self.W1 + self.b1, 0.0) @ self.W2 + self.b2
+        if _is_batch(X):
+            return [self.forward(x) for x in X]
+
         output = []
         for vec in X:
             # Erste Schicht + ReLU
@@ -1124,19 +1304,30 @@ class LayerNorm:
     dann skaliert mit lernbaren Parametern gamma und beta.
     """
 
-    def __init__(self, embedding_dim, eps=1e-6):
+    def __init__(self, embedding_dim, eps=1e-6, backend=None):
         self.embedding_dim = embedding_dim
         self.eps = eps
+        self.backend = _resolve_backend(backend)
         self.gamma = [1.0] * embedding_dim  # Skalierung (lernbar)
         self.beta = [0.0] * embedding_dim   # Verschiebung (lernbar)
+        if self.backend == 'numpy':
+            self.gamma, self.beta = np.array(self.gamma), np.array(self.beta)
 
     def forward(self, X):
         """
         Args:
-            X: (seq_len × embedding_dim)
+            X: (seq_len × embedding_dim) oder (batch × seq_len × embedding_dim)
         Returns:
             Normalisierte Matrix gleicher Form
         """
+        if self.backend == 'numpy':
+            X = np.asarray(X, dtype=float)
+            mean = X.mean(axis=-1, keepdims=True)
+            var = X.var(axis=-1, keepdims=True)
+            return self.gamma * (X - mean) / np.sqrt(var + self.eps) + self.beta
+        if _is_batch(X):
+            return [self.forward(x) for x in X]
+
         import math
         output = []
         for vec in X:
@@ -1160,24 +1351,30 @@ class TransformerBlock:
           → LayerNorm → FeedForward             → Residual (+x)
     """
 
-    def __init__(self, embedding_dim, num_heads=2, ffn_dim=None):
+    def __init__(self, embedding_dim, num_heads=2, ffn_dim=None, backend=None):
         """
         Args:
             embedding_dim: Dimensionalität der Token-Vektoren
             num_heads:     Anzahl Attention-Köpfe
             ffn_dim:       Innere FFN-Dimension
+            backend:       'numpy' oder 'python' (Standard: DEFAULT_BACKEND)
         """
         print(f"\n{'='*60}")
         print(f"Initialisiere Transformer-Block")
         print(f"{'='*60}")
 
-        self.norm1 = LayerNorm(embedding_dim)
-        self.attn  = MultiHeadSelfAttention(embedding_dim, num_heads)
-        self.norm2 = LayerNorm(embedding_dim)
-        self.ffn   = FeedForward(embedding_dim, ffn_dim)
+        self.backend = _resolve_backend(backend)
+        self.norm1 = LayerNorm(embedding_dim, backend=self.backend)
+        self.attn  = MultiHeadSelfAttention(embedding_dim, num_heads, backend=self.backend)
+        self.norm2 = LayerNorm(embedding_dim, backend=self.backend)
+        self.ffn   = FeedForward(embedding_dim, ffn_dim, backend=self.backend)
 
     def _add_residual(self, X, residual):
         """Elementweise Addition (Residual Connection)."""
+        if self.backend == 'numpy':
+            return X + residual
+        if _is_batch(X):
+            return [self._add_residual(x, r) for x, r in zip(X, residual)]
         return [
             [X[i][j] + residual[i][j] for j in range(len(X[i]))]
             for i in range(len(X))
@@ -1188,7 +1385,8 @@ class TransformerBlock:
         Forward-Pass durch den Transformer-Block.
 
         Args:
-            X:    Eingabe (seq_len × embedding_dim)
+            X:    Eingabe (seq_len × embedding_dim) oder ein Batch
+                  (batch × seq_len × embedding_dim)
             mask: Causal-Mask (seq_len × seq_len) oder None
 
         Returns:
@@ -1207,12 +1405,63 @@ class TransformerBlock:
         ffn_out = self.ffn.forward(normed2)
         X = self._add_residual(ffn_out, X)
 
-        print(f"  Block-Output-Shape: {len(X)} × {len(X[0])}")
+        if self.backend == 'numpy':
+            print(f"  Block-Output-Shape: {' × '.join(map(str, X.shape))}")
+        elif _is_batch(X):
+            print(f"  Block-Output-Shape: {len(X)} × {len(X[0])} × {len(X[0][0])}")
+        else:
+            print(f"  Block-Output-Shape: {len(X)} × {len(X[0])}")
         return X, attn_weights
 
 
+def benchmark_transformer(seq_lens=(8, 16, 32, 64), embedding_dim=32, num_heads=4, batch_size=4):
+    """
+    Misst die Zeit eines TransformerBlock-Forward-Passes (Batch mit
+    Causal-Mask) für beide Backends bei wachsender Sequenzlänge und
+    prüft, dass beide dasselbe Ergebnis liefern (gleiche Gewichte).
+    """
+    import io
+    import random
+    import time
+    from contextlib import redirect_stdout
+
+    if np is None:
+        print("Benchmark benötigt numpy für den Vergleich.")
+        return
+
+    with redirect_stdout(io.StringIO()):
+        random.seed(0)
+        block_py = TransformerBlock(embedding_dim, num_heads, backend='python')
+        random.seed(0)
+        block_np = TransformerBlock(embedding_dim, num_heads, backend='numpy')
+
+    print(f"TransformerBlock: embedding_dim={embedding_dim}, Köpfe={num_heads}, Batch={batch_size}")
+    print(f"{'seq_len':>8}{'python':>12}{'numpy':>12}{'Faktor':>10}{'max. Abw.':>12}")
+    for seq_len in seq_lens:
+        X = [[[random.gauss(0, 1) for _ in range(embedding_dim)] for _ in range(seq_len)]
+             for _ in range(batch_size)]
+        mask = [[1 if j <= i else 0 for j in range(seq_len)] for i in range(seq_len)]
+
+        timings = []
+        for block in (block_py, block_np):
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                output, _ = block.forward(X, mask)
+                timings.append((time.perf_counter() - start, output))
+        (t_py, out_py), (t_np, out_np) = timings
+        error = float(np.abs(np.array(out_py) - out_np).max())
+        print(f"{seq_len:>8}{t_py * 1000:>10.1f}ms{t_np * 1000:>10.2f}ms"
+              f"{t_py / t_np:>9.0f}x{error:>12.1e}")
+
+
 # Beispielverwendung
 if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        benchmark_transformer()
+        sys.exit(0)
+
     tokenizer = SubwordTokenizer()
 
     # Trainiere auf Beispieltexten
@@ -1314,6 +1563,9 @@ if __name__ == "__main__":
     print("\nODER für Batch-Training:")
     print("  texts = tokenizer.load_training_texts_from_file('meine_datei.txt')")
     print("  batches = tokenizer.prepare_batch(texts, context_window=4, batch_size=8)")
+    print("\nODER für große Dateien (Streaming, NumPy-Batches, Tokenisierung im Worker-Prozess):")
+    print("  for contexts, targets in tokenizer.stream_batches('meine_datei.txt', batch_size=64, workers=1):")
+    print("      ...")
 
     print("\n" + "="*60)
     print("="*60)
@@ -1438,8 +1690,8 @@ if __name__ == "__main__":
     transformer = TransformerBlock(embedding_dim=embedding_dim_tf, num_heads=num_heads_tf)
     block_output, block_attn = transformer.forward(demo_vecs, mask=causal_mask)
 
-    print(f"\nEingabe-Vektoren  (Position 0): {[round(v,4) for v in demo_vecs[0]]}")
-    print(f"Ausgabe-Vektoren  (Position 0): {[round(v,4) for v in block_output[0]]}")
+    print(f"\nEingabe-Vektoren  (Position 0): {[round(float(v), 4) for v in demo_vecs[0]]}")
+    print(f"Ausgabe-Vektoren  (Position 0): {[round(float(v), 4) for v in block_output[0]]}")
 
     # ------------------------------------------------------------------ #
     # 3. Komplette Pipeline: Text → Transformer-Output                    #
@@ -1460,3 +1712,5 @@ if __name__ == "__main__":
 
     print(f"\nShape: {len(p_out)} Tokens × {len(p_out[0])} Dimensionen")
     print("→ Bereit für Output-Projektion auf Vokabular + Softmax!")
+    print(f"\nBackend der Transformer-Klassen: {DEFAULT_BACKEND} (umschalten: set_backend('python'))")
+    print("Zeitvergleich beider Backends: python3 TokenizerExampleA.py --benchmark")
@@ -0,0 +1,337 @@
+"""
+bpe.py - Gemeinsamer BPE-Trainer und -Encoder für die SubwordTokenizer in
+TokenizerExampleA.py, SimpleLLM.py und SimpleLLM_numpy.py
+
+Der ursprüngliche Trainer zählt bei jedem Merge alle Paare im ganzen
+Vokabular neu und schreibt jedes Wort per String-Ersetzung um:
+Laufzeit O(Merges × Korpus). Dieser Trainer hält stattdessen
+
+  - pair_counts:  Paar -> Häufigkeit
+  - pair_words:   Paar -> Menge der Wörter, die das Paar enthalten
+  - einen Heap (Priority Queue) der Paare nach Häufigkeit
+
+und aktualisiert nach jedem Merge nur die betroffenen Wörter.
+
+Regeln wie im alten Trainer:
+  - ein Paar zählt pro Wort einmal (wie die Paar-Menge im alten _get_pairs)
+  - der Merge wirkt wie 'a b c'.replace('A B', 'AB') auf dem Wort-String,
+    also auch an Grenzen, an denen das linke Token auf A endet und das
+    rechte mit B beginnt
+
+Bei Gleichstand hing der alte Trainer von der Iterationsreihenfolge einer
+Paar-Menge ab, also von PYTHONHASHSEED. Dieser Trainer ist deterministisch
+und legt die Reihenfolge fest: es gewinnt das Paar, das zuerst vorkommt
+(Wort-Reihenfolge, dann Position im Wort). Ohne Gleichstände ist die
+Merge-Liste identisch zum alten Trainer.
+
+BPEEncoder ersetzt beim Kodieren die Schleife über alle Merges pro Wort
+(_apply_bpe, O(Merges × Wortlänge)) durch Merges nach Rang auf einer
+verketteten Liste der Symbole und merkt sich fertige Wörter in einem
+begrenzten LRU-Cache. Ergebnis identisch zu _apply_bpe.
+
+Benchmark (Training + Kodier-Durchsatz auf einer Textdatei):
+  python3 bpe.py text.txt [merges]
+
+Nur Python-Standardbibliothek.
+"""
+
+import heapq
+from bisect import bisect_right
+from collections import OrderedDict
+
+
+def _word_pairs(symbols):
+    """Paare eines Wortes in Reihenfolge ihres ersten Auftretens (ohne Duplikate)"""
+    return dict.fromkeys(zip(symbols, symbols[1:]))
+
+
+def _merge_word(symbols, pair):
+    """Merge wie im alten Trainer: String-Ersetzung auf 'a b c'"""
+    return ' '.join(symbols).replace(' '.join(pair), ''.join(pair)).split(' ')
+
+
+def train_merges(word_freqs, num_merges, get_word_characters):
+    """
+    Lernt BPE-Merges (Generator).
+
+    Args:
+        word_freqs: Dictionary Wort -> Häufigkeit (Reihenfolge = Korpus-Reihenfolge)
+        num_merges: Maximale Anzahl Merges
+        get_word_characters: Funktion Wort -> Liste der Start-Symbole
+                             (z.B. SubwordTokenizer._get_word_characters)
+
+    Yields:
+        (best_pair, count) für jeden Merge, in Reihenfolge
+    """
+    words = [get_word_characters(word) for word in word_freqs]
+    freqs = list(word_freqs.values())
+
+    pair_counts = {}
+    pair_words = {}
+    # (letztes Zeichen links, erstes Zeichen rechts) -> Paare; findet auch
+    # Grenzen, an denen der String-Merge über Token-Grenzen hinweg greift
+    pairs_by_edge = {}
+
+    def add_pair(pair, index):
+        if pair not in pair_words:
+            pair_words[pair] = set()
+            pair_counts[pair] = 0
+            pairs_by_edge.setdefault((pair[0][-1], pair[1][0]), set()).add(pair)
+        pair_words[pair].add(index)
+        pair_counts[pair] += freqs[index]
+
+    def remove_pair(pair, index):
+        pair_words[pair].discard(index)
+        pair_counts[pair] -= freqs[index]
+        if not pair_words[pair]:
+            del pair_words[pair]
+            del pair_counts[pair]
+            pairs_by_edge[(pair[0][-1], pair[1][0])].discard(pair)
+
+    for index, symbols in enumerate(words):
+        for pair in _word_pairs(symbols):
+            add_pair(pair, index)
+
+    heap = [(-count, pair) for pair, count in pair_counts.items()]
+    heapq.heapify(heap)
+
+    def first_occurrence(pair):
+        """Sortierschlüssel bei Gleichstand: (erstes Wort, Position darin)"""
+        index = min(pair_words[pair])
+        symbols = words[index]
+        for position in range(len(symbols) - 1):
+            if (symbols[position], symbols[position + 1]) == pair:
+                return index, position
+
+    for _ in range(num_merges):
+        # Veraltete Heap-Einträge überspringen, dann alle Paare mit der
+        # höchsten Häufigkeit einsammeln und per Reihenfolge entscheiden
+        candidates = set()
+        best_count = None
+        while heap:
+            neg_count, pair = heap[0]
+            if pair_counts.get(pair) != -neg_count:
+                heapq.heappop(heap)
+                continue
+            if best_count is not None and -neg_count != best_count:
+                break
+            best_count = -neg_count
+            candidates.add(heapq.heappop(heap)[1])
+
+        if not candidates:
+            return
+
+        best_pair = min(candidates, key=first_occurrence)
+        for pair in candidates - {best_pair}:
+            heapq.heappush(heap, (-best_count, pair))
+
+        yield best_pair, best_count
+
+        # Betroffene Wörter: alle mit einer Grenze links...A | B...rechts
+        left, right = best_pair
+        affected = set()
+        for pair in list(pairs_by_edge.get((left[-1], right[0]), ())):
+            if pair[0].endswith(left) and pair[1].startswith(right):
+                affected |= pair_words[pair]
+
+        changed = set()
+        for index in affected:
+            old_pairs = _word_pairs(words[index])
+            words[index] = _merge_word(words[index], best_pair)
+            new_pairs = _word_pairs(words[index])
+
+            for pair in old_pairs:
+                if pair not in new_pairs:
+                    remove_pair(pair, index)
+                    changed.add(pair)
+            for pair in new_pairs:
+                if pair not in old_pairs:
+                    add_pair(pair, index)
+                    changed.add(pair)
+
+        for pair in changed:
+            if pair in pair_counts:
+                heapq.heappush(heap, (-pair_counts[pair], pair))
+
+
+class BPEEncoder:
+    """
+    Schneller, stiller Encoder für einen SubwordTokenizer.
+
+    Liest merges, vocab, _split_into_words und _get_word_characters direkt
+    vom Tokenizer; ändern sich Merges oder Vokabular (Nachtraining), werden
+    Ränge und Cache beim nächsten Aufruf neu aufgebaut.
+    """
+
+    def __init__(self, tokenizer, cache_size=10000):
+        self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self.cache = OrderedDict()          # Wort -> Tuple von Token-IDs
+        self.ranks = {}                     # Paar -> sortierte Ränge
+        self.state = None                   # (Anzahl Merges, Vokabulargröße)
+
+    def _refresh(self):
+        state = (len(self.tokenizer.merges), len(self.tokenizer.vocab))
+        if state == self.state:
+            return
+        # Ein Paar kann mehrfach in der Merge-Liste stehen -> alle Ränge merken
+        self.ranks = {}
+        for rank, pair in enumerate(self.tokenizer.merges):
+            self.ranks.setdefault(tuple(pair), []).append(rank)
+        self.cache.clear()
+        self.state = state
+
+    def _next_rank(self, left, right, after):
+        """Kleinster Rang des Paars größer als after, sonst None"""
+        ranks = self.ranks.get((left, right))
+        if ranks is None:
+            return None
+        i = bisect_right(ranks, after)
+        return ranks[i] if i < len(ranks) else None
+
+    def apply_bpe(self, word):
+        """
+        Wie _apply_bpe(), aber nach Rang statt über alle Merges:
+        Symbole als verkettete Liste, ein Heap mit (Rang, Position) der
+        benachbarten Paare. Ränge werden aufsteigend abgearbeitet; wie bei
+        der sequentiellen Schleife zählt nach einem Merge mit Rang r nur
+        noch ein Rang > r.
+        """
+        self._refresh()
+        symbols = self.tokenizer._get_word_characters(word)
+        n = len(symbols)
+        if n < 2:
+            return symbols
+
+        prev = list(range(-1, n - 1))
+        next_ = list(range(1, n + 1))
+        next_[-1] = -1
+
+        heap = []
+        for i in range(n - 1):
+            rank = self._next_rank(symbols[i], symbols[i + 1], -1)
+            if rank is not None:
+                heap.append((rank, i, symbols[i], symbols[i + 1]))
+        heapq.heapify(heap)
+
+        while heap:
+            rank, i, left, right = heapq.heappop(heap)
+            j = next_[i]
+            # Veraltet: Knoten gelöscht oder Nachbar inzwischen anders
+            if symbols[i] != left or j == -1 or symbols[j] != right:
+                continue
+
+            # Merge i + j, j aus der Liste nehmen
+            symbols[i] = left + right
+            symbols[j] = None
+            next_[i] = next_[j]
+            if next_[j] != -1:
+                prev[next_[j]] = i
+
+            # Neue Nachbarpaare mit dem nächsten Rang > rank
+            p = prev[i]
+            if p != -1:
+                new_rank = self._next_rank(symbols[p], symbols[i], rank)
+                if new_rank is not None:
+                    heapq.heappush(heap, (new_rank, p, symbols[p], symbols[i]))
+            q = next_[i]
+            if q != -1:
+                new_rank = self._next_rank(symbols[i], symbols[q], rank)
+                if new_rank is not None:
+                    heapq.heappush(heap, (new_rank, i, symbols[i], symbols[q]))
+
+        return [symbol for symbol in symbols if symbol is not None]
+
+    def encode_word(self, word):
+        """Token-IDs eines Wortes, aus dem LRU-Cache wenn möglich"""
+        self._refresh()
+        ids = self.cache.get(word)
+        if ids is not None:
+            self.cache.move_to_end(word)
+            return ids
+
+        vocab = self.tokenizer.vocab
+        unk_id = vocab["<UNK>"]
+        ids = tuple(vocab.get(token, unk_id) for token in self.apply_bpe(word))
+
+        self.cache[word] = ids
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return ids
+
+    def encode(self, text):
+        """Text -> Liste von Token-IDs (wie tokenize(), ohne Ausgaben)"""
+        token_ids = []
+        for word in self.tokenizer._split_into_words(text):
+            token_ids.extend(self.encode_word(word))
+        return token_ids
+
+    def encode_texts(self, texts):
+        """Liste von Texten -> Liste von Token-ID-Listen"""
+        return [self.encode(text) for text in texts]
+
+    def encode_file(self, filepath, encoding='utf-8'):
+        """Kodiert eine Datei zeilenweise (leere Zeilen übersprungen)"""
+        with open(filepath, 'r', encoding=encoding) as file:
+            return [self.encode(line) for line in file if line.strip()]
+
+
+def benchmark(tokenizer, texts):
+    """
+    Vergleicht den Durchsatz (Tokens/s) von _apply_bpe pro Wort mit
+    BPEEncoder (kalter und warmer Cache) und prüft, dass beide dieselben
+    Token-IDs liefern.
+    """
+    import time
+
+    vocab = tokenizer.vocab
+    unk_id = vocab["<UNK>"]
+
+    start = time.perf_counter()
+    reference = []
+    for text in texts:
+        ids = []
+        for word in tokenizer._split_into_words(text):
+            ids.extend(vocab.get(token, unk_id) for token in tokenizer._apply_bpe(word))
+        reference.append(ids)
+    old = time.perf_counter() - start
+
+    encoder = BPEEncoder(tokenizer)
+    start = time.perf_counter()
+    cold = encoder.encode_texts(texts)
+    cold_time = time.perf_counter() - start
+    start = time.perf_counter()
+    warm = encoder.encode_texts(texts)
+    warm_time = time.perf_counter() - start
+
+    num_tokens = sum(len(ids) for ids in reference)
+    print(f"Tokens: {num_tokens:,}, Merges: {len(tokenizer.merges)}, "
+          f"identisch: {reference == cold == warm}")
+    print(f"  _apply_bpe:           {num_tokens / old:>12,.0f} Tokens/s")
+    print(f"  BPEEncoder (kalt):    {num_tokens / cold_time:>12,.0f} Tokens/s")
+    print(f"  BPEEncoder (Cache):   {num_tokens / warm_time:>12,.0f} Tokens/s")
+
+
+if __name__ == "__main__":
+    import io
+    import sys
+    import time
+    from contextlib import redirect_stdout
+
+    if len(sys.argv) < 2:
+        print("Aufruf: python3 bpe.py text.txt [merges]")
+        sys.exit(1)
+
+    from TokenizerExampleA import SubwordTokenizer
+
+    with open(sys.argv[1], encoding='utf-8') as f:
+        texts = [line.strip() for line in f if line.strip()]
+    num_merges = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with redirect_stdout(io.StringIO()):
+        tokenizer = SubwordTokenizer()
+        start = time.perf_counter()
+        tokenizer.train_bpe(texts, num_merges)
+        elapsed = time.perf_counter() - start
+    print(f"BPE-Training: {len(tokenizer.merges)} Merges in {elapsed:.2f} s")
+    benchmark(tokenizer, texts)
@@ -2723,6 +2723,10 @@ class Memory:
                  vic=None, sid=None, color_ram=None, cia1=None, cia2=None):
         self.ram = bytearray(self.SIZE)
         self.rom = bytearray(self.SIZE)
+        # One flag per 64-byte RAM block (= one sprite shape), set on every
+        # RAM write. The renderer keeps decoded sprite shapes across frames
+        # and re-decodes a block only after its flag went up.
+        self.sprite_dirty = bytearray(b"\x01" * (self.SIZE >> 6))
         self.pla = Pla()
         self.cart = None                   # gestecktes Modul (siehe attach_cart)
         self.cpu = None                    # von System gesetzt; Epyx braucht Zyklen
@@ -2796,6 +2800,7 @@ class Memory:
     def write_ram_direct(self, addr, val):
         if 0 <= addr < self.SIZE:
             self.ram[addr] = val & 0xFF
+            self.sprite_dirty[addr >> 6] = 1
 
     def read_rom_direct(self, addr):
         if 0 <= addr < self.SIZE:
@@ -2809,6 +2814,9 @@ class Memory:
     def load_ram(self, start, data):
         end = min(start + len(data), self.SIZE)
         self.ram[start:end] = data[: end - start]
+        if start < end:
+            lo, hi = start >> 6, ((end - 1) >> 6) + 1
+            self.sprite_dirty[lo:hi] = b"\x01" * (hi - lo)
 
     # --- VIC view of memory (bank-switched) ---
 
@@ -5397,7 +5405,8 @@ class System:
         if self.cycle_accurate:
             self.vic._bl_defer = True
             for _ in range(n_cycles):
-                self.clock()
+                if not self.clock():
+                    return False
             return True
         target = self.cpu.cycles + n_cycles
         while self.cpu.cycles < target:
@@ -6321,6 +6330,199 @@ class System:
         self._sid_play_addr = 0
 
 
+# =============================================================================
+# Debugger — PC/raster breakpoints and memory watchpoints
+# =============================================================================
+
+class Debugger:
+    """
+    Breakpoints and watchpoints for a System that cost nothing while unset.
+
+    Nothing in the emulator core checks for them. Arming a condition swaps a
+    specialised handler onto the live instance — the same trick the F10
+    flicker diagnosis uses for vic.write — and disarming the last one deletes
+    it again, so the class method answers directly:
+
+    * PC and raster breakpoints replace System.step / System.clock with a
+      wrapper that checks the PC before and the raster line after each
+      instruction (cycle mode: each PHI2 tick).
+    * Watchpoints replace Memory.read_system_byte / write_system_byte with a
+      256-entry page table. Only watched pages get a checking handler; every
+      other page goes straight to the original method.
+
+    A hit is appended to `hits` and stops System.run() (it returns False) at
+    the next instruction boundary. Calling run() again continues; a PC
+    breakpoint that just fired is stepped over once.
+
+        dbg = Debugger(system)
+        dbg.break_at(0x0810)
+        dbg.watch(0xD020, read=False, write=True)
+        dbg.break_raster(100)
+        while not system.run(1_000_000):
+            print(dbg.hits[-1])
+    """
+
+    def __init__(self, system):
+        self.system = system
+        self.breakpoints = set()        # PC addresses
+        self.raster_breaks = set()      # raster lines (0..311)
+        self.read_watch = set()         # addresses
+        self.write_watch = set()        # addresses
+        self.hits = []                  # dicts: kind/addr/value/pc/raster/cycle
+        self.on_hit = None              # optional callable(hit)
+        self._halted = False
+        self._skip_pc = None
+
+    # ---- arming ----
+
+    def break_at(self, addr):
+        self.breakpoints.add(addr & 0xFFFF)
+        self._rearm()
+
+    def clear_break(self, addr):
+        self.breakpoints.discard(addr & 0xFFFF)
+        self._rearm()
+
+    def break_raster(self, line):
+        self.raster_breaks.add(line % Vic.LINES_PER_FRAME)
+        self._rearm()
+
+    def clear_raster(self, line):
+        self.raster_breaks.discard(line % Vic.LINES_PER_FRAME)
+        self._rearm()
+
+    def watch(self, addr, length=1, read=True, write=True):
+        for a in range(addr, addr + length):
+            if read:  self.read_watch.add(a & 0xFFFF)
+            if write: self.write_watch.add(a & 0xFFFF)
+        self._rearm()
+
+    def unwatch(self, addr, length=1):
+        for a in range(addr, addr + length):
+            self.read_watch.discard(a & 0xFFFF)
+            self.write_watch.discard(a & 0xFFFF)
+        self._rearm()
+
+    def clear_all(self):
+        self.breakpoints.clear()
+        self.raster_breaks.clear()
+        self.read_watch.clear()
+        self.write_watch.clear()
+        self._rearm()
+
+    @property
+    def armed(self):
+        return bool(self.breakpoints or self.raster_breaks
+                    or self.read_watch or self.write_watch)
+
+    # ---- hits ----
+
+    def _hit(self, kind, addr, value=None):
+        s = self.system
+        hit = {"kind": kind, "addr": addr, "value": value, "pc": s.cpu.pc,
+               "raster": s.vic.raster, "cycle": s.cpu.cycles}
+        self.hits.append(hit)
+        self._halted = True
+        if self.on_hit is not None:
+            self.on_hit(hit)
+
+    # ---- handler installation ----
+
+    def _rearm(self):
+        """(Re)install exactly the handlers the armed conditions need and
+        remove all others."""
+        s = self.system
+        for obj, names in ((s, ("step", "clock")),
+                           (s.mem, ("read_system_byte", "write_system_byte"))):
+            for name in names:
+                obj.__dict__.pop(name, None)
+        if self.read_watch:
+            s.mem.read_system_byte = self._paged(
+                s.mem.read_system_byte, self.read_watch, self._read_page)
+        if self.write_watch:
+            s.mem.write_system_byte = self._paged(
+                s.mem.write_system_byte, self.write_watch, self._write_page)
+        if self.armed:
+            s.step = self._make_step(s.step)
+            s.clock = self._make_clock(s.clock)
+
+    @staticmethod
+    def _paged(orig, addrs, make_handler):
+        table = [orig] * 256
+        for page in {a >> 8 for a in addrs}:
+            table[page] = make_handler(orig, addrs)
+        def dispatch(addr, *args):
+            return table[(addr >> 8) & 0xFF](addr, *args)
+        return dispatch
+
+    def _read_page(self, orig, addrs):
+        def read(addr):
+            v = orig(addr)
+            if (addr & 0xFFFF) in addrs:
+                self._hit("read", addr & 0xFFFF, v)
+            return v
+        return read
+
+    def _write_page(self, orig, addrs):
+        def write(addr, val, phase=0):
+            orig(addr, val, phase)
+            if (addr & 0xFFFF) in addrs:
+                self._hit("write", addr & 0xFFFF, val & 0xFF)
+        return write
+
+    def _check_pc(self, pc):
+        """Called only for a PC that carries a breakpoint. Returns True when
+        execution must stop in front of it."""
+        if pc != self._skip_pc:
+            self._skip_pc = pc
+            self._hit("pc", pc)
+            self._halted = False
+            return True
+        self._skip_pc = None             # resuming: execute it this time
+        return False
+
+    def _make_step(self, orig):
+        vic = self.system.vic
+        cpu = self.system.cpu
+        def step():
+            if (not vic.ba_debt and cpu.pc in self.breakpoints
+                    and self._check_pc(cpu.pc)):
+                return False
+            line = vic.raster
+            ok = orig()
+            if vic.raster != line and vic.raster in self.raster_breaks:
+                self._hit("raster", vic.raster)
+            if self._halted:
+                self._halted = False
+                return False
+            return ok
+        return step
+
+    def _make_clock(self, orig):
+        vic = self.system.vic
+        cpu = self.system.cpu
+        def clock():
+            if (cpu._micro is None and cpu.pc in self.breakpoints
+                    and self._check_pc(cpu.pc)):
+                return False
+            line = vic.raster
+            orig()
+            if vic.raster != line and vic.raster in self.raster_breaks:
+                self._hit("raster", vic.raster)
+            if self._halted:
+                # stop on an instruction boundary, like the batch core
+                while cpu._micro is not None:
+                    orig()
+                self._halted = False
+                return False
+            return True
+        return clock
+
+    def detach(self):
+        """Disarm everything and restore the plain class methods."""
+        self.clear_all()
+
+
 # =============================================================================
 # Pygame frontend — text-mode rendering and keyboard input
 # =============================================================================
@@ -6476,7 +6678,7 @@ def _snap_components(system):
         ("sys",  system,            {"chargen_rom", "_rom_dir", "rom_source",
                                      "cycle_accurate", "_last_image"}),
         ("cpu",  system.cpu,        {"trace"}),
-        ("mem",  system.mem,        {"rom"}),
+        ("mem",  system.mem,        {"rom", "sprite_dirty"}),
         ("pla",  system.mem.pla,    set()),
         ("vic",  system.vic,        {"mem", "color_ram"}),
         ("sid",  system.sid,        set()),
@@ -6650,6 +6852,8 @@ def load_state(system, path, verbose=True):
     # auf einer Instruktionsgrenze, also fangen wir sauber neu an.
     system.cpu._micro = None
     system.cpu._pending = None
+    # RAM wurde am Schreibpfad vorbei ersetzt: alle Sprite-Formen neu dekodieren.
+    system.mem.sprite_dirty[:] = b"\x01" * len(system.mem.sprite_dirty)
     if system.drive is not None:
         system.drive.cpu._micro = None
         system.drive.cpu._pending = None
@@ -6844,6 +7048,13 @@ class PygameFrontend:
         import numpy as np
         self.np = np
         self.system = system
+        # Decoded sprite shapes, kept across frames: RAM block index ->
+        # {multicolour: (21, 24) grid}. Dropped per block when
+        # Memory.sprite_dirty says the block was written (_sprite_shape).
+        self._sprite_shapes = {}
+        # Zero-copy NumPy views onto the VIC's per-line buffers, rebuilt only
+        # when the VIC allocates new ones (see _vic_line_views).
+        self._line_views = None
         self.scale = scale
         self.target_hz = target_hz
         self.headless = headless
@@ -7364,25 +7575,18 @@ class PygameFrontend:
         # screen RAM mid-frame renders cleanly instead of tearing. The snapshot
         # already used each row's active $D018 base, so raster splits that change
         # the screen/font base mid-frame (The Hobbit, Elite) still come out right.
-        nld = vic.LINES_PER_FRAME
-        screen_ram = np.frombuffer(bytes(vic.line_screen),
-                                   dtype=np.uint8).reshape(25, 40)
-        color_ram = np.frombuffer(bytes(vic.line_color),
-                                  dtype=np.uint8).reshape(25, 40) & 0x0F
+        lv = self._vic_line_views()
+        screen_ram = lv["screen"]
+        color_ram = lv["color"] & 0x0F
 
         # Background colours ($D021/$D022/$D023) active at each character row's
         # raster line, so raster splits that recolour the backdrop mid-frame
         # (e.g. Exploding Fist's sky/ground bands) render each band correctly
         # rather than using one latched value.
-        ld21, ld22, ld23 = vic.line_d021, vic.line_d022, vic.line_d023
-        d021_row = np.empty(25, dtype=np.uint8)
-        d022_row = np.empty(25, dtype=np.uint8)
-        d023_row = np.empty(25, dtype=np.uint8)
-        for r in range(25):
-            raster = (self.FIRST_DISPLAY_LINE + r * 8 + 4) % nld
-            d021_row[r] = ld21[raster] & 0x0F
-            d022_row[r] = ld22[raster] & 0x0F
-            d023_row[r] = ld23[raster] & 0x0F
+        row_rasters = lv["row_rasters"]
+        d021_row = lv["d021"][row_rasters] & 0x0F
+        d022_row = lv["d022"][row_rasters] & 0x0F
+        d023_row = lv["d023"][row_rasters] & 0x0F
 
         # Char bitmap pulled fresh from VIC memory each frame, so games with
         # custom character sets (e.g. games that build their own fonts in RAM)
@@ -7407,9 +7611,8 @@ class PygameFrontend:
         # Per-row VIC bank as recorded when the row was fetched. A game that
         # flips $DD00 mid-frame (picture band in one bank, text window in
         # another) must have each band read out of its own bank.
-        _rbank = mem.vic_bank()
-        banks = [(_rbank if vic.row_mode_bank[r] == 0xFF else vic.row_mode_bank[r])
-                 for r in range(25)]
+        rmb = lv["row_bank"]
+        banks = np.where(rmb == 0xFF, mem.vic_bank(), rmb).tolist()
         pixels = np.empty((200, 320, 3), dtype=np.uint8)
         bitmap = np.empty((200, 320), dtype=np.uint8)
         r = 0
@@ -7446,19 +7649,11 @@ class PygameFrontend:
         # whole area is idle. Idle lines display the byte at $3FFF ($39FF in
         # ECM) with black foreground over the line's $D021 — those set bits
         # are real foreground for sprite priority and $D01F collision.
-        lt = vic.line_text_row
-        lrc = vic.line_rc
-        lid = vic.line_idle
-        src = np.empty(200, dtype=np.intp)
-        idle_lines = []
-        for sy in range(200):
-            rr = sy + 51
-            if lid[rr]:
-                idle_lines.append(sy)
-                src[sy] = 0
-            else:
-                src[sy] = lt[rr] * 8 + lrc[rr]
-        if idle_lines or not np.array_equal(src, np.arange(200)):
+        idle = lv["idle"][51:251] != 0
+        src = np.where(idle, 0, lv["text_row"][51:251].astype(np.intp) * 8
+                       + lv["rc"][51:251])
+        idle_lines = np.flatnonzero(idle).tolist()
+        if idle_lines or not np.array_equal(src, self._identity_rows):
             pixels = pixels[src].copy()
             bitmap = bitmap[src].copy()
             for sy in idle_lines:
@@ -7525,56 +7720,11 @@ class PygameFrontend:
         # Y-expansion doubling), so ordinary games still cost one blit per
         # sprite. Render in REVERSE order so sprite 0 lands on top of sprite 7
         # (lower sprite number = higher hardware priority).
-        lrow = vic.line_spr_row
-        lx = vic.line_spr_x
-        lp = vic.line_spr_ptr
-        lmsb = vic.line_spr_msb
-        lcol = vic.line_spr_col
-        l1c = vic.line_d01c
-        l1d = vic.line_d01d
-        l1b = vic.line_d01b
-        l25 = vic.line_d025
-        l26 = vic.line_d026
-        lbank = vic.line_spr_bank
         decode_cache = {}
         for s in range(7, -1, -1):
-            sy = 0
-            while sy < 200:
-                r = sy + 51
-                if lrow[r * 8 + s] == 0xFF:
-                    sy += 1
-                    continue
-                a0 = (lx[r * 8 + s] | (((lmsb[r] >> s) & 1) << 8),
-                      lp[r * 8 + s],
-                      lcol[r * 8 + s] & 0x0F,
-                      (l1c[r] >> s) & 1,
-                      (l1d[r] >> s) & 1,
-                      (l1b[r] >> s) & 1,
-                      l25[r] & 0x0F,
-                      l26[r] & 0x0F,
-                      lbank[r])
-                rows = [lrow[r * 8 + s]]
-                end = sy + 1
-                while end < 200:
-                    rr = end + 51
-                    if lrow[rr * 8 + s] == 0xFF:
-                        break
-                    an = (lx[rr * 8 + s] | (((lmsb[rr] >> s) & 1) << 8),
-                          lp[rr * 8 + s],
-                          lcol[rr * 8 + s] & 0x0F,
-                          (l1c[rr] >> s) & 1,
-                          (l1d[rr] >> s) & 1,
-                          (l1b[rr] >> s) & 1,
-                          l25[rr] & 0x0F,
-                          l26[rr] & 0x0F,
-                          lbank[rr])
-                    if an != a0:
-                        break
-                    rows.append(lrow[rr * 8 + s])
-                    end += 1
+            for sy, rows, a0 in self._sprite_runs(s, 51, 251):
                 self._render_sprite_run(s, pixels, bitmap, sprite_occupancy,
                                         sy, rows, a0, decode_cache)
-                sy = end
         # Sprite-sprite collision ($D01E) is maintained by the VIC during
         # emulation (Vic._collide_at_raster) from the same per-line records,
         # so the latch is correct whenever the game polls it rather than only
@@ -7587,10 +7737,9 @@ class PygameFrontend:
         # how blanked loading screens actually look; RSEL=0 covers 4 lines at
         # top and bottom. In the normal 25-row case no line inside the window
         # is bordered, so this costs nothing.
-        for sy in range(200):
-            rr = sy + 51
-            if vic.line_vborder[rr]:
-                pixels[sy] = self._palette[vic.line_d020[rr] & 0x0F]
+        vb = lv["vborder"][51:251] != 0
+        if vb.any():
+            pixels[vb] = self._palette[lv["d020"][51:251][vb] & 0x0F][:, None, :]
 
         # --- 38-column side border (CSEL, $D016 bit 3) ---
         # With CSEL=0 the display window narrows to X 31..334: 7 pixels on the
@@ -7598,15 +7747,101 @@ class PygameFrontend:
         # hide the pixels that XSCROLL shifts in, so this belongs with the fine
         # scroll above. The border covers graphics AND sprites, hence it runs
         # after the sprite pass.
-        for sy in range(200):
-            rr = sy + 51
-            if not (vic.line_d016[rr] & 0x08) and not vic.line_vborder[rr]:
-                bcol = self._palette[vic.line_d020[rr] & 0x0F]
-                pixels[sy, :7] = bcol
-                pixels[sy, 311:] = bcol
+        narrow = ((lv["d016"][51:251] & 0x08) == 0) & ~vb
+        if narrow.any():
+            bcol = self._palette[lv["d020"][51:251][narrow] & 0x0F][:, None, :]
+            pixels[narrow, :7] = bcol
+            pixels[narrow, 311:] = bcol
 
         return pixels, border
 
+    def _vic_line_views(self):
+        """NumPy views onto the VIC's per-line and per-row bytearrays. The VIC
+        keeps writing into its bytearrays (cheapest for the per-raster Python
+        code, and the core runs without NumPy); np.frombuffer shares their
+        memory, so the composer reads this frame's records without a copy.
+        Rebuilt only after Vic.__init__ (reset) allocated new buffers."""
+        vic = self.system.vic
+        lv = self._line_views
+        if lv is not None and lv["_src"] is vic.line_screen:
+            return lv
+        np = self.np
+        def view(buf, *shape):
+            a = np.frombuffer(buf, dtype=np.uint8)
+            return a.reshape(shape) if shape else a
+        nld = vic.LINES_PER_FRAME
+        lv = self._line_views = {
+            "_src":     vic.line_screen,
+            "screen":   view(vic.line_screen, 25, 40),
+            "color":    view(vic.line_color, 25, 40),
+            "row_bank": view(vic.row_mode_bank),
+            "d011":     view(vic.line_d011),
+            "d016":     view(vic.line_d016),
+            "d020":     view(vic.line_d020),
+            "d021":     view(vic.line_d021),
+            "d022":     view(vic.line_d022),
+            "d023":     view(vic.line_d023),
+            "d01b":     view(vic.line_d01b),
+            "d01c":     view(vic.line_d01c),
+            "d01d":     view(vic.line_d01d),
+            "d025":     view(vic.line_d025),
+            "d026":     view(vic.line_d026),
+            "idle":     view(vic.line_idle),
+            "text_row": view(vic.line_text_row),
+            "rc":       view(vic.line_rc),
+            "vborder":  view(vic.line_vborder),
+            "spr_row":  view(vic.line_spr_row, nld, 8),
+            "spr_x":    view(vic.line_spr_x, nld, 8),
+            "spr_ptr":  view(vic.line_spr_ptr, nld, 8),
+            "spr_col":  view(vic.line_spr_col, nld, 8),
+            "spr_msb":  view(vic.line_spr_msb),
+            "spr_bank": view(vic.line_spr_bank),
+            # raster line sampled for each character row's colours
+            "row_rasters": (self.FIRST_DISPLAY_LINE
+                            + np.arange(25) * 8 + 4) % nld,
+        }
+        self._identity_rows = np.arange(200)
+        return lv
+
+    def _sprite_runs(self, s, r0, r1, allowed=None):
+        """Split rasters r0..r1-1 into runs on which sprite `s` displays with
+        one attribute set. Returns [(first line - r0, [sprite row per line],
+        attrs)], attrs as _render_sprite_run expects them. `allowed` (bool per
+        line) further restricts the lines, e.g. to an opened border."""
+        np = self.np
+        lv = self._vic_line_views()
+        rows = lv["spr_row"][r0:r1, s]
+        on = rows != 0xFF
+        if allowed is not None:
+            on &= allowed
+        if not on.any():
+            return []
+        i32 = np.int32
+        att = np.stack((
+            lv["spr_x"][r0:r1, s].astype(i32)
+            | (((lv["spr_msb"][r0:r1] >> s) & 1).astype(i32) << 8),
+            lv["spr_ptr"][r0:r1, s],
+            lv["spr_col"][r0:r1, s] & 0x0F,
+            (lv["d01c"][r0:r1] >> s) & 1,
+            (lv["d01d"][r0:r1] >> s) & 1,
+            (lv["d01b"][r0:r1] >> s) & 1,
+            lv["d025"][r0:r1] & 0x0F,
+            lv["d026"][r0:r1] & 0x0F,
+            lv["spr_bank"][r0:r1]), axis=1).astype(i32)
+        # a run starts on a displayed line whose predecessor is not displayed
+        # or carries different attributes, and ends before the next start or
+        # the next undisplayed line
+        change = np.ones(len(on), bool)
+        change[1:] = (att[1:] != att[:-1]).any(axis=1) | ~on[:-1]
+        starts = np.flatnonzero(on & change)
+        stops = np.flatnonzero(~on | change)
+        ends = np.append(stops, len(on))[
+            np.searchsorted(stops, starts, side="right")]
+        rows = rows.tolist()
+        att = att.tolist()
+        return [(a, rows[a:b], tuple(att[a]))
+                for a, b in zip(starts.tolist(), ends.tolist())]
+
     def _d021_row_colors(self, r):
         """(320,3) background colour row for raster r, honouring recorded
         mid-line $D021 splits. Cycle→pixel mapping: x = (cycle-14)*8."""
@@ -7655,7 +7890,7 @@ class PygameFrontend:
         r_first = 51 - self.BORDER_Y                   # raster of canvas row 0
         canvas = np.empty((h, w, 3), np.uint8)
         # Per-line border colour for every canvas row (raster bars for free).
-        l20 = np.frombuffer(bytes(vic.line_d020), dtype=np.uint8)
+        l20 = self._vic_line_views()["d020"]
         canvas[:, :] = self._palette[
             l20[r_first:r_first + h] & 0x0F][:, None, :]
         canvas[self.BORDER_Y:self.BORDER_Y + self.SCREEN_H,
@@ -7688,49 +7923,13 @@ class PygameFrontend:
         foreground mask used for sprite priority. Consumes the same canonical
         per-line sprite records as the main pass."""
         np = self.np
-        vic = self.system.vic
-        lrow = vic.line_spr_row
-        lx = vic.line_spr_x
-        lp = vic.line_spr_ptr
-        lmsb = vic.line_spr_msb
-        lcol = vic.line_spr_col
-        l1c = vic.line_d01c
-        l1d = vic.line_d01d
-        l1b = vic.line_d01b
-        l25 = vic.line_d025
-        l26 = vic.line_d026
-        lbank = vic.line_spr_bank
         occ = np.zeros((r1 - r0, 320), np.uint8)
         cache = {}
-
-        def attrs(rr, s):
-            return (lx[rr * 8 + s] | (((lmsb[rr] >> s) & 1) << 8),
-                    lp[rr * 8 + s],
-                    lcol[rr * 8 + s] & 0x0F,
-                    (l1c[rr] >> s) & 1,
-                    (l1d[rr] >> s) & 1,
-                    (l1b[rr] >> s) & 1,
-                    l25[rr] & 0x0F,
-                    l26[rr] & 0x0F,
-                    lbank[rr])
-
+        allowed = np.zeros(r1 - r0, bool)
+        allowed[[r - r0 for r in open_set if r0 <= r < r1]] = True
         for s in range(7, -1, -1):
-            r = r0
-            while r < r1:
-                if r not in open_set or lrow[r * 8 + s] == 0xFF:
-                    r += 1
-                    continue
-                a0 = attrs(r, s)
-                rows = [lrow[r * 8 + s]]
-                end = r + 1
-                while (end < r1 and end in open_set
-                        and lrow[end * 8 + s] != 0xFF
-                        and attrs(end, s) == a0):
-                    rows.append(lrow[end * 8 + s])
-                    end += 1
-                self._render_sprite_run(s, buf, fg, occ,
-                                        r - r0, rows, a0, cache)
-                r = end
+            for sy, rows, a0 in self._sprite_runs(s, r0, r1, allowed):
+                self._render_sprite_run(s, buf, fg, occ, sy, rows, a0, cache)
 
     def render_to_array(self):
         """Compose a full 384x272x3 uint8 frame (border + display) as a numpy
@@ -7780,8 +7979,9 @@ class PygameFrontend:
         doubling and any mid-frame row effects are already encoded in this
         sequence, so the block is built by fancy-indexing the decoded sprite.
         `attrs` = (x, pointer, colour, mc, x_expand, priority, mc0, mc1) as
-        recorded for these lines. `decode_cache` memoises decoded sprite shapes
-        per (pointer, mc) within the frame.
+        recorded for these lines. Decoded shapes come from _sprite_shape();
+        `decode_cache` only memoises them within the frame while a cartridge
+        runs in Ultimax mode, whose ROMH overlay can bank-switch under us.
         Writes the sprite's bit into `sprite_occupancy` everywhere it draws.
         """
         np = self.np
@@ -7789,20 +7989,13 @@ class PygameFrontend:
         (spr_x, pointer, sprite_color, multicolor, x_expand, prio,
          mc0, mc1, bank) = attrs
 
-        grid = decode_cache.get((pointer, multicolor, bank))
-        if grid is None:
-            sd = mem.read_vic_bytes_bank(pointer * 64, 63, bank)
-            if multicolor:
-                # (21,12) 2-bit values 0..3, each MC pixel two wide -> (21,24)
-                raw = np.frombuffer(sd, dtype=np.uint8).reshape(21, 3)
-                g = np.zeros((21, 12), dtype=np.uint8)
-                for p in range(4):
-                    g[:, p::4] = (raw >> (6 - 2 * p)) & 0x03
-                grid = np.repeat(g, 2, axis=1)
-            else:
-                bits_flat = np.unpackbits(np.frombuffer(sd, dtype=np.uint8))
-                grid = bits_flat[:21 * 24].reshape(21, 24)
-            decode_cache[(pointer, multicolor, bank)] = grid
+        if mem._ultimax:
+            grid = decode_cache.get((pointer, multicolor, bank))
+            if grid is None:
+                grid = self._decode_sprite(pointer, multicolor, bank)
+                decode_cache[(pointer, multicolor, bank)] = grid
+        else:
+            grid = self._sprite_shape(pointer, multicolor, bank)
 
         block = grid[np.asarray(rows, dtype=np.intp)]        # (n, 24)
         if x_expand:
@@ -7860,6 +8053,39 @@ class PygameFrontend:
         occ_slice = sprite_occupancy[dst_y0:dst_y1, dst_x0:dst_x1]
         occ_slice |= (nonzero.astype(np.uint8) << idx)
 
+    def _decode_sprite(self, pointer, multicolor, bank):
+        """Fetch the 63 shape bytes of sprite block `pointer` in VIC `bank`
+        and decode them to a (21, 24) grid of colour indices."""
+        np = self.np
+        sd = self.system.mem.read_vic_bytes_bank(pointer * 64, 63, bank)
+        if multicolor:
+            # (21,12) 2-bit values 0..3, each MC pixel two wide -> (21,24)
+            raw = np.frombuffer(sd, dtype=np.uint8).reshape(21, 3)
+            g = np.zeros((21, 12), dtype=np.uint8)
+            for p in range(4):
+                g[:, p::4] = (raw >> (6 - 2 * p)) & 0x03
+            return np.repeat(g, 2, axis=1)
+        bits_flat = np.unpackbits(np.frombuffer(sd, dtype=np.uint8))
+        return bits_flat[:21 * 24].reshape(21, 24)
+
+    def _sprite_shape(self, pointer, multicolor, bank):
+        """Decoded sprite shape from the cross-frame cache. Games with static
+        sprite definitions decode each shape once; a write anywhere into the
+        64-byte block (Memory.sprite_dirty) drops both the hi-res and the
+        multicolour decoding of it. Blocks under the character-ROM shadow
+        never change, a stray RAM write there only costs one re-decode."""
+        mem = self.system.mem
+        block = (bank * 0x4000 + (pointer & 0xFF) * 64) >> 6
+        shapes = self._sprite_shapes.get(block)
+        if shapes is None or mem.sprite_dirty[block]:
+            shapes = self._sprite_shapes[block] = {}
+            mem.sprite_dirty[block] = 0
+        grid = shapes.get(multicolor)
+        if grid is None:
+            grid = shapes[multicolor] = self._decode_sprite(
+                pointer, multicolor, bank)
+        return grid
+
     def verify_foreground(self, verbose=False):
         """Cross-check the renderer's foreground mask against the VIC's
         per-raster foreground function (used for $D01F collision).
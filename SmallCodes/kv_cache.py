@@ -0,0 +1,77 @@
+"""
+kv_cache.py - Gemeinsamer Key/Value-Cache für SmallGPT.py und picoGPT.py
+"""
+
+import numpy as np
+
+
+class KVCache:
+    """
+    Key/Value-Cache für inkrementelles Generieren.
+
+    Ohne Cache rechnet generate() für jedes neue Token den gesamten
+    Kontext noch einmal durch. Keys und Values alter Tokens ändern sich
+    aber nie (Causal Mask!) — also werden sie pro Layer aufbewahrt, und
+    jeder Schritt projiziert nur noch das neueste Token.
+
+    Der Cache merkt sich auch die Token-IDs, aus denen er entstanden ist.
+    Im Chat kann generate() so den Verlauf der letzten Runde übernehmen
+    und rechnet nur die neue Eingabe durch.
+    """
+
+    def __init__(self, num_layers, max_seq_len):
+        self.num_layers = num_layers
+        self.max_seq_len = max_seq_len
+        self.clear()
+
+    def clear(self):
+        """Leert den Cache (z.B. bei 'reset' im Chat)"""
+        self.keys = [None] * self.num_layers    # je [batch, heads, max_seq_len, head_dim]
+        self.values = [None] * self.num_layers
+        self.token_ids = None                   # [batch, max_seq_len]
+        self.length = 0                         # Anzahl gecachter Positionen
+
+    def append(self, layer_idx, k, v):
+        """
+        Schreibt K/V der neuen Positionen hinter die gecachten und gibt
+        K/V aller Positionen zurück. Die Puffer werden einmal in voller
+        Länge angelegt, damit pro Token nichts umkopiert werden muss.
+        """
+        if self.keys[layer_idx] is None:
+            batch_size, num_heads, _, head_dim = k.shape
+            shape = (batch_size, num_heads, self.max_seq_len, head_dim)
+            self.keys[layer_idx] = np.empty(shape, dtype=k.dtype)
+            self.values[layer_idx] = np.empty(shape, dtype=v.dtype)
+
+        end = self.length + k.shape[2]
+        self.keys[layer_idx][:, :, self.length:end] = k
+        self.values[layer_idx][:, :, self.length:end] = v
+        return self.keys[layer_idx][:, :, :end], self.values[layer_idx][:, :, :end]
+
+    def advance(self, token_ids):
+        """Nach dem Forward Pass: die Tokens gelten jetzt als gecacht"""
+        if self.token_ids is None:
+            self.token_ids = np.zeros((token_ids.shape[0], self.max_seq_len), dtype=np.int64)
+        end = self.length + token_ids.shape[1]
+        self.token_ids[:, self.length:end] = token_ids
+        self.length = end
+
+    def reuse(self, token_ids):
+        """
+        Kürzt den Cache auf den gemeinsamen Anfang mit token_ids und gibt
+        dessen Länge zurück. Das letzte Token bleibt immer ungecacht, denn
+        seine Logits braucht generate() für den ersten Schritt.
+
+        Wurde das Kontextfenster vorne gekürzt, passt nichts mehr: GPT-2
+        kodiert absolute Positionen, jedes Token stünde jetzt woanders.
+        Dann wird der Cache mit einem einzigen Forward Pass neu aufgebaut.
+        """
+        if self.token_ids is not None and self.token_ids.shape[0] != token_ids.shape[0]:
+            self.clear()
+        n = min(self.length, token_ids.shape[1] - 1)
+        if self.token_ids is not None and n > 0:
+            diff = np.nonzero(self.token_ids[:, :n] != token_ids[:, :n])[1]
+            if diff.size:
+                n = int(diff.min())
+        self.length = max(n, 0)
+        return self.length
@@ -1,3 +1,6 @@
+import copy
+import re
+
 # AST Knoten-Definitionen (ohne dataclass, einfache Klassen)
 class ASTNode:
     """Basis-Klasse für alle AST-Knoten"""
@@ -913,11 +916,14 @@ def print_ast(node, indent=0):
 class CodeGenerator6510:
     """Generiert 6510 Assembler-Code aus dem AST"""
 
-    def __init__(self):
+    def __init__(self, zp_plan=None):
         self.code = []  # Liste von Assembler-Zeilen
         self.label_counter = 0
         self.zero_page_offset = 0x02  # Zero-Page Variablen ab $02
         self.var_to_zp = {}  # Variable -> Zero-Page Adresse
+        # Optional vorgegebene Adressen (Variable -> Adresse), z.B. vom
+        # Optimizer6510; Adressen >= $100 liegen außerhalb der Zero-Page
+        self.zp_plan = zp_plan
         self.temp_counter = 0
         self.array_base_addresses = {}  # Array -> Start-Adresse
         self.current_memory_offset = 0x0400  # Start bei $0400 (nach Zero-Page und Stack)
@@ -930,6 +936,8 @@ class CodeGenerator6510:
 
     def allocate_zero_page(self, var_name):
         """Allokiert Zero-Page Speicher für Variable"""
+        if self.zp_plan is not None and var_name in self.zp_plan:
+            self.var_to_zp.setdefault(var_name, self.zp_plan[var_name])
         if var_name not in self.var_to_zp:
             self.var_to_zp[var_name] = self.zero_page_offset
             self.zero_page_offset += 1
@@ -1353,6 +1361,733 @@ class CodeGenerator6510:
 
         return None
 
+# Befehlssatz des 6510 (offizielle NMOS-Opcodes):
+# Mnemonic -> {Adressierungsart: (Opcode, Zyklen)}. Zyklen ohne Page-Crossing,
+# Branches "nicht genommen".
+OPCODES_6510 = {
+    'ADC': {'imm': (0x69, 2), 'zp': (0x65, 3), 'zpx': (0x75, 4), 'abs': (0x6D, 4),
+            'abx': (0x7D, 4), 'aby': (0x79, 4), 'inx': (0x61, 6), 'iny': (0x71, 5)},
+    'AND': {'imm': (0x29, 2), 'zp': (0x25, 3), 'zpx': (0x35, 4), 'abs': (0x2D, 4),
+            'abx': (0x3D, 4), 'aby': (0x39, 4), 'inx': (0x21, 6), 'iny': (0x31, 5)},
+    'ASL': {'acc': (0x0A, 2), 'zp': (0x06, 5), 'zpx': (0x16, 6), 'abs': (0x0E, 6), 'abx': (0x1E, 7)},
+    'BCC': {'rel': (0x90, 2)}, 'BCS': {'rel': (0xB0, 2)}, 'BEQ': {'rel': (0xF0, 2)},
+    'BMI': {'rel': (0x30, 2)}, 'BNE': {'rel': (0xD0, 2)}, 'BPL': {'rel': (0x10, 2)},
+    'BVC': {'rel': (0x50, 2)}, 'BVS': {'rel': (0x70, 2)},
+    'BIT': {'zp': (0x24, 3), 'abs': (0x2C, 4)},
+    'BRK': {'imp': (0x00, 7)},
+    'CLC': {'imp': (0x18, 2)}, 'CLD': {'imp': (0xD8, 2)}, 'CLI': {'imp': (0x58, 2)},
+    'CLV': {'imp': (0xB8, 2)},
+    'CMP': {'imm': (0xC9, 2), 'zp': (0xC5, 3), 'zpx': (0xD5, 4), 'abs': (0xCD, 4),
+            'abx': (0xDD, 4), 'aby': (0xD9, 4), 'inx': (0xC1, 6), 'iny': (0xD1, 5)},
+    'CPX': {'imm': (0xE0, 2), 'zp': (0xE4, 3), 'abs': (0xEC, 4)},
+    'CPY': {'imm': (0xC0, 2), 'zp': (0xC4, 3), 'abs': (0xCC, 4)},
+    'DEC': {'zp': (0xC6, 5), 'zpx': (0xD6, 6), 'abs': (0xCE, 6), 'abx': (0xDE, 7)},
+    'DEX': {'imp': (0xCA, 2)}, 'DEY': {'imp': (0x88, 2)},
+    'EOR': {'imm': (0x49, 2), 'zp': (0x45, 3), 'zpx': (0x55, 4), 'abs': (0x4D, 4),
+            'abx': (0x5D, 4), 'aby': (0x59, 4), 'inx': (0x41, 6), 'iny': (0x51, 5)},
+    'INC': {'zp': (0xE6, 5), 'zpx': (0xF6, 6), 'abs': (0xEE, 6), 'abx': (0xFE, 7)},
+    'INX': {'imp': (0xE8, 2)}, 'INY': {'imp': (0xC8, 2)},
+    'JMP': {'abs': (0x4C, 3), 'ind': (0x6C, 5)},
+    'JSR': {'abs': (0x20, 6)},
+    'LDA': {'imm': (0xA9, 2), 'zp': (0xA5, 3), 'zpx': (0xB5, 4), 'abs': (0xAD, 4),
+            'abx': (0xBD, 4), 'aby': (0xB9, 4), 'inx': (0xA1, 6), 'iny': (0xB1, 5)},
+    'LDX': {'imm': (0xA2, 2), 'zp': (0xA6, 3), 'zpy': (0xB6, 4), 'abs': (0xAE, 4), 'aby': (0xBE, 4)},
+    'LDY': {'imm': (0xA0, 2), 'zp': (0xA4, 3), 'zpx': (0xB4, 4), 'abs': (0xAC, 4), 'abx': (0xBC, 4)},
+    'LSR': {'acc': (0x4A, 2), 'zp': (0x46, 5), 'zpx': (0x56, 6), 'abs': (0x4E, 6), 'abx': (0x5E, 7)},
+    'NOP': {'imp': (0xEA, 2)},
+    'ORA': {'imm': (0x09, 2), 'zp': (0x05, 3), 'zpx': (0x15, 4), 'abs': (0x0D, 4),
+            'abx': (0x1D, 4), 'aby': (0x19, 4), 'inx': (0x01, 6), 'iny': (0x11, 5)},
+    'PHA': {'imp': (0x48, 3)}, 'PHP': {'imp': (0x08, 3)},
+    'PLA': {'imp': (0x68, 4)}, 'PLP': {'imp': (0x28, 4)},
+    'ROL': {'acc': (0x2A, 2), 'zp': (0x26, 5), 'zpx': (0x36, 6), 'abs': (0x2E, 6), 'abx': (0x3E, 7)},
+    'ROR': {'acc': (0x6A, 2), 'zp': (0x66, 5), 'zpx': (0x76, 6), 'abs': (0x6E, 6), 'abx': (0x7E, 7)},
+    'RTI': {'imp': (0x40, 6)}, 'RTS': {'imp': (0x60, 6)},
+    'SBC': {'imm': (0xE9, 2), 'zp': (0xE5, 3), 'zpx': (0xF5, 4), 'abs': (0xED, 4),
+            'abx': (0xFD, 4), 'aby': (0xF9, 4), 'inx': (0xE1, 6), 'iny': (0xF1, 5)},
+    'SEC': {'imp': (0x38, 2)}, 'SED': {'imp': (0xF8, 2)}, 'SEI': {'imp': (0x78, 2)},
+    'STA': {'zp': (0x85, 3), 'zpx': (0x95, 4), 'abs': (0x8D, 4), 'abx': (0x9D, 5),
+            'aby': (0x99, 5), 'inx': (0x81, 6), 'iny': (0x91, 6)},
+    'STX': {'zp': (0x86, 3), 'zpy': (0x96, 4), 'abs': (0x8E, 4)},
+    'STY': {'zp': (0x84, 3), 'zpx': (0x94, 4), 'abs': (0x8C, 4)},
+    'TAX': {'imp': (0xAA, 2)}, 'TAY': {'imp': (0xA8, 2)}, 'TSX': {'imp': (0xBA, 2)},
+    'TXA': {'imp': (0x8A, 2)}, 'TXS': {'imp': (0x9A, 2)}, 'TYA': {'imp': (0x98, 2)},
+}
+
+# Befehlslänge in Bytes je Adressierungsart
+MODE_SIZE_6510 = {'imp': 1, 'acc': 1, 'imm': 2, 'zp': 2, 'zpx': 2, 'zpy': 2,
+                  'rel': 2, 'inx': 2, 'iny': 2, 'abs': 3, 'abx': 3, 'aby': 3,
+                  'ind': 3}
+
+BRANCHES_6510 = {'BCC', 'BCS', 'BEQ', 'BMI', 'BNE', 'BPL', 'BVC', 'BVS'}
+
+# Gegenstück zu jedem Branch (Peephole: Branch über JMP; Assembler: Sprünge
+# über mehr als -128..+127 Bytes)
+INVERTED_BRANCH_6510 = {'BCC': 'BCS', 'BCS': 'BCC', 'BEQ': 'BNE', 'BNE': 'BEQ',
+                        'BMI': 'BPL', 'BPL': 'BMI', 'BVC': 'BVS', 'BVS': 'BVC'}
+
+
+def parse_asm_line(line):
+    """Zerlegt eine Assembler-Zeile in (Label, Mnemonic, Operand).
+    Kommentare und Leerzeilen liefern (None, None, None)."""
+    text = line.split(';', 1)[0].strip()
+    if not text:
+        return None, None, None
+    if text.endswith(':'):
+        return text[:-1], None, None
+    parts = text.split(None, 1)
+    return None, parts[0].upper(), parts[1].strip() if len(parts) > 1 else ''
+
+
+def operand_mode(mnemonic, operand):
+    """Bestimmt die Adressierungsart eines Befehls aus seinem Operanden"""
+    modes = OPCODES_6510[mnemonic]
+    if mnemonic in BRANCHES_6510:
+        return 'rel'
+    if operand == '' or operand.upper() == 'A':
+        return 'acc' if 'acc' in modes else 'imp'
+    if operand.startswith('#'):
+        return 'imm'
+    op = operand.upper().replace(' ', '')
+    if op.startswith('('):
+        if op.endswith(',X)'):
+            return 'inx'
+        if op.endswith('),Y'):
+            return 'iny'
+        return 'ind'
+    index = ''
+    if op.endswith(',X') or op.endswith(',Y'):
+        index = op[-1].lower()
+        op = op[:-2]
+    zero_page = re.fullmatch(r'\$[0-9A-F]{1,2}', op) is not None
+    if zero_page and ('zp' + index) in modes:
+        return 'zp' + index
+    return {'': 'abs', 'x': 'abx', 'y': 'aby'}[index]
+
+
+def instruction_cost(mnemonic, operand):
+    """(Bytes, Zyklen) eines Befehls"""
+    mode = operand_mode(mnemonic, operand)
+    return MODE_SIZE_6510[mode], OPCODES_6510[mnemonic][mode][1]
+
+
+def fold_constants(node):
+    """Konstantenfaltung auf dem AST (arbeitet in-place, gibt den Knoten zurück).
+
+    Gefaltet wird in der 8-Bit-Arithmetik, die der Code-Generator erzeugt:
+    +, -, * modulo 256, / als vorzeichenlose Ganzzahldivision der unteren Bytes
+    (Division durch 0 bleibt stehen, sie hängt zur Laufzeit). Vergleiche
+    werden nicht gefaltet, ihr Ergebnis entscheidet der erzeugte Code."""
+    for name, value in vars(node).items():
+        if isinstance(value, ASTNode):
+            setattr(node, name, fold_constants(value))
+        elif isinstance(value, list):
+            setattr(node, name, [fold_constants(v) if isinstance(v, ASTNode) else v
+                                 for v in value])
+
+    def is_int(n):
+        return isinstance(n, Literal) and n.lit_type == 'int'
+
+    if isinstance(node, UnaryOp) and node.op == '-' and is_int(node.operand):
+        return Literal(-node.operand.value, 'int')
+    if isinstance(node, BinaryOp):
+        left, right = node.left, node.right
+        if is_int(left) and is_int(right):
+            a, b = left.value, right.value
+            if node.op == '+':
+                return Literal(a + b, 'int')
+            if node.op == '-':
+                return Literal(a - b, 'int')
+            if node.op == '*':
+                return Literal(a * b, 'int')
+            if node.op == '/' and b & 0xFF:
+                return Literal((a & 0xFF) // (b & 0xFF), 'int')
+        # Neutrale Elemente (x + 0, x - 0, x * 1, x / 1)
+        pure = isinstance(left, (Identifier, Literal))
+        if is_int(right) and ((node.op in ('+', '-') and right.value & 0xFF == 0)
+                              or (node.op in ('*', '/') and right.value & 0xFF == 1)):
+            return left
+        if is_int(left) and node.op == '+' and left.value & 0xFF == 0:
+            return right
+        if is_int(left) and node.op == '*' and left.value & 0xFF == 1:
+            return right
+        if pure and is_int(right) and node.op == '*' and right.value & 0xFF == 0:
+            return Literal(0, 'int')
+    return node
+
+
+class Optimizer6510:
+    """Optimierungs-Pass für CodeGenerator6510.
+
+    1. Konstantenfaltung auf dem AST (fold_constants)
+    2. Zero-Page-Vergabe nach Zugriffshäufigkeit: ein Probelauf des Generators
+       zählt die Zugriffe jeder Variable (in Schleifen x8 je Schachtelungstiefe),
+       die häufigsten bekommen die freien Zero-Page-Zellen, der Rest wird ab
+       spill_base in den normalen Speicher ausgelagert. Pointer (indirekte
+       Adressierung) und Variablen mit &-Zugriff müssen in der Zero-Page liegen.
+       Hilfszellen (_temp, _mult, _div), deren Lebensdauern sich nicht
+       überschneiden, teilen sich eine Adresse.
+    3. Peephole-Optimierung auf der erzeugten Befehlsliste: überflüssige
+       LDA/STA, Sprünge auf Sprünge, Sprünge auf das nächste Label, Branch über
+       JMP und toter Code hinter JMP/RTS.
+
+    report() zeigt Bytes und statische Zyklensumme (jeder erreichbare Befehl
+    einmal, Branches nicht genommen) je Funktion vor und nach der
+    Optimierung; gemessene Laufzeiten liefert C64Benchmark.
+    """
+
+    # Auf dem C64 von BASIC und KERNAL unbenutzte Zero-Page-Zellen
+    C64_FREE_ZP = (0x02, 0xFB, 0xFC, 0xFD, 0xFE)
+
+    # Instruktionen, die N/Z neu setzen bzw. den Akku verändern
+    SETS_NZ = {'LDA', 'LDX', 'LDY', 'ADC', 'SBC', 'AND', 'ORA', 'EOR', 'CMP',
+               'CPX', 'CPY', 'INC', 'DEC', 'INX', 'INY', 'DEX', 'DEY', 'TAX',
+               'TAY', 'TXA', 'TYA', 'TSX', 'ASL', 'LSR', 'ROL', 'ROR', 'BIT',
+               'PLA', 'PLP'}
+    WRITES_A = {'ADC', 'SBC', 'AND', 'ORA', 'EOR', 'TXA', 'TYA', 'PLA', 'JSR',
+                'ASL', 'LSR', 'ROL', 'ROR'}
+    WRITES_MEM = {'STX', 'STY', 'INC', 'DEC', 'ASL', 'LSR', 'ROL', 'ROR'}
+
+    TEMP_PREFIXES = ('_temp', '_mult', '_div')
+
+    def __init__(self, zp_pool=range(0x02, 0x100), spill_base=0xC000):
+        self.zp_pool = sorted(zp_pool)
+        self.spill_base = spill_base
+        self.plan = {}
+        self.before = ''
+        self.after = ''
+
+    def compile(self, ast):
+        """Erzeugt optimierten Assembler-Code für den AST (der AST selbst
+        bleibt unverändert)"""
+        self.before = CodeGenerator6510().generate(ast)
+        folded = fold_constants(copy.deepcopy(ast))
+
+        probe = CodeGenerator6510()
+        probe.generate(folded)
+        self.plan = self.plan_zero_page(probe.code, probe.var_to_zp,
+                                        self._address_taken(folded))
+
+        final = CodeGenerator6510(zp_plan=self.plan)
+        final.generate(folded)
+        self.after = '\n'.join(self.peephole(final.code))
+        return self.after
+
+    # ---------- Zero-Page-Vergabe ----------
+
+    @staticmethod
+    def _address_taken(node):
+        """Namen aller Variablen, deren Adresse mit & genommen wird"""
+        names = set()
+        if isinstance(node, AddressOf) and isinstance(node.operand, Identifier):
+            names.add(node.operand.name)
+        for value in vars(node).values():
+            for child in (value if isinstance(value, list) else [value]):
+                if isinstance(child, ASTNode):
+                    names |= Optimizer6510._address_taken(child)
+        return names
+
+    @staticmethod
+    def usage_weights(lines, var_to_zp):
+        """Gewichtete Zugriffszahl je Variable. Ein Rückwärtssprung JMP L
+        markiert die Zeilen zwischen L und dem Sprung als Schleife, jeder
+        Zugriff darin zählt 8x je Schachtelungstiefe."""
+        addr_to_var = {addr: name for name, addr in var_to_zp.items()}
+        parsed = [parse_asm_line(line) for line in lines]
+        label_pos = {lab: i for i, (lab, _, _) in enumerate(parsed) if lab}
+        depth = [0] * len(parsed)
+        for j, (_, mnem, operand) in enumerate(parsed):
+            if ((mnem == 'JMP' or mnem in BRANCHES_6510)
+                    and label_pos.get(operand, j) < j):
+                for k in range(label_pos[operand], j + 1):
+                    depth[k] += 1
+        weights = {name: 0 for name in var_to_zp}
+        for i, (_, mnem, operand) in enumerate(parsed):
+            if not mnem or not operand or operand.startswith('#'):
+                continue
+            m = re.search(r'\$([0-9A-Fa-f]{2,4})\b', operand)
+            if m and int(m.group(1), 16) in addr_to_var:
+                weights[addr_to_var[int(m.group(1), 16)]] += 8 ** depth[i]
+        return weights
+
+    @staticmethod
+    def call_graph(lines):
+        """{Funktion: Menge aller direkt oder indirekt per JSR gerufenen
+        Funktionen} sowie {Zeile: Funktion}"""
+        owner, calls, current = {}, {}, None
+        for i, line in enumerate(lines):
+            if line.startswith('; Funktion:'):
+                current = line.split()[-1]
+                calls[current] = set()
+            owner[i] = current
+            _, mnem, operand = parse_asm_line(line)
+            if mnem == 'JSR' and current:
+                calls[current].add(operand)
+        reach = {}
+        for name in calls:
+            seen, todo = set(), list(calls[name])
+            while todo:
+                callee = todo.pop()
+                if callee in calls and callee not in seen:
+                    seen.add(callee)
+                    todo.extend(calls[callee])
+            reach[name] = seen
+        return reach, owner
+
+    def share_temps(self, lines, var_to_zp):
+        """Fasst Hilfszellen mit disjunkten Lebensdauern zusammen.
+        Innerhalb einer Funktion ist die Lebensdauer die erste bis letzte
+        Zeile, in der die Zelle vorkommt; der Generator schreibt jede
+        Hilfszelle vor ihrer Verwendung neu, also bleibt das auch in Schleifen
+        gültig. Hilfszellen verschiedener Funktionen teilen sich nur dann eine
+        Adresse, wenn keine der beiden die andere (auch indirekt) aufruft —
+        ein JSR überschreibt sonst eine über den Aufruf lebende Zelle.
+        Liefert {Hilfszelle: Vertreter}."""
+        reach, owner = self.call_graph(lines)
+        first, last, func = {}, {}, {}
+        addr_to_var = {addr: name for name, addr in var_to_zp.items()}
+        for i, line in enumerate(lines):
+            _, mnem, operand = parse_asm_line(line)
+            if not mnem or not operand or operand.startswith('#'):
+                continue
+            m = re.search(r'\$([0-9A-Fa-f]{2,4})\b', operand)
+            name = m and addr_to_var.get(int(m.group(1), 16))
+            if name and name.startswith(self.TEMP_PREFIXES):
+                first.setdefault(name, i)
+                last[name] = i
+                func.setdefault(name, owner[i])
+
+        def conflict(a, b):
+            fa, fb = func[a], func[b]
+            if fa == fb:
+                return first[a] <= last[b] and first[b] <= last[a]
+            return fb in reach.get(fa, ()) or fa in reach.get(fb, ())
+
+        groups = []                             # [[Vertreter, ...]]
+        leader = {}
+        for name in sorted(first, key=first.get):
+            for group in groups:
+                if not any(conflict(name, other) for other in group):
+                    group.append(name)
+                    leader[name] = group[0]
+                    break
+            else:
+                groups.append([name])
+                leader[name] = name
+        return leader
+
+    def plan_zero_page(self, lines, var_to_zp, address_taken=()):
+        """Adressplan Variable -> Adresse nach Zugriffshäufigkeit"""
+        weights = self.usage_weights(lines, var_to_zp)
+        leader = self.share_temps(lines, var_to_zp)
+        for name, head in leader.items():
+            if name != head:
+                weights[head] += weights.pop(name)
+        order = [n for n in var_to_zp if leader.get(n, n) == n]
+        rank = lambda name: (-weights[name], order.index(name))
+        free = list(self.zp_pool)
+        plan = {}
+
+        # Pointer-Paare (x_lo/x_hi) brauchen zwei benachbarte Zero-Page-Zellen
+        pairs = [name[:-3] for name in order
+                 if name.endswith('_lo') and name[:-3] + '_hi' in var_to_zp]
+        pairs.sort(key=lambda base: min(rank(base + '_lo'), rank(base + '_hi')))
+        for base in pairs:
+            slot = next((a for a in free if a + 1 in free), None)
+            if slot is None:
+                raise Exception("Zero-Page voll!")
+            plan[base + '_lo'], plan[base + '_hi'] = slot, slot + 1
+            free.remove(slot)
+            free.remove(slot + 1)
+
+        pinned = sorted((n for n in address_taken if n in var_to_zp), key=rank)
+        for name in pinned:
+            if not free:
+                raise Exception("Zero-Page voll!")
+            plan[name] = free.pop(0)
+
+        spill = self.spill_base
+        for name in sorted(order, key=rank):
+            if name in plan:
+                continue
+            if free:
+                plan[name] = free.pop(0)
+            else:
+                plan[name] = spill
+                spill += 1
+        for name, head in leader.items():
+            plan[name] = plan[head]
+        return plan
+
+    # ---------- Peephole ----------
+
+    def peephole(self, lines):
+        """Wendet die Peephole-Regeln an, bis sich nichts mehr ändert"""
+        lines = list(lines)
+        changed = True
+        while changed:
+            changed = False
+            for rule in (self._remove_dead_code, self._thread_jumps,
+                         self._branch_over_jump, self._jump_to_next,
+                         self._redundant_load_store):
+                new = rule(lines)
+                if new != lines:
+                    lines, changed = new, True
+        return lines
+
+    @staticmethod
+    def _instr(mnemonic, operand, comment=''):
+        line = f"    {mnemonic} {operand}".rstrip()
+        return f"{line}    ; {comment}" if comment else line
+
+    def _remove_dead_code(self, lines):
+        """Befehle hinter JMP/RTS bis zum nächsten Label sind unerreichbar"""
+        out, dead = [], False
+        for line in lines:
+            label, mnem, _ = parse_asm_line(line)
+            if label:
+                dead = False
+            elif mnem and dead:
+                continue
+            out.append(line)
+            if mnem in ('JMP', 'RTS', 'RTI'):
+                dead = True
+        return out
+
+    def _thread_jumps(self, lines):
+        """Sprung auf ein Label, hinter dem direkt JMP M steht -> Sprung auf M"""
+        parsed = [parse_asm_line(line) for line in lines]
+        first_instr = {}
+        for i, (label, _, _) in enumerate(parsed):
+            if label:
+                for _, mnem, operand in parsed[i + 1:]:
+                    if mnem:
+                        first_instr[label] = (mnem, operand)
+                        break
+
+        def final_target(label):
+            seen = set()
+            while label not in seen and first_instr.get(label, ('',))[0] == 'JMP':
+                seen.add(label)
+                label = first_instr[label][1]
+            return label
+
+        out = []
+        for line, (_, mnem, operand) in zip(lines, parsed):
+            if (mnem == 'JMP' or mnem in BRANCHES_6510) and operand in first_instr:
+                target = final_target(operand)
+                if target != operand:
+                    line = self._instr(mnem, target)
+            out.append(line)
+        return out
+
+    def _branch_over_jump(self, lines):
+        """Bxx L1 / JMP L2 / L1:  ->  B!xx L2 / L1:"""
+        out = list(lines)
+        code = [(i, parse_asm_line(line)) for i, line in enumerate(out)]
+        code = [(i, p) for i, p in code if p != (None, None, None)]
+        drop = set()
+        for k in range(len(code) - 2):
+            (i, (_, m1, o1)), (j, (_, m2, o2)), (_, (l3, _, _)) = code[k:k + 3]
+            if m1 in BRANCHES_6510 and m2 == 'JMP' and l3 == o1 and i not in drop:
+                out[i] = self._instr(INVERTED_BRANCH_6510[m1], o2)
+                drop.add(j)
+        return [line for i, line in enumerate(out) if i not in drop]
+
+    def _jump_to_next(self, lines):
+        """JMP L direkt vor L: entfällt"""
+        parsed = [parse_asm_line(line) for line in lines]
+        out = []
+        for i, (line, (_, mnem, operand)) in enumerate(zip(lines, parsed)):
+            if mnem == 'JMP':
+                nxt = next((p for p in parsed[i + 1:] if p != (None, None, None)), None)
+                if nxt and nxt[0] == operand:
+                    continue
+            out.append(line)
+        return out
+
+    def _nz_dead(self, parsed, i):
+        """True, wenn die N/Z-Flags nach Befehl i nicht mehr gelesen werden,
+        bevor sie überschrieben werden (konservativ bei Labels und Sprüngen)"""
+        for label, mnem, _ in parsed[i + 1:]:
+            if label:
+                return False
+            if not mnem:
+                continue
+            if mnem in self.SETS_NZ:
+                return True
+            if mnem in BRANCHES_6510 or mnem in ('JMP', 'JSR', 'RTS', 'RTI', 'PHP', 'BRK'):
+                return False
+        return False
+
+    def _redundant_load_store(self, lines):
+        """Verfolgt innerhalb eines Basisblocks, welche Operanden sicher den
+        Akku-Inhalt haben: LDA eines solchen Operanden (wenn seine Flags
+        ungenutzt bleiben) und STA in eine Zelle, die den Wert schon hat,
+        entfallen."""
+        parsed = [parse_asm_line(line) for line in lines]
+        plain = re.compile(r'#?\$[0-9A-F]+$|#[<>]\$[0-9A-F]+$')
+        out, same_as_a = [], set()
+        for i, (line, (label, mnem, operand)) in enumerate(zip(lines, parsed)):
+            if label:
+                same_as_a = set()
+            elif mnem == 'LDA':
+                if operand in same_as_a and self._nz_dead(parsed, i):
+                    continue
+                same_as_a = {operand} if plain.match(operand) else set()
+            elif mnem == 'STA':
+                if operand in same_as_a and not operand.startswith('#'):
+                    continue
+                if plain.match(operand):
+                    same_as_a.add(operand)
+                else:                         # indiziert: kann alles treffen
+                    same_as_a = {o for o in same_as_a if o.startswith('#')}
+            elif mnem in self.WRITES_A and (mnem not in self.WRITES_MEM
+                                            or operand in ('', 'A')):
+                same_as_a = set()
+            elif mnem in self.WRITES_MEM:
+                if plain.match(operand):
+                    same_as_a.discard(operand)
+                else:
+                    same_as_a = {o for o in same_as_a if o.startswith('#')}
+            out.append(line)
+        return out
+
+    # ---------- Bericht ----------
+
+    @staticmethod
+    def function_costs(asm):
+        """{Funktion: (Bytes, Zyklen)} eines Assembler-Textes. Funktionen
+        beginnen mit dem Kommentar '; Funktion: ...' und ihrem Label.
+        Bytes zählen alle Befehle, Zyklen nur die erreichbaren: hinter
+        JMP/RTS/RTI bis zum nächsten Label wird nichts ausgeführt."""
+        costs, current, dead = {}, None, False
+        lines = asm.split('\n')
+        for i, line in enumerate(lines):
+            if line.startswith('; Funktion:'):
+                current = line.split()[-1]
+                costs[current] = (0, 0)
+                continue
+            label, mnem, operand = parse_asm_line(line)
+            if label:
+                dead = False
+            if current and mnem:
+                size, cycles = instruction_cost(mnem, operand)
+                b, c = costs[current]
+                costs[current] = (b + size, c + (0 if dead else cycles))
+                if mnem in ('JMP', 'RTS', 'RTI'):
+                    dead = True
+        return costs
+
+    def report(self):
+        """Tabelle Bytes/Zyklen je Funktion vor und nach der Optimierung.
+        Die Zyklen sind eine statische Summe über den Code (jeder
+        erreichbare Befehl einmal, Branches nicht genommen), keine Messung
+        der Laufzeit — die liefert C64Benchmark."""
+        before = self.function_costs(self.before)
+        after = self.function_costs(self.after)
+        rows = [f"{'Funktion':<20} {'Bytes':>13} {'Zyklen (stat.)':>15}"]
+        total = [0, 0, 0, 0]
+        for name in before:
+            b0, c0 = before[name]
+            b1, c1 = after.get(name, (0, 0))
+            rows.append(f"{name:<20} {b0:>5} -> {b1:<5} {c0:>5} -> {c1:<5}")
+            for k, v in enumerate((b0, b1, c0, c1)):
+                total[k] += v
+        rows.append(f"{'Summe':<20} {total[0]:>5} -> {total[1]:<5} "
+                    f"{total[2]:>5} -> {total[3]:<5}")
+        return '\n'.join(rows)
+
+
+class Assembler6510:
+    """Übersetzt die Ausgabe von CodeGenerator6510/Optimizer6510 in
+    Maschinencode. Zwei Durchläufe: erst Adressen und Labels, dann Bytes.
+    Branches, deren Ziel zu weit weg ist, werden durch den invertierten
+    Branch über ein JMP ersetzt (5 statt 2 Bytes); das wird so lange
+    wiederholt, bis sich keine Adresse mehr verschiebt."""
+
+    def __init__(self, origin=0x1000):
+        self.origin = origin
+        self.labels = {}      # Label -> Adresse
+        self.functions = {}   # Funktion -> {Parameter: Adresse}
+        self.code = b''
+
+    def _instructions(self, asm):
+        """Liste von (Label|None, Mnemonic, Operand) ohne Kommentarzeilen;
+        nebenbei werden die Parameter-Adressen je Funktion gesammelt."""
+        items, current = [], None
+        self.functions = {}
+        for line in asm.split('\n'):
+            text = line.strip()
+            if text.startswith('; Funktion:'):
+                current = text.split()[-1]
+                self.functions[current] = {}
+                continue
+            param = re.match(r'; Parameter (\w+) bei \$([0-9A-F]+)', text)
+            if param and current:
+                self.functions[current][param.group(1)] = int(param.group(2), 16)
+                continue
+            label, mnem, operand = parse_asm_line(line)
+            if label is not None:
+                items.append((label, None, None))
+            elif mnem is not None:
+                if mnem not in OPCODES_6510:
+                    raise SyntaxError(f"Unbekannter Befehl: '{line.strip()}'")
+                items.append((None, mnem, operand))
+        return items
+
+    def _value(self, expr):
+        """Wert eines Operanden: $hex, Dezimalzahl oder Label, optional mit
+        < (Low-Byte) oder > (High-Byte) davor"""
+        part = ''
+        if expr[:1] in '<>':
+            part, expr = expr[0], expr[1:]
+        if expr.startswith('$'):
+            value = int(expr[1:], 16)
+        elif expr.isdigit():
+            value = int(expr)
+        elif expr in self.labels:
+            value = self.labels[expr]
+        else:
+            raise SyntaxError(f"Unbekanntes Label: '{expr}'")
+        if part == '<':
+            return value & 0xFF
+        if part == '>':
+            return (value >> 8) & 0xFF
+        return value
+
+    def _operand_value(self, operand):
+        """Zahlenwert des Operanden ohne #, Klammern und Index-Register"""
+        op = operand.replace(' ', '').lstrip('#')
+        op = re.sub(r',[XYxy]\)?$', '', op).strip('()')
+        return self._value(op)
+
+    def _layout(self, items, long_branches):
+        """Adressen aller Labels bei gegebener Menge langer Branches"""
+        addr, labels = self.origin, {}
+        for i, (label, mnem, operand) in enumerate(items):
+            if label is not None:
+                if label in labels:
+                    raise SyntaxError(f"Label doppelt definiert: '{label}'")
+                labels[label] = addr
+            elif mnem in BRANCHES_6510:
+                addr += 5 if i in long_branches else 2
+            else:
+                addr += MODE_SIZE_6510[operand_mode(mnem, operand)]
+        return labels
+
+    def assemble(self, asm):
+        """Assembliert den Text, gibt die Bytes ab self.origin zurück"""
+        items = self._instructions(asm)
+        long_branches = set()
+        while True:
+            self.labels = self._layout(items, long_branches)
+            addr, grown = self.origin, False
+            for i, (label, mnem, operand) in enumerate(items):
+                if label is not None:
+                    continue
+                if mnem in BRANCHES_6510:
+                    if i not in long_branches:
+                        offset = self._value(operand) - (addr + 2)
+                        if not -128 <= offset <= 127:
+                            long_branches.add(i)
+                            grown = True
+                    addr += 5 if i in long_branches else 2
+                else:
+                    addr += MODE_SIZE_6510[operand_mode(mnem, operand)]
+            if not grown:
+                break
+
+        out = bytearray()
+        for i, (label, mnem, operand) in enumerate(items):
+            if label is not None:
+                continue
+            addr = self.origin + len(out)
+            if mnem in BRANCHES_6510:
+                target = self._value(operand)
+                if i in long_branches:
+                    out += bytes((OPCODES_6510[INVERTED_BRANCH_6510[mnem]]['rel'][0], 3,
+                                  OPCODES_6510['JMP']['abs'][0],
+                                  target & 0xFF, target >> 8))
+                else:
+                    out += bytes((OPCODES_6510[mnem]['rel'][0],
+                                  (target - (addr + 2)) & 0xFF))
+                continue
+            mode = operand_mode(mnem, operand)
+            out.append(OPCODES_6510[mnem][mode][0])
+            size = MODE_SIZE_6510[mode]
+            if size > 1:
+                value = self._operand_value(operand)
+                if size == 2 and value > 0xFF:
+                    raise SyntaxError(f"Operand zu groß: '{mnem} {operand}'")
+                out.append(value & 0xFF)
+                if size == 3:
+                    out.append((value >> 8) & 0xFF)
+        self.code = bytes(out)
+        return self.code
+
+    def prg(self):
+        """Der assemblierte Code als C64-PRG (2 Bytes Ladeadresse davor)"""
+        return bytes((self.origin & 0xFF, self.origin >> 8)) + self.code
+
+
+class C64Benchmark:
+    """Misst die Laufzeit jeder C-Funktion auf dem emulierten C64 (c64emu.py
+    aus diesem Verzeichnis). Der Code wird assembliert, als PRG über
+    System.load_prg geladen und jede Funktion einzeln mit
+    System.call_routine aufgerufen. Die Maschine bleibt im Reset-Zustand:
+    ohne KERNAL-Init laufen keine Timer-IRQs, und der VIC hat den Bildschirm
+    noch aus, stiehlt also keine Badline-Zyklen — die Zählung ist exakt
+    (vom ersten Befehl der Funktion bis einschließlich ihres RTS)."""
+
+    def __init__(self, origin=0x1000, max_cycles=2_000_000):
+        self.origin = origin
+        self.max_cycles = max_cycles
+
+    def run(self, asm, args=None):
+        """{Funktion: (Zyklen, Akkumulator)}; Zyklen ist None, wenn die
+        Funktion nicht innerhalb von max_cycles zurückkehrt. args ist
+        {Funktion: {Parameter: Wert}}; die Werte werden vor dem Aufruf in
+        die Parameter-Adressen geschrieben."""
+        import os
+        import tempfile
+        import c64emu
+
+        assembler = Assembler6510(self.origin)
+        assembler.assemble(asm)
+        fd, path = tempfile.mkstemp(suffix='.prg')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(assembler.prg())
+            results = {}
+            for name, params in assembler.functions.items():
+                # Frische Maschine je Funktion: kein Zustand aus Vorläufern
+                system = c64emu.System(verbose=False)
+                system.load_prg(path)
+                system.cpu.set_flag(system.cpu.FI, True)
+                for param, value in (args or {}).get(name, {}).items():
+                    system.mem.write_ram_direct(params[param], value & 0xFF)
+                start = system.cpu.cycles
+                done = system.call_routine(assembler.labels[name], self.max_cycles)
+                cycles = system.cpu.cycles - start if done else None
+                results[name] = (cycles, system.cpu.a)
+        finally:
+            os.unlink(path)
+        return results
+
+    def compare(self, optimizer, args=None):
+        """Tabelle der gemessenen Zyklen je Funktion vor und nach der
+        Optimierung (optimizer.compile muss gelaufen sein)"""
+        before = self.run(optimizer.before, args)
+        after = self.run(optimizer.after, args)
+        rows = [f"{'Funktion':<20} {'Zyklen':>15} {'A':>11}"]
+        for name, (c0, a0) in before.items():
+            c1, a1 = after.get(name, (None, None))
+            c0 = '-' if c0 is None else c0
+            c1 = '-' if c1 is None else c1
+            rows.append(f"{name:<20} {c0:>6} -> {c1:<6} "
+                        f"${a0:02X} -> ${a1:02X}")
+        return '\n'.join(rows)
+
 # Beispielverwendung
 if __name__ == "__main__":
     c_code = """
@@ -1413,3 +2148,19 @@ if __name__ == "__main__":
     codegen = CodeGenerator6510()
     asm_code = codegen.generate(ast)
     print(asm_code)
+
+    print("\n=== OPTIMIERTER ASSEMBLER CODE ===")
+    optimizer = Optimizer6510()
+    print(optimizer.compile(ast))
+    print("\n=== OPTIMIERUNG (statisch: erreichbarer Code, Branches nicht genommen) ===")
+    print(optimizer.report())
+    print("\n=== OPTIMIERUNG, nur die freie C64-Zero-Page ===")
+    c64_optimizer = Optimizer6510(zp_pool=Optimizer6510.C64_FREE_ZP)
+    c64_optimizer.compile(ast)
+    print(c64_optimizer.report())
+
+    print("\n=== GEMESSEN AUF DEM EMULIERTEN C64 (c64emu.py) ===")
+    try:
+        print(C64Benchmark().compare(optimizer, {'multiply': {'a': 5, 'b': 3}}))
+    except ImportError:
+        print("c64emu.py nicht gefunden — Benchmark übersprungen")
@@ -4,15 +4,27 @@ my_numpy.py - Eigene Implementierung der in SmallGPT verwendeten NumPy-Funktione
 Zeigt was NumPy intern (vereinfacht) berechnet.
 Nur mit Python-Standardfunktionen — kein externes Paket nötig.
 
+Wie bei NumPy liegen die Werte in einem flachen Puffer (array('d') bzw.
+array('q') für Ganzzahlen); shape, strides und offset legen fest, wie
+dieser Puffer als n-dimensionales Array gelesen wird. reshape, transpose
+und Slicing erzeugen daher nur neue Sichten (Views) auf denselben Puffer,
+element-weise Operationen laufen in einem Durchgang über den Puffer.
+
 WICHTIG: Diese Implementierung ist für Lernzwecke, nicht für Performance.
          Ein Forward Pass dauert damit deutlich länger als mit NumPy.
 
 Verwendung in SmallGPT.py:
     import my_numpy as np   # <- eigene Implementierung (langsam, transparent)
     import numpy as np      # <- original NumPy (schnell, empfohlen)
+
+Vergleich mit NumPy (Zeiten und Abweichungen):
+    python3 my_numpy.py [größe ...]
 """
 
 import math
+import operator
+from array import array as _buffer
+from itertools import chain, repeat
 
 
 # =============================================================================
@@ -22,123 +34,333 @@ import math
 class ndarray:
     """
     Vereinfachtes n-dimensionales Array.
-    Speichert Daten als verschachtelte Python-Listen,
-    kennt seine eigene Shape und unterstützt grundlegende Operationen.
+
+    Speichert die Werte in einem flachen Puffer (array('d') oder array('q')).
+    Element (i, j, ...) steht an Position offset + i*strides[0] + j*strides[1] + ...
+    Mehrere ndarrays können sich einen Puffer teilen (Views): Schreiben in
+    eine View ändert auch das ursprüngliche Array — wie bei NumPy.
     """
 
-    def __init__(self, data, shape=None):
+    def __init__(self, data, shape=None, strides=None, offset=0):
         if isinstance(data, ndarray):
-            self.data = data.data
+            self.buffer = data.buffer
             self.shape = data.shape
+            self.strides = data.strides
+            self.offset = data.offset
+            return
+        if isinstance(data, _buffer):
+            buffer = data
+            if shape is None:
+                shape = (len(data),)
         else:
-            self.data = data
-            self.shape = shape or _get_shape(data)
+            if shape is None:
+                shape = _get_shape(data)
+            buffer = _make_buffer(_flatten(data))
+        self.buffer = buffer
+        self.shape = tuple(shape)
+        self.strides = tuple(strides) if strides is not None else _compute_strides(self.shape)
+        self.offset = offset
 
     def __repr__(self):
         return f"ndarray(shape={self.shape})"
 
-    # Indexierung: arr[i] oder arr[i, j]
+    def __len__(self):
+        if not self.shape:
+            raise TypeError("len() eines 0-d Arrays")
+        return self.shape[0]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # -------------------------------------------------------------------------
+    # Zugriff auf den Puffer
+    # -------------------------------------------------------------------------
+
+    def _is_contiguous(self):
+        """Liegen die Elemente lückenlos in C-Reihenfolge im Puffer?"""
+        expected = 1
+        for n, s in zip(reversed(self.shape), reversed(self.strides)):
+            if n != 1 and s != expected:
+                return False
+            expected *= n
+        return True
+
+    def _indices(self):
+        """Puffer-Positionen aller Elemente in C-Reihenfolge."""
+        indices = [self.offset]
+        for n, s in zip(self.shape, self.strides):
+            steps = [k * s for k in range(n)]
+            indices = [i + d for i in indices for d in steps]
+        return indices
+
+    def _values(self):
+        """
+        Alle Elemente als flacher Puffer in C-Reihenfolge.
+        Zusammenhängende Arrays werden in einem Stück kopiert,
+        alle anderen über ihre Puffer-Positionen eingesammelt.
+        """
+        if self._is_contiguous():
+            return self.buffer[self.offset:self.offset + self.size]
+        buf = self.buffer
+        return _buffer(buf.typecode, [buf[i] for i in self._indices()])
+
+    def _rows(self):
+        """
+        Die Zeilen entlang der letzten Achse, eine nach der anderen:
+        ein Puffer-Abschnitt oder — bei Stride 0 (gebroadcastet) — ein
+        wiederholter Einzelwert. Es wird nichts vervielfältigt.
+        """
+        buf = self.buffer
+        n, s = self.shape[-1], self.strides[-1]
+        starts = ndarray(buf, self.shape[:-1], self.strides[:-1], self.offset)._indices()
+        if s == 0:
+            return (repeat(buf[o], n) for o in starts)
+        return (buf[o:o + (n - 1) * s + 1:s] for o in starts)
+
+    def _assign(self, value, shape=None, indices=None):
+        """
+        Schreibt value (Skalar, Liste oder ndarray) in die eigenen Elemente.
+        Bei Fancy Indexing geben shape und indices die Ziel-Elemente vor.
+        """
+        values = broadcast_to(value, self.shape if shape is None else shape)._values()
+        n = len(values)
+
+        buf = self.buffer
+        if buf.typecode == 'q':
+            values = [int(v) for v in values]
+        if indices is None and self._is_contiguous():
+            buf[self.offset:self.offset + n] = _buffer(buf.typecode, values)
+            return
+        if indices is None:
+            indices = self._indices()
+        for i, v in zip(indices, values):
+            buf[i] = v
+
+    # -------------------------------------------------------------------------
+    # Indexierung: arr[i], arr[i, j], arr[1:3], arr[idx_array], arr[rows, cols]
+    # -------------------------------------------------------------------------
+
+    def _index(self, idx):
+        """
+        Wertet einen Index aus.
+        Einfache Indizes (int, slice, None, ...) ergeben eine View,
+        Fancy Indexing (Listen/ndarrays) eine Liste von Puffer-Positionen.
+        Rückgabe: (shape, strides, offset, None) oder (shape, None, None, indices).
+        """
+        if not isinstance(idx, tuple):
+            idx = (idx,)
+        used = builtins_sum(1 for i in idx if i is not None and i is not Ellipsis)
+        if used > len(self.shape):
+            raise IndexError(f"zu viele Indizes für Array mit shape {self.shape}")
+        if Ellipsis in idx:
+            pos = idx.index(Ellipsis)
+            idx = idx[:pos] + (slice(None),) * (len(self.shape) - used) + idx[pos + 1:]
+
+        # Jede Ausgabe-Achse ist entweder (n, stride) oder die Fancy-Gruppe
+        dims = []
+        offset = self.offset
+        fancy, fancy_pos = [], None
+        axis = 0
+        for i in idx:
+            if i is None:
+                dims.append((1, 0))
+                continue
+            n, s = self.shape[axis], self.strides[axis]
+            axis += 1
+            if isinstance(i, slice):
+                start, stop, step = i.indices(n)
+                dims.append((len(range(start, stop, step)), s * step))
+                offset += start * s
+            elif isinstance(i, (ndarray, list)):
+                if fancy_pos is None:
+                    fancy_pos = len(dims)
+                    dims.append(None)
+                elif dims[-1] is not None:
+                    raise NotImplementedError("Fancy Indexing nur mit benachbarten Indizes")
+                fancy.append((array(i), n, s))
+            else:
+                i = operator.index(i)
+                if i < 0:
+                    i += n
+                if not 0 <= i < n:
+                    raise IndexError(f"Index {i} außerhalb von Achse mit Länge {n}")
+                offset += i * s
+        dims.extend(zip(self.shape[axis:], self.strides[axis:]))
+
+        if fancy_pos is None:
+            return tuple(n for n, _ in dims), tuple(s for _, s in dims), offset, None
+
+        # Fancy-Indizes werden gegeneinander gebroadcastet und paarweise kombiniert
+        fancy_shape = _broadcast_shape(*(i.shape for i, _, _ in fancy))
+        jumps = [0] * _size(fancy_shape)
+        for i, n, s in fancy:
+            values = broadcast_to(i, fancy_shape)._values()
+            jumps = [j + (int(v) + n if v < 0 else int(v)) * s for j, v in zip(jumps, values)]
+
+        indices = [offset]
+        shape = []
+        for d in dims:
+            if d is None:
+                steps = jumps
+                shape.extend(fancy_shape)
+            else:
+                n, s = d
+                steps = [k * s for k in range(n)]
+                shape.append(n)
+            indices = [i + j for i in indices for j in steps]
+        return tuple(shape), None, None, indices
+
     def __getitem__(self, idx):
-        if isinstance(idx, tuple):
-            result = self.data
-            for i in idx:
-                if isinstance(i, ndarray):
-                    # Fancy Indexing: arr[[1,2,3]]
-                    result = [result[j] for j in _flatten(i.data)]
-                else:
-                    result = result[i]
-            return ndarray(result) if isinstance(result, list) else result
-        elif isinstance(idx, ndarray):
-            # Fancy Indexing: arr[ndarray]
-            flat = _flatten(idx.data)
-            result = [self.data[i] for i in flat]
-            new_shape = idx.shape + (self.shape[-1],) if len(self.shape) > 1 else idx.shape
-            return ndarray(result, new_shape)
-        elif isinstance(idx, slice):
-            return ndarray(self.data[idx])
-        else:
-            result = self.data[idx]
-            if isinstance(result, list):
-                return ndarray(result)
-            return result
+        shape, strides, offset, indices = self._index(idx)
+        if indices is not None:
+            buf = self.buffer
+            return ndarray(_buffer(buf.typecode, [buf[i] for i in indices]), shape)
+        if not shape:
+            return self.buffer[offset]
+        return ndarray(self.buffer, shape, strides, offset)
 
     def __setitem__(self, idx, value):
-        if isinstance(value, ndarray):
-            value = value.data
-        self.data[idx] = value
+        shape, strides, offset, indices = self._index(idx)
+        if indices is not None:
+            self._assign(value, shape, indices)
+        else:
+            ndarray(self.buffer, shape, strides, offset)._assign(value)
 
     # Arithmetik: element-wise
     def __add__(self, other):
-        return _elementwise(self, other, lambda a, b: a + b)
+        return _elementwise(self, other, operator.add, 'same')
 
     def __radd__(self, other):
-        return _elementwise(other, self, lambda a, b: a + b)
+        return _elementwise(other, self, operator.add, 'same')
 
     def __sub__(self, other):
-        return _elementwise(self, other, lambda a, b: a - b)
+        return _elementwise(self, other, operator.sub, 'same')
 
     def __rsub__(self, other):
-        return _elementwise(other, self, lambda a, b: a - b)
+        return _elementwise(other, self, operator.sub, 'same')
 
     def __mul__(self, other):
-        return _elementwise(self, other, lambda a, b: a * b)
+        return _elementwise(self, other, operator.mul, 'same')
 
     def __rmul__(self, other):
-        return _elementwise(self, other, lambda a, b: a * b)
+        return _elementwise(other, self, operator.mul, 'same')
 
     def __truediv__(self, other):
-        return _elementwise(self, other, lambda a, b: a / b)
+        return _elementwise(self, other, operator.truediv)
 
     def __rtruediv__(self, other):
-        return _elementwise(other, self, lambda a, b: a / b)
+        return _elementwise(other, self, operator.truediv)
 
     def __neg__(self):
-        return _apply(self, lambda x: -x)
+        return _apply(self, operator.neg, 'same')
 
     def __pow__(self, other):
-        return _elementwise(self, other, lambda a, b: a ** b)
+        return _elementwise(self, other, operator.pow)
+
+    # Vergleiche: Ergebnis ist ein 0/1-Array (statt bool)
+    def __gt__(self, other):
+        return _elementwise(self, other, operator.gt, 'int')
+
+    def __ge__(self, other):
+        return _elementwise(self, other, operator.ge, 'int')
+
+    def __lt__(self, other):
+        return _elementwise(self, other, operator.lt, 'int')
+
+    def __le__(self, other):
+        return _elementwise(self, other, operator.le, 'int')
+
+    # In-place: schreibt direkt in den Puffer (auch durch Views hindurch)
+    def _inplace(self, other, func):
+        result = _elementwise(self, other, func, 'same')
+        if result.shape != self.shape:
+            raise ValueError(f"In-place: Shape {result.shape} passt nicht zu {self.shape}")
+        self._assign(result)
+        return self
+
+    def __iadd__(self, other):
+        return self._inplace(other, operator.add)
+
+    def __isub__(self, other):
+        return self._inplace(other, operator.sub)
+
+    def __imul__(self, other):
+        return self._inplace(other, operator.mul)
+
+    def __itruediv__(self, other):
+        return self._inplace(other, operator.truediv)
 
     # Matrix-Multiplikation: arr @ other
     def __matmul__(self, other):
         return matmul(self, other)
 
+    def __rmatmul__(self, other):
+        return matmul(other, self)
+
     def transpose(self, *axes):
         return transpose(self, axes if axes else None)
 
     def reshape(self, *shape):
-        if len(shape) == 1 and isinstance(shape[0], tuple):
+        """Neue Shape; View auf denselben Puffer, wenn das Array zusammenhängend ist."""
+        if len(shape) == 1 and isinstance(shape[0], (tuple, list)):
             shape = shape[0]
-        flat = _flatten(self.data)
-        return ndarray(_unflatten(flat, shape), shape)
+        shape = list(shape)
+        if -1 in shape:
+            known = _size(s for s in shape if s != -1)
+            shape[shape.index(-1)] = self.size // known if known else 0
+        shape = tuple(shape)
+        if _size(shape) != self.size:
+            raise ValueError(f"reshape: {self.shape} -> {shape} nicht möglich")
+        if self._is_contiguous():
+            return ndarray(self.buffer, shape, offset=self.offset)
+        return ndarray(self._values(), shape)
+
+    def flatten(self):
+        return ndarray(self._values(), (self.size,))
+
+    def copy(self):
+        return ndarray(self._values(), self.shape)
+
+    def astype(self, dtype):
+        if dtype is int:
+            return ndarray(_buffer('q', map(int, self._values())), self.shape)
+        return ndarray(_buffer('d', self._values()), self.shape)
 
     def sum(self, axis=None, keepdims=False):
         return sum(self, axis=axis, keepdims=keepdims)
 
-    def mean(self):
-        flat = _flatten(self.data)
-        return builtins_sum(flat) / len(flat)
+    def mean(self, axis=None, keepdims=False):
+        return mean(self, axis=axis, keepdims=keepdims)
 
-    def max(self):
-        return builtins_max(_flatten(self.data))
+    def max(self, axis=None, keepdims=False):
+        return max(self, axis=axis, keepdims=keepdims)
 
-    def var(self):
-        flat = _flatten(self.data)
-        m = builtins_sum(flat) / len(flat)
-        return builtins_sum((x - m) ** 2 for x in flat) / len(flat)
+    def var(self, axis=None, keepdims=False):
+        return var(self, axis=axis, keepdims=keepdims)
 
     def tolist(self):
-        return self.data
+        values = self._values().tolist()
+        if not self.shape:
+            return values[0]
+        return _unflatten(values, self.shape)
+
+    @property
+    def data(self):
+        """Inhalt als verschachtelte Liste (wie vor der Umstellung auf Puffer)."""
+        return self.tolist()
 
     @property
     def T(self):
         return transpose(self)
 
+    @property
+    def ndim(self):
+        return len(self.shape)
+
     @property
     def size(self):
-        result = 1
-        for s in self.shape:
-            result *= s
-        return result
+        return _size(self.shape)
 
 
 # Damit sum() und max() intern nicht mit den eigenen Funktionen kollidieren
@@ -154,7 +376,9 @@ builtins_min = builtins.min
 
 def _get_shape(data):
     """Ermittelt die Shape einer verschachtelten Liste."""
-    if not isinstance(data, list):
+    if isinstance(data, ndarray):
+        return data.shape
+    if not isinstance(data, (list, tuple)):
         return ()
     if len(data) == 0:
         return (0,)
@@ -162,11 +386,13 @@ def _get_shape(data):
 
 
 def _flatten(data):
-    """Macht aus verschachtelten Listen eine flache Liste."""
+    """Macht aus verschachtelten Listen (oder ndarrays) eine flache Liste."""
     if isinstance(data, ndarray):
-        data = data.data
-    if not isinstance(data, list):
+        return data._values().tolist()
+    if not isinstance(data, (list, tuple)):
         return [data]
+    if not any(isinstance(item, (list, tuple, ndarray)) for item in data):
+        return list(data)
     result = []
     for item in data:
         result.extend(_flatten(item))
@@ -177,43 +403,133 @@ def _unflatten(flat, shape):
     """Baut aus einer flachen Liste eine verschachtelte Liste mit gegebener Shape."""
     if len(shape) == 1:
         return flat[:shape[0]]
-    size = 1
-    for s in shape[1:]:
-        size *= s
+    size = _size(shape[1:])
     return [_unflatten(flat[i*size:(i+1)*size], shape[1:]) for i in range(shape[0])]
 
 
-def _apply(arr, func):
-    """Wendet func auf jedes Element an."""
+def _size(shape):
+    """Anzahl Elemente zu einer Shape."""
+    result = 1
+    for s in shape:
+        result *= s
+    return result
+
+
+def _make_buffer(values):
+    """Ganzzahlen -> array('q'), alles andere -> array('d')."""
+    if values and all(type(v) is int or type(v) is bool for v in values):
+        return _buffer('q', values)
+    return _buffer('d', values)
+
+
+def _apply(arr, func, kind='float'):
+    """Wendet func auf jedes Element an — ein Durchgang über den Puffer."""
     if isinstance(arr, ndarray):
-        flat = _flatten(arr.data)
-        result = [func(x) for x in flat]
-        return ndarray(_unflatten(result, arr.shape), arr.shape)
+        values = arr._values()
+        typecode = 'q' if kind == 'same' and values.typecode == 'q' else 'd'
+        return ndarray(_buffer(typecode, map(func, values)), arr.shape)
     return func(arr)
 
 
-def _elementwise(a, b, func):
-    """Element-weise Operation zwischen zwei Arrays oder Array und Skalar."""
+def _broadcast_shape(*shapes):
+    """
+    Gemeinsame Shape nach den NumPy-Broadcasting-Regeln:
+    Shapes rechtsbündig vergleichen, fehlende Achsen zählen als 1,
+    je Achse müssen die Längen gleich oder 1 sein.
+    """
+    ndim = builtins_max(len(s) for s in shapes)
+    result = []
+    for dims in zip(*[(1,) * (ndim - len(s)) + tuple(s) for s in shapes]):
+        sizes = set(dims) - {1}
+        if len(sizes) > 1:
+            raise ValueError(f"Shapes nicht broadcastbar: {' '.join(map(str, shapes))}")
+        result.append(sizes.pop() if sizes else 1)
+    return tuple(result)
+
+
+def _elementwise(a, b, func, kind='float'):
+    """
+    Element-weise Operation zwischen zwei Arrays oder Array und Skalar.
+
+    kind legt den Ergebnistyp fest:
+      'float' — immer Gleitkomma (z.B. Division)
+      'same'  — Ganzzahl, wenn beide Operanden Ganzzahlen sind (+, -, *)
+      'int'   — immer Ganzzahl (Vergleiche liefern 0/1)
+
+    Unterschiedliche Shapes werden wie bei NumPy gebroadcastet: beide
+    Operanden werden zu Views mit Stride 0 in den erweiterten Achsen,
+    dann wird Zeile für Zeile (letzte Achse) gerechnet.
+    """
     if isinstance(a, ndarray) and isinstance(b, ndarray):
-        flat_a = _flatten(a.data)
-        flat_b = _flatten(b.data)
-        # Broadcasting: wenn b kleiner ist, wiederholen
-        if len(flat_b) < len(flat_a):
-            reps = len(flat_a) // len(flat_b)
-            flat_b = flat_b * reps
-        result = [func(x, y) for x, y in zip(flat_a, flat_b)]
-        return ndarray(_unflatten(result, a.shape), a.shape)
+        is_int = a.buffer.typecode == 'q' and b.buffer.typecode == 'q'
+        if a.shape == b.shape:
+            shape = a.shape
+            values = map(func, a._values(), b._values())
+        else:
+            shape = _broadcast_shape(a.shape, b.shape)
+            rows = zip(broadcast_to(a, shape)._rows(), broadcast_to(b, shape)._rows())
+            values = chain.from_iterable(map(func, row_a, row_b) for row_a, row_b in rows)
     elif isinstance(a, ndarray):
-        flat = _flatten(a.data)
-        result = [func(x, b) for x in flat]
-        return ndarray(_unflatten(result, a.shape), a.shape)
+        va = a._values()
+        shape = a.shape
+        is_int = va.typecode == 'q' and isinstance(b, int)
+        values = map(func, va, repeat(b, len(va)))
     elif isinstance(b, ndarray):
-        flat = _flatten(b.data)
-        result = [func(a, x) for x in flat]
-        return ndarray(_unflatten(result, b.shape), b.shape)
+        vb = b._values()
+        shape = b.shape
+        is_int = vb.typecode == 'q' and isinstance(a, int)
+        values = map(func, repeat(a, len(vb)), vb)
     else:
         return func(a, b)
 
+    if kind == 'int' or (kind == 'same' and is_int):
+        return ndarray(_buffer('q', values), shape)
+    return ndarray(_buffer('d', values), shape)
+
+
+def _reduce(x, axis, func, keepdims):
+    """
+    Reduziert x entlang einer Achse mit func (bekommt einen Puffer-Abschnitt).
+    Die Achse wird per View ans Ende verschoben, dann wird jeder
+    zusammenhängende Abschnitt der Länge shape[axis] reduziert.
+    """
+    shape = x.shape
+    if axis < 0:
+        axis += len(shape)
+    order = [i for i in range(len(shape)) if i != axis] + [axis]
+    values = transpose(x, order)._values()
+    n = shape[axis]
+    results = [func(values[i:i + n]) for i in range(0, len(values), n)]
+
+    if keepdims:
+        new_shape = tuple(1 if i == axis else s for i, s in enumerate(shape))
+    else:
+        new_shape = tuple(s for i, s in enumerate(shape) if i != axis)
+    return ndarray(_make_buffer(results), new_shape)
+
+
+def _concatenate(arrays, axis):
+    """Hängt Arrays gleicher Dimension entlang axis aneinander."""
+    arrays = [array(a) for a in arrays]
+    first = arrays[0].shape
+    if axis < 0:
+        axis += len(first)
+    for a in arrays:
+        if len(a.shape) != len(first) or any(
+                s != t for i, (s, t) in enumerate(zip(a.shape, first)) if i != axis):
+            raise ValueError(f"Shapes passen nicht zusammen: {first} und {a.shape}")
+
+    outer = _size(first[:axis])
+    inner = _size(first[axis + 1:])
+    chunks = [(a._values(), a.shape[axis] * inner) for a in arrays]
+    typecode = 'q' if all(v.typecode == 'q' for v, _ in chunks) else 'd'
+    result = _buffer(typecode)
+    for i in range(outer):
+        for values, n in chunks:
+            result.extend(_buffer(typecode, values[i * n:(i + 1) * n]))
+    total = builtins_sum(a.shape[axis] for a in arrays)
+    return ndarray(result, first[:axis] + (total,) + first[axis + 1:])
+
 
 # =============================================================================
 # NUMPY-KOMPATIBLE FUNKTIONEN
@@ -226,28 +542,47 @@ def array(data):
     return ndarray(data)
 
 
+def broadcast_to(x, shape):
+    """
+    View von x mit der Shape shape (np.broadcast_to).
+    Neue und gestreckte Achsen bekommen Stride 0 — jedes Element wird
+    mehrfach gelesen, aber nicht kopiert.
+    """
+    x = array(x)
+    shape = tuple(shape)
+    if x.shape == shape:
+        return x
+    pad = len(shape) - len(x.shape)
+    if pad < 0:
+        raise ValueError(f"broadcast_to: {x.shape} -> {shape} nicht möglich")
+    strides = []
+    for n, m, s in zip(shape, (1,) * pad + x.shape, (0,) * pad + x.strides):
+        if m == n:
+            strides.append(s)
+        elif m == 1:
+            strides.append(0)
+        else:
+            raise ValueError(f"broadcast_to: {x.shape} -> {shape} nicht möglich")
+    return ndarray(x.buffer, shape, strides, x.offset)
+
+
 def zeros(shape):
     """Array gefüllt mit Nullen."""
     if isinstance(shape, int):
         shape = (shape,)
-    flat = [0.0] * (builtins_sum(1 for _ in range(1)) and
-                    __import__('functools').reduce(lambda a, b: a*b, shape))
-    return ndarray(_unflatten(flat, shape), shape)
+    return ndarray(_buffer('d', bytes(8 * _size(shape))), shape)
 
 
 def ones(shape):
     """Array gefüllt mit Einsen."""
     if isinstance(shape, int):
         shape = (shape,)
-    import functools
-    size = functools.reduce(lambda a, b: a * b, shape)
-    flat = [1.0] * size
-    return ndarray(_unflatten(flat, shape), shape)
+    return ndarray(_buffer('d', [1.0]) * _size(shape), shape)
 
 
 def arange(n):
     """Erstellt Array [0, 1, 2, ..., n-1]."""
-    return ndarray(list(range(n)), (n,))
+    return ndarray(_buffer('q', range(n)), (n,))
 
 
 def triu(arr, k=0):
@@ -255,24 +590,15 @@ def triu(arr, k=0):
     Obere Dreiecksmatrix.
     Alle Elemente unterhalb der k-ten Diagonale werden auf 0 gesetzt.
     """
-    if isinstance(arr, ndarray):
-        data = arr.data
-        shape = arr.shape
-    else:
-        data = arr
-        shape = _get_shape(data)
-
-    rows, cols = shape
-    result = []
+    arr = array(arr)
+    rows, cols = arr.shape
+    values = arr._values()
+    result = _buffer('d', bytes(8 * rows * cols))
     for i in range(rows):
-        row = []
-        for j in range(cols):
-            if j - i >= k:
-                row.append(data[i][j] if isinstance(data[i], list) else 1.0)
-            else:
-                row.append(0.0)
-        result.append(row)
-    return ndarray(result, shape)
+        start = builtins_max(i + k, 0)
+        if start < cols:
+            result[i*cols + start:(i+1)*cols] = _buffer('d', values[i*cols + start:(i+1)*cols])
+    return ndarray(result, (rows, cols))
 
 
 def exp(x):
@@ -282,9 +608,7 @@ def exp(x):
 
 def sqrt(x):
     """Element-weise Wurzel."""
-    if isinstance(x, ndarray):
-        return _apply(x, math.sqrt)
-    return math.sqrt(x)
+    return _apply(x, math.sqrt)
 
 
 def tanh(x):
@@ -301,45 +625,18 @@ def max(x, axis=None, keepdims=False):
     """Maximum entlang einer Achse."""
     if not isinstance(x, ndarray):
         return builtins_max(x)
-
     if axis is None:
-        return builtins_max(_flatten(x.data))
-
-    shape = x.shape
-    if axis == -1:
-        axis = len(shape) - 1
-
-    # Rekursiv entlang der gewünschten Achse reduzieren
-    result_data = _reduce_axis(x.data, shape, axis, builtins_max)
-    new_shape = tuple(s for i, s in enumerate(shape) if i != axis)
-
-    if keepdims:
-        new_shape = tuple(1 if i == axis else s for i, s in enumerate(shape))
-        result_data = _add_dim(result_data, axis, len(shape))
-
-    return ndarray(result_data, new_shape if not keepdims else new_shape)
+        return builtins_max(x._values())
+    return _reduce(x, axis, builtins_max, keepdims)
 
 
 def sum(x, axis=None, keepdims=False):
     """Summe entlang einer Achse."""
     if not isinstance(x, ndarray):
         return builtins_sum(x)
-
     if axis is None:
-        return builtins_sum(_flatten(x.data))
-
-    shape = x.shape
-    if axis == -1:
-        axis = len(shape) - 1
-
-    result_data = _reduce_axis(x.data, shape, axis, builtins_sum)
-    new_shape = tuple(s for i, s in enumerate(shape) if i != axis)
-
-    if keepdims:
-        result_data = _add_dim(result_data, axis, len(shape))
-        new_shape = tuple(1 if i == axis else s for i, s in enumerate(shape))
-
-    return ndarray(result_data, new_shape)
+        return builtins_sum(x._values())
+    return _reduce(x, axis, builtins_sum, keepdims)
 
 
 def mean(x, axis=None, keepdims=False):
@@ -347,140 +644,130 @@ def mean(x, axis=None, keepdims=False):
     if not isinstance(x, ndarray):
         flat = list(x)
         return builtins_sum(flat) / len(flat)
-
     if axis is None:
-        flat = _flatten(x.data)
-        return builtins_sum(flat) / len(flat)
-
-    shape = x.shape
-    if axis == -1:
-        axis = len(shape) - 1
-
-    n = shape[axis]
-    result_data = _reduce_axis(x.data, shape, axis, lambda vals: builtins_sum(vals) / n)
-    new_shape = tuple(s for i, s in enumerate(shape) if i != axis)
-
-    if keepdims:
-        result_data = _add_dim(result_data, axis, len(shape))
-        new_shape = tuple(1 if i == axis else s for i, s in enumerate(shape))
-
-    return ndarray(result_data, new_shape)
+        return builtins_sum(x._values()) / x.size
+    return _reduce(x, axis, lambda vals: builtins_sum(vals) / len(vals), keepdims)
 
 
 def var(x, axis=None, keepdims=False):
     """Varianz entlang einer Achse."""
+    if axis is None:
+        m = mean(x)
+        diff = x - m
+        return mean(diff * diff)
     m = mean(x, axis=axis, keepdims=True)
     diff = x - m
     return mean(diff * diff, axis=axis, keepdims=keepdims)
 
 
-def matmul(a, b):
+def _matrix_rows(buf, offset, rows, cols, row_stride, col_stride):
+    """Zeilen einer (Teil-)Matrix im Puffer, jede als zusammenhängender Abschnitt."""
+    if col_stride == 0:
+        return [_buffer(buf.typecode, [buf[offset + i * row_stride]]) * cols for i in range(rows)]
+    span = (cols - 1) * col_stride + 1
+    return [buf[o:o + span:col_stride] for o in (offset + i * row_stride for i in range(rows))]
+
+
+# Skalarprodukt zweier Zeilen: math.sumprod ab Python 3.12, sonst sum(map(mul))
+_dot = getattr(math, 'sumprod', None) or (lambda x, y: builtins_sum(map(operator.mul, x, y)))
+
+
+def matmul(a, b, block_size=64):
     """
     Matrix-Multiplikation: a @ b
-    Unterstützt 2D und batched (3D, 4D) Matrizen.
+    Unterstützt 1D-Vektoren, 2D und batched (3D, 4D) Matrizen; die
+    Batch-Dimensionen werden wie bei NumPy gebroadcastet, z.B.
+    (..., m, k) @ (k, n) oder (2, 1, m, k) @ (3, k, n).
+
+    B wird einmal transponiert (als Liste seiner Spalten), danach ist
+    jedes Ergebnis-Element ein Skalarprodukt Zeile·Zeile über zwei
+    zusammenhängende Puffer-Abschnitte. Gerechnet wird in Blöcken von
+    block_size x block_size Ergebnissen, damit die gerade benutzten
+    Zeilen von A und Spalten von B im Cache bleiben.
     """
-    def _matmul_2d(a_data, b_data, m, k, n):
-        """Einfache 2D Matrix-Multiplikation: (m,k) @ (k,n) -> (m,n)"""
-        result = [[0.0] * n for _ in range(m)]
-        for i in range(m):
-            for j in range(n):
-                s = 0.0
-                for l in range(k):
-                    s += a_data[i][l] * b_data[l][j]
-                result[i][j] = s
-        return result
-
-    def _matmul_nd(a_data, b_data, a_shape, b_shape):
-        """Rekursive batched Matrix-Multiplikation."""
-        if len(a_shape) == 2:
-            m, k = a_shape
-            k2, n = b_shape
-            assert k == k2, f"Shape mismatch: {a_shape} @ {b_shape}"
-            return _matmul_2d(a_data, b_data, m, k, n)
-        else:
-            return [_matmul_nd(a_data[i], b_data[i], a_shape[1:], b_shape[1:])
-                    for i in range(a_shape[0])]
-
-    a_shape = a.shape if isinstance(a, ndarray) else _get_shape(a)
-    b_shape = b.shape if isinstance(b, ndarray) else _get_shape(b)
-    a_data = a.data if isinstance(a, ndarray) else a
-    b_data = b.data if isinstance(b, ndarray) else b
-
-    result_data = _matmul_nd(a_data, b_data, a_shape, b_shape)
-    result_shape = a_shape[:-1] + (b_shape[-1],)
-    return ndarray(result_data, result_shape)
+    a, b = array(a), array(b)
+    a_vec, b_vec = len(a.shape) == 1, len(b.shape) == 1
+    if a_vec:
+        a = a.reshape(1, a.shape[0])
+    if b_vec:
+        b = b.reshape(b.shape[0], 1)
+
+    m, k = a.shape[-2:]
+    k2, n = b.shape[-2:]
+    if k != k2:
+        raise ValueError(f"Shape mismatch: {a.shape} @ {b.shape}")
+    batch = _broadcast_shape(a.shape[:-2], b.shape[:-2])
+    a = broadcast_to(a, batch + (m, k))
+    b = broadcast_to(b, batch + (k, n))
+
+    # Start jeder Matrix im Puffer (Stride 0 bei gebroadcasteten Batch-Achsen)
+    a_starts = ndarray(a.buffer, batch, a.strides[:-2], a.offset)._indices()
+    b_starts = ndarray(b.buffer, batch, b.strides[:-2], b.offset)._indices()
+
+    typecode = 'q' if a.buffer.typecode == 'q' and b.buffer.typecode == 'q' else 'd'
+    result = _buffer(typecode, bytes(8 * _size(batch) * m * n))
+    columns = {}
+    for t, (a_start, b_start) in enumerate(zip(a_starts, b_starts)):
+        rows = _matrix_rows(a.buffer, a_start, m, k, *a.strides[-2:])
+        if b_start not in columns:
+            # Spalten von B = Zeilen von B^T: einmal pro Matrix herauslösen
+            columns[b_start] = _matrix_rows(b.buffer, b_start, n, k, b.strides[-1], b.strides[-2])
+        cols = columns[b_start]
+
+        base = t * m * n
+        for i0 in range(0, m, block_size):
+            for j0 in range(0, n, block_size):
+                block = cols[j0:j0 + block_size]
+                for i in range(i0, builtins_min(i0 + block_size, m)):
+                    row = rows[i]
+                    pos = base + i * n + j0
+                    result[pos:pos + len(block)] = _buffer(typecode, [_dot(row, col) for col in block])
+
+    shape = batch + ((m,) if not a_vec else ()) + ((n,) if not b_vec else ())
+    result = ndarray(result, shape)
+    return result if shape else result[()]
+
+
+def outer(a, b):
+    """Äußeres Produkt zweier Vektoren: (m,) x (n,) -> (m, n)."""
+    av, bv = array(a)._values(), array(b)._values()
+    return ndarray(_buffer('d', [x * y for x in av for y in bv]), (len(av), len(bv)))
 
 
 def transpose(arr, axes=None):
     """
     Transponiert ein Array entlang gegebener Achsen.
     Standard (kein axes): kehrt alle Achsen um.
-    """
-    if isinstance(arr, ndarray):
-        shape = arr.shape
-        data = arr.data
-    else:
-        shape = _get_shape(arr)
-        data = arr
 
-    ndim = len(shape)
+    Es werden nur shape und strides vertauscht — das Ergebnis ist eine
+    View auf denselben Puffer, es wird nichts kopiert.
+    """
+    arr = array(arr)
+    ndim = len(arr.shape)
 
     if axes is None:
         axes = tuple(range(ndim - 1, -1, -1))
-    elif isinstance(axes, (list, tuple)) and len(axes) == 1 and isinstance(axes[0], tuple):
+    elif isinstance(axes, (list, tuple)) and len(axes) == 1 and isinstance(axes[0], (tuple, list)):
         axes = axes[0]
+    axes = [a + ndim if a < 0 else a for a in axes]
 
-    new_shape = tuple(shape[i] for i in axes)
-
-    # Flach machen, transponieren, neu aufbauen
-    flat = _flatten(data)
-    old_strides = _compute_strides(shape)
-    new_strides = _compute_strides(new_shape)
-
-    size = len(flat)
-    result_flat = [0.0] * size
-
-    for old_idx in range(size):
-        # Alten Multi-Index berechnen
-        multi = _flat_to_multi(old_idx, shape, old_strides)
-        # Neuen Multi-Index durch Achsentausch
-        new_multi = tuple(multi[axes[i]] for i in range(ndim))
-        # Neuen flachen Index berechnen
-        new_idx = _multi_to_flat(new_multi, new_strides)
-        result_flat[new_idx] = flat[old_idx]
-
-    return ndarray(_unflatten(result_flat, new_shape), new_shape)
+    return ndarray(arr.buffer,
+                   tuple(arr.shape[i] for i in axes),
+                   tuple(arr.strides[i] for i in axes),
+                   arr.offset)
 
 
 def append(arr, values, axis=None):
     """Hängt values an arr an."""
-    if isinstance(arr, ndarray):
-        arr_data = arr.data
-        arr_shape = arr.shape
-    else:
-        arr_data = arr
-        arr_shape = _get_shape(arr)
-
-    if isinstance(values, ndarray):
-        val_data = values.data
-    else:
-        val_data = values
-
     if axis is None:
-        flat = _flatten(arr_data) + _flatten(val_data)
-        return ndarray(flat, (len(flat),))
-    elif axis == 1:
-        result = [arr_data[0][i] for i in range(arr_shape[1])] + _flatten(val_data)
-        new_shape = (arr_shape[0], arr_shape[1] + (_get_shape(val_data)[-1] if isinstance(val_data[0], list) else 1))
-        return ndarray([result], new_shape)
-
-    raise NotImplementedError(f"append mit axis={axis} nicht implementiert")
+        return _concatenate([array(arr).flatten(), array(values).flatten()], 0)
+    return _concatenate([arr, values], axis)
 
 
 def savez(path, **arrays):
     """Speichert Arrays als .npz (delegiert an numpy für Kompatibilität)."""
     import numpy as _np
-    converted = {k: _np.array(_flatten(v.data)).reshape(v.shape)
+    converted = {k: _np.array(v.tolist())
                  if isinstance(v, ndarray) else v
                  for k, v in arrays.items()}
     _np.savez(path, **converted)
@@ -490,19 +777,13 @@ def load(path, allow_pickle=False):
     """Lädt .npz Datei (delegiert an numpy)."""
     import numpy as _np
     data = _np.load(path, allow_pickle=allow_pickle)
-    return {k: ndarray(v.tolist(), v.shape) for k, v in data.items()}
+    return {k: ndarray(_buffer('q' if v.dtype.kind in 'iub' else 'd', v.ravel().tolist()), v.shape)
+            for k, v in data.items()}
 
 
 def zeros_like(arr):
     """Array mit Nullen in gleicher Shape wie arr."""
-    if isinstance(arr, ndarray):
-        shape = arr.shape
-    else:
-        shape = _get_shape(arr)
-    import functools
-    size = functools.reduce(lambda a, b: a * b, shape)
-    flat = [0.0] * size
-    return ndarray(_unflatten(flat, shape), shape)
+    return zeros(_get_shape(arr))
 
 
 def maximum(a, b):
@@ -510,159 +791,22 @@ def maximum(a, b):
     Element-weises Maximum zweier Arrays oder Array und Skalar.
     Entspricht np.maximum(a, b) — nicht np.max(a).
     """
-    return _elementwise(a, b, lambda x, y: x if x > y else y)
+    return _elementwise(a, b, lambda x, y: x if x > y else y, 'same')
 
 
 def argmax(x, axis=None):
     """
     Index des größten Elements.
-    Ohne axis: globales Argmax als Integer.
+    Ohne axis: globales Argmax als Integer, sonst ein Array von Indizes.
     """
-    if isinstance(x, ndarray):
-        flat = _flatten(x.data)
-    else:
-        flat = list(x)
+    def _argmax(values):
+        return builtins_max(range(len(values)), key=values.__getitem__)
 
+    if not isinstance(x, ndarray):
+        return _argmax(list(x))
     if axis is None:
-        best_idx = 0
-        best_val = flat[0]
-        for i, v in enumerate(flat):
-            if v > best_val:
-                best_val = v
-                best_idx = i
-        return best_idx
-
-    raise NotImplementedError("argmax mit axis ist noch nicht implementiert")
-
-
-class random:
-    @staticmethod
-    def choice(n, p=None):
-        """Wählt zufällig einen Index basierend auf Wahrscheinlichkeiten p."""
-        if p is None:
-            import random as _r
-            return _r.randint(0, n - 1)
-
-        if isinstance(p, ndarray):
-            p = _flatten(p.data)
-
-        # Kumulierte Summe
-        cumsum = []
-        s = 0.0
-        for prob in p:
-            s += prob
-            cumsum.append(s)
-
-        # Zufallszahl zwischen 0 und 1
-        import random as _r
-        r = _r.random()
-
-        # Ersten Index finden wo kumulative Summe > r
-        for i, cs in enumerate(cumsum):
-            if r <= cs:
-                return i
-        return n - 1
-
-    @staticmethod
-    def seed(s):
-        """Setzt den Zufallszahlenseed für Reproduzierbarkeit."""
-        import random as _r
-        _r.seed(s)
-
-    @staticmethod
-    def shuffle(lst):
-        """
-        Mischst eine Liste in-place (wie np.random.shuffle).
-        Arbeitet direkt auf der Liste, kein Rückgabewert.
-        Fisher-Yates Algorithmus.
-        """
-        import random as _r
-        n = len(lst)
-        for i in range(n - 1, 0, -1):
-            j = _r.randint(0, i)
-            lst[i], lst[j] = lst[j], lst[i]
-
-    @staticmethod
-    def randn(*shape):
-        """
-        Normalverteilte Zufallswerte (Mittelwert=0, Std=1).
-        Verwendet Box-Muller-Transformation.
-        Beispiel: random.randn(3, 4) -> ndarray mit shape (3, 4)
-        """
-        import random as _r
-
-        def _box_muller():
-            """Erzeugt eine standardnormalverteilte Zahl via Box-Muller."""
-            while True:
-                u1 = _r.random()
-                u2 = _r.random()
-                if u1 > 0:
-                    break
-            z = math.sqrt(-2.0 * math.log(u1)) * math.cos(2.0 * math.pi * u2)
-            return z
-
-        if len(shape) == 1 and isinstance(shape[0], tuple):
-            shape = shape[0]
-
-        import functools
-        size = functools.reduce(lambda a, b: a * b, shape)
-        flat = [_box_muller() for _ in range(size)]
-        return ndarray(_unflatten(flat, shape), shape)
-
-
-# =============================================================================
-# INTERNE HILFSFUNKTIONEN FÜR TRANSPOSE
-# =============================================================================
-
-def _compute_strides(shape):
-    """Berechnet Strides für einen C-order Array."""
-    strides = []
-    s = 1
-    for dim in reversed(shape):
-        strides.append(s)
-        s *= dim
-    return list(reversed(strides))
-
-
-def _flat_to_multi(flat_idx, shape, strides):
-    """Konvertiert flachen Index in Multi-Index."""
-    multi = []
-    for i, stride in enumerate(strides):
-        multi.append(flat_idx // stride)
-        flat_idx %= stride
-    return tuple(multi)
-
-
-def _multi_to_flat(multi, strides):
-    """Konvertiert Multi-Index in flachen Index."""
-    return builtins_sum(m * s for m, s in zip(multi, strides))
-
-
-def _reduce_axis(data, shape, axis, func):
-    """Reduziert ein Array entlang einer Achse mit func."""
-    if len(shape) == 1:
-        return func(data)
-    if axis == 0:
-        # Über erste Dimension reduzieren
-        if len(shape) == 2:
-            cols = shape[1]
-            return [func([data[i][j] for i in range(shape[0])]) for j in range(cols)]
-        else:
-            return [_reduce_axis([data[i][j] for i in range(shape[0])],
-                                  shape[1:], axis - 1, func)
-                    for j in range(shape[1])]
-    else:
-        return [_reduce_axis(data[i], shape[1:], axis - 1, func)
-                for i in range(shape[0])]
-
-
-def _add_dim(data, axis, ndim):
-    """Fügt eine Dimension an Position axis ein (für keepdims)."""
-    if axis == 0:
-        return [data]
-    if isinstance(data, list):
-        return [_add_dim(item, axis - 1, ndim - 1) for item in data]
-    return [data]
+        return _argmax(x._values())
+    return _reduce(x, axis, _argmax, False)
 
 
 # =============================================================================
@@ -682,34 +826,10 @@ def vstack(arrays):
     In der LSTM-Zelle genutzt um h_prev und x zu [h; x] zusammenzuführen:
         concat = np.vstack([h_prev, x])
     """
-    flat_all = []
-    total_rows = 0
-    cols = None
-
-    for arr in arrays:
-        if isinstance(arr, ndarray):
-            data = arr.data
-            shape = arr.shape
-        else:
-            data = arr
-            shape = _get_shape(arr)
-
-        # Sicherstellen dass wir 2D haben
-        if len(shape) == 1:
-            # (n,) → (n, 1)
-            data = [[x] for x in _flatten(data)]
-            shape = (shape[0], 1)
-
-        rows, c = shape
-        if cols is None:
-            cols = c
-        assert cols == c, f"vstack: Spaltenanzahl stimmt nicht überein ({cols} vs {c})"
-
-        flat_all.extend(data)
-        total_rows += rows
-
-    new_shape = (total_rows, cols)
-    return ndarray(flat_all, new_shape)
+    arrays = [array(a) for a in arrays]
+    # Sicherstellen dass wir 2D haben: (n,) -> (1, n) wie bei NumPy
+    arrays = [a.reshape(1, a.shape[0]) if len(a.shape) == 1 else a for a in arrays]
+    return _concatenate(arrays, 0)
 
 
 def clip(x, a_min, a_max):
@@ -728,9 +848,7 @@ def clip(x, a_min, a_max):
             return float(a_max)
         return v
 
-    if isinstance(x, ndarray):
-        return _apply(x, _clip_val)
-    return _clip_val(x)
+    return _apply(x, _clip_val)
 
 
 def convolve(a, b, mode='full'):
@@ -746,10 +864,8 @@ def convolve(a, b, mode='full'):
     In der LSTM-Implementierung genutzt für den geglätteten Trainingsverlauf:
         smooth = np.convolve(losses, np.ones(window)/window, mode='valid')
     """
-    if isinstance(a, ndarray):
-        a = _flatten(a.data)
-    if isinstance(b, ndarray):
-        b = _flatten(b.data)
+    a = _flatten(a)
+    b = _flatten(b)
 
     na, nb = len(a), len(b)
     full_len = na + nb - 1
@@ -763,7 +879,7 @@ def convolve(a, b, mode='full'):
         return ndarray(result, (full_len,))
     elif mode == 'valid':
         valid_len = builtins_max(na, nb) - builtins_min(na, nb) + 1
-        start = min(na, nb) - 1
+        start = builtins_min(na, nb) - 1
         valid = result[start:start + valid_len]
         return ndarray(valid, (valid_len,))
     elif mode == 'same':
@@ -774,41 +890,26 @@ def convolve(a, b, mode='full'):
         raise NotImplementedError(f"convolve: mode='{mode}' nicht unterstützt")
 
 
-def ones(shape):
-    """Array gefüllt mit Einsen (falls noch nicht vorhanden)."""
-    if isinstance(shape, int):
-        shape = (shape,)
-    import functools
-    size = functools.reduce(lambda a, b: a * b, shape)
-    flat = [1.0] * size
-    return ndarray(_unflatten(flat, shape), shape)
-
-
 # =============================================================================
-# ERGÄNZUNGEN IN DER random-KLASSE
+# ZUFALLSZAHLEN: np.random.*
 # =============================================================================
 
 class random:
     @staticmethod
     def choice(n, p=None):
         """Wählt zufällig einen Index basierend auf Wahrscheinlichkeiten p."""
+        import random as _r
         if p is None:
-            import random as _r
             return _r.randint(0, n - 1)
 
-        if isinstance(p, ndarray):
-            p = _flatten(p.data)
+        p = _flatten(p)
 
-        cumsum = []
+        # Ersten Index finden wo die kumulative Summe >= r ist
+        r = _r.random()
         s = 0.0
-        for prob in p:
+        for i, prob in enumerate(p):
             s += prob
-            cumsum.append(s)
-
-        import random as _r
-        r = _r.random()
-        for i, cs in enumerate(cumsum):
-            if r <= cs:
+            if r <= s:
                 return i
         return n - 1
 
@@ -820,7 +921,11 @@ class random:
 
     @staticmethod
     def shuffle(lst):
-        """Mischt eine Liste in-place (Fisher-Yates)."""
+        """
+        Mischt eine Liste in-place (wie np.random.shuffle).
+        Arbeitet direkt auf der Liste, kein Rückgabewert.
+        Fisher-Yates Algorithmus.
+        """
         import random as _r
         n = len(lst)
         for i in range(n - 1, 0, -1):
@@ -832,10 +937,12 @@ class random:
         """
         Normalverteilte Zufallswerte (Mittelwert=0, Std=1).
         Verwendet Box-Muller-Transformation.
+        Beispiel: random.randn(3, 4) -> ndarray mit shape (3, 4)
         """
         import random as _r
 
         def _box_muller():
+            """Erzeugt eine standardnormalverteilte Zahl via Box-Muller."""
             while True:
                 u1 = _r.random()
                 u2 = _r.random()
@@ -846,10 +953,8 @@ class random:
         if len(shape) == 1 and isinstance(shape[0], tuple):
             shape = shape[0]
 
-        import functools
-        size = functools.reduce(lambda a, b: a * b, shape)
-        flat = [_box_muller() for _ in range(size)]
-        return ndarray(_unflatten(flat, shape), shape)
+        flat = _buffer('d', [_box_muller() for _ in range(_size(shape))])
+        return ndarray(flat, shape)
 
     @staticmethod
     def randint(low, high=None):
@@ -892,11 +997,80 @@ class random:
         else:
             shape = tuple(size)
 
-        import functools
-        n = functools.reduce(lambda a, b: a * b, shape)
-        flat = [_one() for _ in range(n)]
-        return ndarray(_unflatten(flat, shape), shape)
+        flat = _buffer('d', [_one() for _ in range(_size(shape))])
+        return ndarray(flat, shape)
 
 
 # Damit np.random.choice funktioniert
 random = random()
+
+
+# =============================================================================
+# INTERNE HILFSFUNKTIONEN FÜR STRIDES
+# =============================================================================
+
+def _compute_strides(shape):
+    """Berechnet Strides für einen C-order Array (in Elementen, nicht Bytes)."""
+    strides = []
+    s = 1
+    for dim in reversed(shape):
+        strides.append(s)
+        s *= dim
+    return tuple(reversed(strides))
+
+
+# =============================================================================
+# BENCHMARK: my_numpy gegen NumPy
+# =============================================================================
+
+def benchmark(sizes=(16, 32, 64, 128), repeat_count=3):
+    """
+    Vergleicht my_numpy mit dem echten NumPy über mehrere Größen:
+    Matrix-Multiplikation (2D und batched), Broadcasting und Softmax.
+    Ausgegeben werden die beste von repeat_count Zeiten, der Faktor
+    my_numpy/NumPy und die größte Abweichung der Ergebnisse.
+    """
+    import sys
+    import time
+    import numpy as _np
+
+    my_np = sys.modules[__name__]
+
+    def _best(func):
+        best = float('inf')
+        for _ in range(repeat_count):
+            start = time.perf_counter()
+            result = func()
+            best = builtins_min(best, time.perf_counter() - start)
+        return best, result
+
+    def _softmax(lib, x):
+        e = lib.exp(x - lib.max(x, axis=-1, keepdims=True))
+        return e / lib.sum(e, axis=-1, keepdims=True)
+
+    print(f"{'Operation':<30}{'my_numpy':>12}{'NumPy':>12}{'Faktor':>10}{'max. Fehler':>14}")
+    for n in sizes:
+        reference = {'a': _np.random.randn(n, n), 'b': _np.random.randn(n, n),
+                     'v': _np.random.randn(n), 'c': _np.random.randn(n, 1),
+                     'x': _np.random.randn(4, n, n)}
+        mine = {key: array(value.tolist()) for key, value in reference.items()}
+        cases = [
+            (f"matmul {n}x{n} @ {n}x{n}", lambda lib, d: d['a'] @ d['b']),
+            (f"matmul 4x{n}x{n} @ {n}x{n}", lambda lib, d: d['x'] @ d['b']),
+            (f"add {n}x{n} + ({n},)", lambda lib, d: d['a'] + d['v']),
+            (f"mul {n}x{n} * ({n}, 1)", lambda lib, d: d['a'] * d['c']),
+            (f"softmax 4x{n}x{n}", lambda lib, d: _softmax(lib, d['x'])),
+        ]
+        for name, op in cases:
+            t_mine, r_mine = _best(lambda: op(my_np, mine))
+            t_np, r_np = _best(lambda: op(_np, reference))
+            error = float(_np.abs(_np.array(r_mine.tolist()) - r_np).max())
+            print(f"{name:<30}{t_mine * 1000:>10.2f}ms{t_np * 1000:>10.3f}ms"
+                  f"{t_mine / t_np:>9.0f}x{error:>14.1e}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Aufruf: python3 my_numpy.py [größe ...]
+    benchmark(tuple(int(arg) for arg in sys.argv[1:]) or (16, 32, 64, 128))
@@ -7,6 +7,9 @@ Zeigt die Grundprinzipien eines Transformers ohne Framework-Magie
 
 import numpy as np
 
+from kv_cache import KVCache
+from sampling import check_sampling_args, sample_logits
+
 
 def softmax(x):
     """Numerisch stabile Softmax-Funktion"""
@@ -14,9 +17,18 @@ def softmax(x):
     return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
 
 
+def softmax_inplace(x):
+    """Softmax, die x überschreibt (spart temporäre Arrays)"""
+    x -= np.max(x, axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= np.sum(x, axis=-1, keepdims=True)
+    return x
+
+
 def gelu(x):
     """GELU Aktivierungsfunktion (Gaussian Error Linear Unit)"""
-    return 0.5 * x * (1 + np.tanh(np.sqrt(2 / np.pi) * (x + 0.044715 * x**3)))
+    # float(): ein NumPy-float64-Skalar würde float32 auf float64 hochstufen
+    return 0.5 * x * (1 + np.tanh(float(np.sqrt(2 / np.pi)) * (x + 0.044715 * x**3)))
 
 
 def layer_norm(x, gamma, beta, eps=1e-5):
@@ -34,7 +46,7 @@ def layer_norm(x, gamma, beta, eps=1e-5):
     return gamma * normalized + beta
 
 
-def linear(x, weight, bias=None):
+def linear(x, weight, bias=None, out=None):
     """
     Lineare Transformation (Fully Connected Layer)
 
@@ -42,8 +54,9 @@ def linear(x, weight, bias=None):
         x: Input [..., in_features]
         weight: Gewichtsmatrix [out_features, in_features]
         bias: Bias-Vektor [out_features]
+        out: Optionaler Ergebnis-Puffer [..., out_features]
     """
-    output = x @ weight.T
+    output = np.matmul(x, weight.T, out=out)
     if bias is not None:
         output += bias
     return output
@@ -60,76 +73,90 @@ class MultiHeadAttention:
         self.num_heads = num_heads
         self.head_dim = embedding_dim // num_heads
 
+        self.scale = float(1 / np.sqrt(self.head_dim))
+
         assert embedding_dim % num_heads == 0, "embedding_dim muss durch num_heads teilbar sein"
 
+        # Arbeitspuffer, über alle Aufrufe wiederverwendet
+        self._buffers = {}
+
         print(f"Multi-Head Attention:")
         print(f"  Embedding-Dim: {embedding_dim}")
         print(f"  Anzahl Heads: {num_heads}")
         print(f"  Head-Dimension: {self.head_dim}")
 
-    def split_heads(self, x):
-        """
-        Teilt Embedding in mehrere Attention-Heads
-        [batch, seq_len, embedding_dim] → [batch, num_heads, seq_len, head_dim]
-        """
-        batch_size, seq_len, _ = x.shape
-        x = x.reshape(batch_size, seq_len, self.num_heads, self.head_dim)
-        return x.transpose(0, 2, 1, 3)  # [batch, heads, seq, head_dim]
+    def _workspace(self, name, shape, dtype):
+        """Zusammenhängender Puffer der Form shape (wächst nur bei Bedarf)"""
+        size = int(np.prod(shape))
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.size < size or buffer.dtype != dtype:
+            buffer = self._buffers[name] = np.empty(size, dtype=dtype)
+        return buffer[:size].reshape(shape)
 
-    def merge_heads(self, x):
+    def split_heads(self, qkv):
         """
-        Kombiniert Heads wieder zurück
-        [batch, num_heads, seq_len, head_dim] → [batch, seq_len, embedding_dim]
+        Teilt die gemeinsame QKV-Projektion in Q, K, V und in Heads
+        [batch, seq_len, 3*embedding_dim] → 3 x [batch, num_heads, seq_len, head_dim]
+        (nur Views, keine Kopien)
         """
-        batch_size, _, seq_len, _ = x.shape
-        x = x.transpose(0, 2, 1, 3)  # [batch, seq, heads, head_dim]
-        return x.reshape(batch_size, seq_len, self.embedding_dim)
+        batch_size, seq_len, _ = qkv.shape
+        x = qkv.reshape(batch_size, seq_len, 3, self.num_heads, self.head_dim)
+        q, k, v = x.transpose(2, 0, 3, 1, 4)  # je [batch, heads, seq, head_dim]
+        return q, k, v
 
-    def forward(self, x, w_q, w_k, w_v, w_o, causal_mask=None):
+    def forward(self, x, w_qkv, w_o, causal_mask=None, kv_cache=None, layer_idx=0):
         """
         Forward Pass der Multi-Head Attention
 
         Args:
             x: Input [batch, seq_len, embedding_dim]
-            w_q, w_k, w_v: Query, Key, Value Gewichte
+            w_qkv: Query, Key, Value Gewichte untereinander [3*emb_dim, emb_dim]
             w_o: Output Projektion
             causal_mask: Verhindert Blick in die Zukunft
+            kv_cache: KVCache mit Keys/Values der früheren Positionen
+            layer_idx: Layer, zu dem dieser Attention-Block gehört
+
+        Die Attention Weights liegen im Arbeitspuffer und gelten nur bis
+        zum nächsten Aufruf.
         """
         batch_size, seq_len, _ = x.shape
 
-        # 1. Linear Projektionen: Q, K, V
-        q = linear(x, w_q)  # Query
-        k = linear(x, w_k)  # Key
-        v = linear(x, w_v)  # Value
+        # 1. Linear Projektion: Q, K, V in einem Matmul
+        qkv = self._workspace('qkv', (batch_size, seq_len, 3 * self.embedding_dim), x.dtype)
+        linear(x, w_qkv, out=qkv)
 
-        # 2. Split in multiple Heads
-        q = self.split_heads(q)  # [batch, heads, seq, head_dim]
-        k = self.split_heads(k)
-        v = self.split_heads(v)
+        # 2. Split in Q, K, V und multiple Heads
+        q, k, v = self.split_heads(qkv)  # [batch, heads, seq, head_dim]
+
+        # KV-Cache: neue Keys/Values anhängen, ältere wiederverwenden
+        if kv_cache is not None:
+            k, v = kv_cache.append(layer_idx, k, v)
 
         # 3. Scaled Dot-Product Attention
         # Attention(Q, K, V) = softmax(Q * K^T / sqrt(d_k)) * V
 
-        # Q * K^T
-        attention_scores = np.matmul(q, k.transpose(0, 1, 3, 2))
+        # Q * K^T, direkt in den Arbeitspuffer
+        attention_scores = self._workspace(
+            'scores', (batch_size, self.num_heads, seq_len, k.shape[2]), x.dtype)
+        np.matmul(q, k.transpose(0, 1, 3, 2), out=attention_scores)
         # [batch, heads, seq, seq]
 
         # Scale
-        attention_scores = attention_scores / np.sqrt(self.head_dim)
+        attention_scores *= self.scale
 
         # 4. Causal Mask anwenden (für autoregressives Generieren)
         if causal_mask is not None:
-            attention_scores = attention_scores + causal_mask
-
-        # 5. Softmax → Attention Weights
-        attention_weights = softmax(attention_scores)
+            attention_scores += causal_mask
 
-        # 6. Weighted Sum of Values
-        attention_output = np.matmul(attention_weights, v)
-        # [batch, heads, seq, head_dim]
+        # 5. Softmax → Attention Weights (in-place)
+        attention_weights = softmax_inplace(attention_scores)
 
-        # 7. Merge Heads zurück
-        attention_output = self.merge_heads(attention_output)
+        # 6. Weighted Sum of Values, gleich in der Anordnung
+        # [batch, seq, heads, head_dim] — 7. Merge Heads ist dann nur reshape
+        merged = self._workspace(
+            'output', (batch_size, seq_len, self.num_heads, self.head_dim), x.dtype)
+        np.matmul(attention_weights, v, out=merged.transpose(0, 2, 1, 3))
+        attention_output = merged.reshape(batch_size, seq_len, self.embedding_dim)
         # [batch, seq, embedding_dim]
 
         # 8. Output Projektion
@@ -183,7 +210,7 @@ class TransformerBlock:
 
         print(f"\nTransformer Block initialisiert")
 
-    def forward(self, x, params, causal_mask=None):
+    def forward(self, x, params, causal_mask=None, kv_cache=None, layer_idx=0):
         """
         Forward Pass durch den Transformer Block
 
@@ -191,6 +218,8 @@ class TransformerBlock:
             x: Input [batch, seq_len, embedding_dim]
             params: Dictionary mit allen Gewichten
             causal_mask: Causal Mask für Attention
+            kv_cache: KVCache für inkrementelles Generieren
+            layer_idx: Nummer dieses Blocks
         """
         # 1. Multi-Head Self-Attention mit Residual Connection
         # Layer Norm vor Attention (Pre-LN Transformer)
@@ -198,11 +227,11 @@ class TransformerBlock:
 
         attention_out, attn_weights = self.attention.forward(
             normed_x,
-            params['attn_wq'],
-            params['attn_wk'],
-            params['attn_wv'],
+            params['attn_wqkv'],
             params['attn_wo'],
-            causal_mask
+            causal_mask,
+            kv_cache,
+            layer_idx
         )
 
         # Residual Connection
@@ -281,10 +310,8 @@ class PicoGPT:
         for layer_idx in range(self.num_layers):
             prefix = f'layer{layer_idx}_'
 
-            # Attention Gewichte
-            params[prefix + 'attn_wq'] = np.random.randn(self.embedding_dim, self.embedding_dim) * 0.02
-            params[prefix + 'attn_wk'] = np.random.randn(self.embedding_dim, self.embedding_dim) * 0.02
-            params[prefix + 'attn_wv'] = np.random.randn(self.embedding_dim, self.embedding_dim) * 0.02
+            # Attention Gewichte — Q, K, V untereinander in einer Matrix
+            params[prefix + 'attn_wqkv'] = np.random.randn(3 * self.embedding_dim, self.embedding_dim) * 0.02
             params[prefix + 'attn_wo'] = np.random.randn(self.embedding_dim, self.embedding_dim) * 0.02
 
             # Layer Norm Parameter
@@ -308,7 +335,8 @@ class PicoGPT:
         params['output_w'] = np.random.randn(self.vocab_size, self.embedding_dim) * 0.02
         params['output_b'] = np.zeros(self.vocab_size)
 
-        return params
+        # Durchgehend float32: halber Speicher, doppelter Matmul-Durchsatz
+        return {name: value.astype(np.float32) for name, value in params.items()}
 
     def _count_parameters(self):
         """Zählt die Gesamtzahl der Parameter"""
@@ -317,36 +345,39 @@ class PicoGPT:
             total += param.size
         return total
 
-    def _create_causal_mask(self, seq_len):
+    def _create_causal_mask(self, seq_len, past_len=0):
         """
         Erstellt Causal Mask: verhindert Blick in die Zukunft
+        (mit KV-Cache: past_len gecachte Positionen davor sind sichtbar)
         """
-        mask = np.triu(np.ones((seq_len, seq_len)), k=1)
-        mask = mask * -1e9  # Große negative Zahl = nach Softmax ~0
+        mask = np.triu(np.ones((seq_len, past_len + seq_len), dtype=np.float32), k=past_len + 1)
+        mask = mask * np.float32(-1e9)  # Große negative Zahl = nach Softmax ~0
         return mask
 
-    def forward(self, token_ids):
+    def forward(self, token_ids, kv_cache=None):
         """
         Forward Pass durch das gesamte Modell
 
         Args:
             token_ids: Token-IDs [batch_size, seq_len]
+            kv_cache: KVCache — token_ids sind dann nur die neuen Tokens
 
         Returns:
             logits: Vorhersagen [batch_size, seq_len, vocab_size]
         """
         batch_size, seq_len = token_ids.shape
+        past_len = kv_cache.length if kv_cache is not None else 0
 
         # 1. Token Embeddings
         x = self.params['token_emb'][token_ids]  # [batch, seq, emb_dim]
 
         # 2. Positional Embeddings hinzufügen
-        positions = np.arange(seq_len)
+        positions = np.arange(past_len, past_len + seq_len)
         pos_emb = self.params['pos_emb'][positions]
         x = x + pos_emb
 
         # 3. Causal Mask erstellen
-        causal_mask = self._create_causal_mask(seq_len)
+        causal_mask = self._create_causal_mask(seq_len, past_len)
 
         # 4. Durch alle Transformer Blocks
         all_attention_weights = []
@@ -354,9 +385,7 @@ class PicoGPT:
             # Hole Parameter für diesen Layer
             prefix = f'layer{layer_idx}_'
             layer_params = {
-                'attn_wq': self.params[prefix + 'attn_wq'],
-                'attn_wk': self.params[prefix + 'attn_wk'],
-                'attn_wv': self.params[prefix + 'attn_wv'],
+                'attn_wqkv': self.params[prefix + 'attn_wqkv'],
                 'attn_wo': self.params[prefix + 'attn_wo'],
                 'ln1_gamma': self.params[prefix + 'ln1_gamma'],
                 'ln1_beta': self.params[prefix + 'ln1_beta'],
@@ -368,9 +397,12 @@ class PicoGPT:
                 'ffn_b2': self.params[prefix + 'ffn_b2'],
             }
 
-            x, attn_weights = block.forward(x, layer_params, causal_mask)
+            x, attn_weights = block.forward(x, layer_params, causal_mask, kv_cache, layer_idx)
             all_attention_weights.append(attn_weights)
 
+        if kv_cache is not None:
+            kv_cache.advance(token_ids)
+
         # 5. Finale Layer Norm
         x = layer_norm(x, self.params['ln_final_gamma'], self.params['ln_final_beta'])
 
@@ -379,32 +411,36 @@ class PicoGPT:
 
         return logits, all_attention_weights
 
-    def generate(self, start_tokens, max_new_tokens=20, temperature=1.0):
+    def generate(self, start_tokens, max_new_tokens=20, temperature=1.0, kv_cache=None,
+                 top_k=None, top_p=None, seed=None):
         """
         Generiert Text autoregressiv (Token für Token)
 
         Args:
             start_tokens: Start-Sequenz [1, seq_len]
             max_new_tokens: Anzahl neuer Tokens
-            temperature: Sampling-Temperature
+            temperature: Sampling-Temperature (0 = greedy)
+            kv_cache: KVCache über mehrere Aufrufe (None = neuer Cache)
+            top_k, top_p: Kandidaten begrenzen, siehe sample_logits()
+            seed: Seed für reproduzierbares Sampling (None = globales np.random)
         """
+        check_sampling_args(top_k, top_p)
+        rng = np.random if seed is None else np.random.default_rng(seed)
+        if kv_cache is None:
+            kv_cache = KVCache(self.num_layers, self.max_seq_len)
         current_tokens = start_tokens.copy()
+        kv_cache.reuse(current_tokens)
 
         for i in range(max_new_tokens):
-            # Forward Pass
-            logits, _ = self.forward(current_tokens)
+            # Forward Pass nur für noch nicht gecachte Tokens
+            # (erst der Prompt, danach immer nur das neueste Token)
+            logits, _ = self.forward(current_tokens[:, kv_cache.length:], kv_cache)
 
             # Nur letztes Token interessiert uns
             last_logits = logits[0, -1, :]  # [vocab_size]
 
-            # Temperature Scaling
-            scaled_logits = last_logits / temperature
-
-            # Softmax
-            probs = softmax(scaled_logits)
-
-            # Sample nächstes Token
-            next_token = np.random.choice(self.vocab_size, p=probs)
+            # Temperature, Top-k/Top-p und Sampling
+            next_token = sample_logits(last_logits, temperature, top_k, top_p, rng)
 
             # Füge zum Kontext hinzu
             current_tokens = np.append(current_tokens, [[next_token]], axis=1)
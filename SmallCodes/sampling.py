@@ -0,0 +1,122 @@
+"""
+sampling.py - Gemeinsames Token-Sampling für SmallGPT.py, picoGPT.py und
+SimpleLLM_numpy.py
+
+sample_rows zieht für jede Zeile von logits [batch, vocab] ein Token,
+sample_logits ist die Variante für eine einzelne Zeile [vocab].
+
+  temperature: 0 = greedy (argmax)
+  top_k:       nur die k wahrscheinlichsten Tokens kommen in Frage
+  top_p:       nur die kleinste Gruppe der besten Tokens, deren
+               Wahrscheinlichkeit zusammen >= top_p ist (Nucleus Sampling)
+
+Die Kandidaten sucht np.argpartition in O(vocab); sortiert und kumuliert
+wird nur die Kandidatenmenge statt des ganzen Vokabulars. Bei top_p ohne
+top_k wächst die Kandidatenmenge (64, 256, ...), bis sie in jeder Zeile die
+Masse top_p abdeckt; über das ganze Vokabular läuft dabei nur die Summe
+für die Normierung (logsumexp), keine Sortierung.
+"""
+
+import numpy as np
+
+
+def _softmax(x):
+    """Numerisch stabile Softmax über die letzte Achse"""
+    exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
+
+
+def _logsumexp(x):
+    """log(sum(exp(x))) über die letzte Achse, numerisch stabil"""
+    peak = np.max(x, axis=-1, keepdims=True)
+    return peak + np.log(np.sum(np.exp(x - peak), axis=-1, keepdims=True))
+
+
+def _top_candidates(logits, k):
+    """Indizes der k größten Logits je Zeile (unsortiert)"""
+    rows, vocab = logits.shape
+    if k >= vocab:
+        return np.broadcast_to(np.arange(vocab), (rows, vocab))
+    return np.argpartition(logits, -k, axis=-1)[:, -k:]
+
+
+def check_sampling_args(top_k=None, top_p=None):
+    """ValueError für top_k < 1 oder top_p <= 0 (None = keine Begrenzung)"""
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k muss >= 1 sein (oder None), nicht {top_k}")
+    if top_p is not None and top_p <= 0:
+        raise ValueError(f"top_p muss > 0 sein (oder None), nicht {top_p}")
+
+
+def sample_rows(logits, temperature=1.0, top_k=None, top_p=None, rng=np.random):
+    """
+    Zieht für jede Zeile von logits [batch, vocab] ein Token — alle Zeilen
+    in einem Aufruf: Softmax, kumulierte Summe und eine Zufallszahl pro
+    Zeile (inverse CDF) statt np.random.choice Zeile für Zeile.
+
+    temperature: Zahl oder pro Zeile; 0 = greedy (argmax)
+    rng:         np.random oder ein np.random.Generator (reproduzierbar)
+    """
+    check_sampling_args(top_k, top_p)
+    rows, vocab = logits.shape
+    temperature = np.broadcast_to(
+        np.asarray(temperature, dtype=np.float32), (rows,))[:, None]
+    greedy = temperature[:, 0] <= 0
+    if greedy.all():
+        return np.argmax(logits, axis=-1)
+
+    logits = logits / np.where(greedy[:, None], np.float32(1), temperature)
+    nucleus = top_p is not None and top_p < 1.0
+
+    log_total = None
+    if top_k is not None:
+        k = min(top_k, vocab)
+    elif nucleus:
+        # Ohne top_k zählt die Masse über das ganze Vokabular
+        log_total = _logsumexp(logits)
+        k = min(64, vocab)
+        while k < vocab and (np.exp(np.take_along_axis(
+                logits, _top_candidates(logits, k), axis=-1) - log_total)
+                .sum(axis=-1) < top_p).any():
+            k = min(4 * k, vocab)
+    else:
+        k = vocab
+
+    if k < vocab or nucleus:
+        candidates = _top_candidates(logits, k)
+        candidate_logits = np.take_along_axis(logits, candidates, axis=-1)
+    else:
+        candidates = None               # ganzes Vokabular, Index = Token
+        candidate_logits = logits
+
+    if nucleus:
+        # Sortiert werden nur die k Kandidaten
+        order = np.argsort(-candidate_logits, axis=-1)
+        candidates = np.take_along_axis(candidates, order, axis=-1)
+        candidate_logits = np.take_along_axis(candidate_logits, order, axis=-1)
+
+    # Mit top_k zählt die Masse über die k Kandidaten (wie in gängigen
+    # Implementierungen)
+    if log_total is not None:
+        probs = np.exp(candidate_logits - log_total)
+    else:
+        probs = _softmax(candidate_logits)
+
+    cdf = np.cumsum(probs, axis=-1)
+    if nucleus:
+        # Ein Token bleibt, solange die Masse davor noch < top_p ist
+        probs = np.where(cdf - probs < top_p, probs, 0)
+        cdf = np.cumsum(probs, axis=-1)
+
+    u = rng.random((rows, 1)) * cdf[:, -1:]
+    picks = np.minimum((cdf < u).sum(axis=-1), k - 1)
+    tokens = picks if candidates is None else candidates[np.arange(rows), picks]
+    return np.where(greedy, np.argmax(logits, axis=-1), tokens)
+
+
+def sample_logits(logits, temperature=1.0, top_k=None, top_p=None, rng=np.random):
+    """Zieht ein Token aus logits [vocab_size], siehe sample_rows()"""
+    check_sampling_args(top_k, top_p)
+    if temperature <= 0:
+        return int(np.argmax(logits))
+    return int(sample_rows(logits[None, :], temperature, top_k, top_p, rng)[0])
@@ -1,6 +1,11 @@
+import os
 import re
 import sys
+import pickle
 import random
+import multiprocessing
+from collections import Counter
+from itertools import accumulate
 
 def read_text_file(filepath):
     with open(filepath, "r", encoding="utf-8") as file:
@@ -62,9 +67,219 @@ def generate_sentence_with_start(start_text, frequencies, n, max_length=20):
 
     return " ".join(sentence)
 
+# Präfix-Index: Kontext (n-1 Wörter) -> (Folgewörter, kumulierte Häufigkeiten).
+# Statt bei jedem Wort alle n-Gramme zu durchsuchen, ist der Kontext ein
+# Dictionary-Zugriff und random.choices mit cum_weights zieht per Bisektion
+# in O(log k). Die Reihenfolge der Folgewörter entspricht der von
+# predict_candidates, daher erzeugt derselbe Seed dieselben Sätze.
+# Die Zählungen liefert count_ngrams_parallel, load_or_build_index legt den
+# fertigen Index als Pickle neben der Textdatei ab.
+
+INDEX_VERSION = 2
+
+# Paralleles Zählen: die Datei wird an Zeilenenden in Chunks geteilt (Tokens
+# reichen nie über eine Zeile), jeder Prozess zählt die n-Gramme aller
+# gewünschten Ordnungen seines Chunks. Beim Zusammenführen fehlen nur die
+# n-Gramme über die Chunkgrenzen; dafür liefert jeder Chunk seine ersten
+# und letzten max(n)-1 Tokens mit.
+
+def _chunk_ranges(filepath, chunk_size):
+    size = os.path.getsize(filepath)
+    offsets = [0]
+    with open(filepath, "rb") as file:
+        while offsets[-1] + chunk_size < size:
+            file.seek(offsets[-1] + chunk_size)
+            file.readline()
+            offsets.append(file.tell())
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+def _count_chunk(task):
+    filepath, start, end, orders = task
+    with open(filepath, "rb") as file:
+        file.seek(start)
+        tokens = tokenize(file.read(end - start).decode("utf-8"))
+    counts = {n: Counter(zip(*(tokens[i:] for i in range(n)))) for n in orders}
+    edge = max(orders) - 1
+    return counts, tokens[:edge], tokens[-edge:] if edge else []
+
+def count_ngrams_parallel(filepath, orders, processes=None, chunk_size=1 << 23):
+    orders = sorted(set(orders))
+    edge = orders[-1] - 1
+    tasks = [(filepath, start, end, orders) for start, end in _chunk_ranges(filepath, chunk_size)]
+    totals = {n: Counter() for n in orders}
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        pool = None
+        results = map(_count_chunk, tasks)
+    else:
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap(_count_chunk, tasks)
+
+    try:
+        carry = []  # letzte max(n)-1 Tokens vor dem aktuellen Chunk
+        for counts, head, tail in results:
+            # n-Gramme über die Grenze beginnen in carry und enden in head;
+            # vor den Chunk-Zählungen eingefügt, damit die Reihenfolge des
+            # ersten Auftretens erhalten bleibt
+            joined = carry + head
+            for n in orders:
+                for i in range(max(0, len(carry) - n + 1), len(carry)):
+                    if i + n <= len(joined):
+                        totals[n][tuple(joined[i:i + n])] += 1
+                totals[n].update(counts[n])
+            carry = (carry + tail)[-edge:] if edge else []
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return totals
+
+def nest_ngram_counts(grams):
+    counts = {}
+    for gram, count in grams.items():
+        followers = counts.setdefault(gram[:-1], {})
+        followers[gram[-1]] = followers.get(gram[-1], 0) + count
+    return counts
+
+def _context_table(counts):
+    return {context: (list(followers.keys()), list(accumulate(followers.values())))
+            for context, followers in counts.items()}
+
+def build_prefix_index(counts, n):
+    contexts = _context_table(counts)
+    # Zufälliger Start wie in generate_sentence_random: jede Position im
+    # Text gleich wahrscheinlich, d.h. Kontext gewichtet mit seiner Häufigkeit
+    start_contexts = list(contexts.keys())
+    start_cum_weights = list(accumulate(cum[-1] for _, cum in contexts.values()))
+    return {
+        "version": INDEX_VERSION,
+        "n": n,
+        "contexts": contexts,
+        "start_contexts": start_contexts,
+        "start_cum_weights": start_cum_weights,
+        "backoff": {},
+    }
+
+def build_backoff_index(counts_by_order):
+    # Höchste Ordnung wie build_prefix_index, die kürzeren Kontexte als
+    # Rückfall-Tabellen: backoff[k] bildet (k-1)-Wort-Kontexte ab, k=1 ist
+    # die Unigramm-Verteilung mit dem leeren Kontext ()
+    n = max(counts_by_order)
+    index = build_prefix_index(nest_ngram_counts(counts_by_order[n]), n)
+    index["backoff"] = {k: _context_table(nest_ngram_counts(grams))
+                        for k, grams in counts_by_order.items() if k < n}
+    return index
+
+def _context_tables(index):
+    # (Ordnung, Tabelle) vom längsten zum kürzesten Kontext
+    yield index["n"], index["contexts"]
+    for k in sorted(index["backoff"], reverse=True):
+        yield k, index["backoff"][k]
+
+def _context(tokens, k):
+    return tuple(tokens[len(tokens) - (k - 1):]) if k > 1 else ()
+
+def lookup_backoff(index, tokens):
+    for k, table in _context_tables(index):
+        if k - 1 <= len(tokens):
+            entry = table.get(_context(tokens, k))
+            if entry is not None:
+                return entry
+    return None
+
+def stupid_backoff_score(index, tokens, word, alpha=0.4):
+    # Stupid Backoff (Brants et al. 2007): relative Häufigkeit im längsten
+    # Kontext, in dem das Wort vorkommt, mal alpha pro Rückfall-Stufe
+    factor = 1.0
+    for k, table in _context_tables(index):
+        if k - 1 > len(tokens):
+            continue
+        entry = table.get(_context(tokens, k))
+        if entry is not None and word in entry[0]:
+            words, cum_weights = entry
+            i = words.index(word)
+            count = cum_weights[i] - (cum_weights[i - 1] if i else 0)
+            return factor * count / cum_weights[-1]
+        factor *= alpha
+    return 0.0
+
+def save_index(index, path):
+    with open(path, "wb") as file:
+        pickle.dump(index, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_index(path):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+def default_index_path(filepath, n):
+    return f"{filepath}.{n}gram.pkl"
+
+def load_or_build_index(filepath, n, index_path=None, rebuild=False, processes=None):
+    index_path = index_path or default_index_path(filepath, n)
+    stat = os.stat(filepath)
+    source = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+
+    if not rebuild and os.path.exists(index_path):
+        try:
+            index = load_index(index_path)
+            if (index.get("version") == INDEX_VERSION and index.get("n") == n
+                    and index.get("source") == source):
+                return index
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+    # Alle Ordnungen 1..n in einem Durchlauf, die kürzeren für den Backoff
+    index = build_backoff_index(count_ngrams_parallel(filepath, range(1, n + 1), processes))
+    index["source"] = source
+    try:
+        save_index(index, index_path)
+    except OSError as e:
+        print(f"Warnung: Index konnte nicht gespeichert werden: {e}")
+    return index
+
+def choose_indexed(entry):
+    words, cum_weights = entry
+    return random.choices(words, cum_weights=cum_weights, k=1)[0]
+
+def generate_from_index(index, start_text=None, max_length=20, backoff=True):
+    # Mit backoff wird bei unbekanntem Kontext auf kürzere Kontexte
+    # ausgewichen statt abzubrechen (und der Start darf kürzer als n-1 sein)
+    n = index["n"]
+    contexts = index["contexts"]
+    backoff = backoff and bool(index["backoff"])
+
+    if start_text:
+        tokens = tokenize(start_text)
+        if len(tokens) < n - 1 and not backoff:
+            print(f"Fehler: Für N={n} müssen mindestens {n-1} Startwörter eingegeben werden.")
+            return None
+        sentence = tokens[:]
+    else:
+        if not index["start_contexts"]:
+            return ""
+        sentence = list(random.choices(index["start_contexts"],
+                                       cum_weights=index["start_cum_weights"], k=1)[0])
+
+    for _ in range(max_length):
+        if backoff:
+            entry = lookup_backoff(index, sentence)
+        else:
+            entry = contexts.get(tuple(sentence[-(n-1):]))
+        if entry is None:
+            break
+        sentence.append(choose_indexed(entry))
+
+    return " ".join(sentence)
+
 if __name__ == "__main__":
+    rebuild = "--rebuild" in sys.argv
+    if rebuild:
+        sys.argv.remove("--rebuild")
+
     if len(sys.argv) < 3:
-        print("Benutzung: python ngram.py <dateiname> <n>")
+        print("Benutzung: python ngram.py <dateiname> <n> [--rebuild]")
         sys.exit(1)
 
     filepath = sys.argv[1]
@@ -77,17 +292,13 @@ if __name__ == "__main__":
         print("Fehler: <n> muss eine ganze Zahl >= 2 sein.")
         sys.exit(1)
 
-    text = read_text_file(filepath)
-    words = tokenize(text)
-    freq = ngram_frequencies(words, n)
+    # Index wird neben der Textdatei gespeichert und nur bei Änderungen neu gezählt
+    index = load_or_build_index(filepath, n, rebuild=rebuild)
 
     print("\n=== Satzgenerierung ===")
     start_text = input(f"Startsatz eingeben (oder Enter für zufälligen Start): ").strip()
 
-    if start_text:
-        result = generate_sentence_with_start(start_text, freq, n)
-    else:
-        result = generate_sentence_random(words, freq, n)
+    result = generate_from_index(index, start_text or None)
 
     print("\nGenerierter Satz:")
     print(result)